@@ -0,0 +1,313 @@
+"""
+Cursor PCB - Admission Control
+
+Bounded queues and concurrency limits for the expensive endpoints, one per
+class of work:
+
+- "llm":    schematic generation (holds LLM quota for minutes)
+- "cpu":    kicad-cli schematic renders (cache misses only)
+- "router": pcb.py + Freerouting (a docker container using 8 cores)
+
+A request first reserves a place (reserve()): it runs at once if a slot is
+free, waits in the class's queue otherwise, and is rejected immediately with
+AdmissionRejected (HTTP 429 + Retry-After) when the queue, or the client's
+share of it, is full. Waiting requests are admitted round-robin across
+clients, so one client's burst cannot starve the others.
+
+Tickets work from async code (await ticket.wait()) and from Flask worker
+threads (ticket.wait_sync()), like llm_resilience.LLMCallLimiter.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Any, Optional, Callable, AsyncIterator, Iterator
+
+from metrics import ADMISSION_QUEUED, ADMISSION_REJECTED, ADMISSION_RUNNING, ADMISSION_WAIT
+
+LLM = "llm"
+CPU = "cpu"
+ROUTER = "router"
+
+
+class AdmissionRejected(Exception):
+    """The work class's queue (or the client's share of it) is full."""
+
+    def __init__(self, work_class: str, reason: str, retry_after: int):
+        self.work_class = work_class
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(
+            f"Server busy: {work_class} queue is full ({reason}); retry in {retry_after}s"
+        )
+
+
+class Ticket:
+    """One request's place in a WorkQueue; release() it when the work is done."""
+
+    def __init__(self, queue: "WorkQueue", client: str):
+        self.queue = queue
+        self.client = client
+        self.enqueued = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self.released = False
+        self._wake: Optional[Callable[[], None]] = None
+
+    @property
+    def admitted(self) -> bool:
+        return self.admitted_at is not None
+
+    @property
+    def waited(self) -> float:
+        """Seconds spent queued (so far, if still waiting)."""
+        return (self.admitted_at or time.monotonic()) - self.enqueued
+
+    async def wait(self) -> float:
+        """Wait until admitted; returns the queue wait in seconds."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(lambda: fut.done() or fut.set_result(None))
+
+        if self.queue._set_wake(self, wake):
+            await fut
+        return self.waited
+
+    def wait_sync(self) -> float:
+        """Block the calling thread until admitted; returns the queue wait in seconds."""
+        event = threading.Event()
+        if self.queue._set_wake(self, event.set):
+            event.wait()
+        return self.waited
+
+    def release(self) -> None:
+        """Give back the slot, or leave the queue if not admitted yet (idempotent)."""
+        self.queue._release(self)
+
+
+class WorkQueue:
+    """Concurrency limit plus a bounded, per-client fair wait queue."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_queue: int,
+        max_queued_per_client: Optional[int] = None,
+        expected_seconds: float = 30.0
+    ):
+        """
+        Args:
+            name: Work class name (metric label)
+            max_concurrent: Requests running at once
+            max_queue: Requests allowed to wait; more are rejected
+            max_queued_per_client: Waiting requests allowed per client
+                (default: half the queue, at least 1)
+            expected_seconds: Initial estimate of one request's run time,
+                used for Retry-After until real durations are known
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queued_per_client = max_queued_per_client or max(1, max_queue // 2)
+        self.avg_seconds = expected_seconds
+        self._lock = threading.Lock()
+        self._running = 0
+        self._queued = 0
+        # client -> its waiting tickets; clients are served round-robin
+        self._waiting: "OrderedDict[str, deque]" = OrderedDict()
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up for a new request."""
+        ahead = self._queued + 1
+        return max(1, min(600, math.ceil(self.avg_seconds * ahead / self.max_concurrent)))
+
+    def reserve(self, client: str) -> Ticket:
+        """
+        Take a slot, or a place in the queue.
+
+        Raises:
+            AdmissionRejected: If the queue or the client's share of it is full
+        """
+        ticket = Ticket(self, client)
+        with self._lock:
+            if self._running < self.max_concurrent and not self._queued:
+                self._running += 1
+                ticket.admitted_at = ticket.enqueued
+            else:
+                mine = self._waiting.get(client)
+                reason = None
+                if self._queued >= self.max_queue:
+                    reason = "queue_full"
+                elif mine and len(mine) >= self.max_queued_per_client:
+                    reason = "client_limit"
+                if reason:
+                    ADMISSION_REJECTED.inc(self.name, reason)
+                    raise AdmissionRejected(self.name, reason, self.retry_after())
+                self._waiting.setdefault(client, deque()).append(ticket)
+                self._queued += 1
+        if ticket.admitted:
+            ADMISSION_WAIT.observe(0.0, self.name)
+        return ticket
+
+    def _set_wake(self, ticket: Ticket, wake: Callable[[], None]) -> bool:
+        """Register ticket's wake-up; False if it is already admitted."""
+        with self._lock:
+            if ticket.admitted:
+                return False
+            ticket._wake = wake
+            return True
+
+    def _release(self, ticket: Ticket) -> None:
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            if not ticket.admitted:
+                # Gave up while waiting (cancelled or timed out)
+                queue = self._waiting.get(ticket.client)
+                if queue is not None and ticket in queue:
+                    queue.remove(ticket)
+                    self._queued -= 1
+                    if not queue:
+                        del self._waiting[ticket.client]
+                return
+            ran = time.monotonic() - ticket.admitted_at
+            self.avg_seconds += 0.2 * (ran - self.avg_seconds)
+            # Hand the slot straight to the next client in turn
+            if self._waiting:
+                client, queue = next(iter(self._waiting.items()))
+                nxt = queue.popleft()
+                self._queued -= 1
+                if queue:
+                    self._waiting.move_to_end(client)
+                else:
+                    del self._waiting[client]
+                nxt.admitted_at = time.monotonic()
+                wake = nxt._wake
+            else:
+                self._running -= 1
+                return
+        ADMISSION_WAIT.observe(nxt.waited, self.name)
+        if wake is not None:
+            wake()
+
+    @asynccontextmanager
+    async def admit(self, client: str) -> AsyncIterator[Ticket]:
+        """async with queue.admit(client) as ticket: run once admitted."""
+        ticket = self.reserve(client)
+        try:
+            await ticket.wait()
+            yield ticket
+        finally:
+            ticket.release()
+
+    @contextmanager
+    def admit_sync(self, client: str) -> Iterator[Ticket]:
+        """Blocking admit() for threaded servers (Flask)."""
+        ticket = self.reserve(client)
+        try:
+            ticket.wait_sync()
+            yield ticket
+        finally:
+            ticket.release()
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+class AdmissionScheduler:
+    """The per-class WorkQueues of one server process."""
+
+    def __init__(self, queues: Optional[Dict[str, WorkQueue]] = None):
+        """
+        Args:
+            queues: Work class -> queue (default: sized from environment, see
+                from_env)
+        """
+        self.queues = queues if queues is not None else self.from_env()
+        ADMISSION_RUNNING.set_function(
+            lambda: {(name, ): q.running for name, q in self.queues.items()}
+        )
+        ADMISSION_QUEUED.set_function(
+            lambda: {(name, ): q.queued for name, q in self.queues.items()}
+        )
+
+    @staticmethod
+    def from_env() -> Dict[str, WorkQueue]:
+        """
+        Default queues, overridable with PCB_ADMIT_<CLASS>_CONCURRENCY and
+        PCB_ADMIT_<CLASS>_QUEUE (e.g. PCB_ADMIT_ROUTER_CONCURRENCY=2).
+        """
+        defaults = {
+            # class: (concurrency, queue, expected seconds)
+            LLM: (8, 32, 60.0),
+            CPU: (os.cpu_count() or 2, 64, 2.0),
+            ROUTER: (1, 4, 120.0),
+        }
+        return {
+            name: WorkQueue(
+                name,
+                max_concurrent=_env_int(f"PCB_ADMIT_{name.upper()}_CONCURRENCY", concurrency),
+                max_queue=_env_int(f"PCB_ADMIT_{name.upper()}_QUEUE", queue),
+                expected_seconds=expected
+            )
+            for name, (concurrency, queue, expected) in defaults.items()
+        }
+
+    def __getitem__(self, work_class: str) -> WorkQueue:
+        return self.queues[work_class]
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "running": q.running,
+                "queued": q.queued,
+                "max_concurrent": q.max_concurrent,
+                "max_queue": q.max_queue,
+                "retry_after": q.retry_after(),
+            }
+            for name, q in self.queues.items()
+        }
+
+
+def client_id(headers: Any, remote_addr: Optional[str]) -> str:
+    """
+    Who a request is from, for fairness: X-Client-Id if sent, else the
+    first X-Forwarded-For address (behind a load balancer), else the peer.
+    """
+    explicit = headers.get("x-client-id")
+    if explicit:
+        return explicit.strip()[:64]
+    forwarded = headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return remote_addr or "unknown"
+
+
+_scheduler: Optional[AdmissionScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> AdmissionScheduler:
+    """Process-wide scheduler shared by the backend endpoints."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = AdmissionScheduler()
+        return _scheduler
@@ -0,0 +1,260 @@
+"""
+Cursor PCB - Structured Logging
+
+Non-blocking JSON-lines logging for PCBAgent. log() only builds a small
+dict and appends it to a queue; a background writer thread batches records
+to disk, echoes them to the terminal, and rotates the file by size. The
+most recent records are also kept in an in-memory ring buffer that the
+backend serves at /api/logs.
+
+Records carry the request ID of the run that produced them (set with
+log_context), so concurrent agents can share one log file.
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Iterator
+
+_request_id: ContextVar[Optional[str]] = ContextVar("pcb_request_id", default=None)
+_job_id: ContextVar[Optional[str]] = ContextVar("pcb_job_id", default=None)
+
+_FLUSH = object()
+_STOP = object()
+
+
+def new_request_id() -> str:
+    """Short random ID for one generation request."""
+    return uuid.uuid4().hex[:12]
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+@contextmanager
+def log_context(
+    request_id: Optional[str] = None,
+    job_id: Optional[str] = None
+) -> Iterator[str]:
+    """
+    Tag every record logged inside the block (including from tasks it
+    spawns) with request_id / job_id.
+
+    Yields:
+        The request ID in effect (a new one if none was given)
+    """
+    request_id = request_id or _request_id.get() or new_request_id()
+    tokens = [(_request_id, _request_id.set(request_id))]
+    if job_id is not None:
+        tokens.append((_job_id, _job_id.set(job_id)))
+    try:
+        yield request_id
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def format_console(record: Dict[str, Any]) -> str:
+    """Terminal form of a record, e.g. "[Phase 1] Selected 5 components"."""
+    phase = record.get("phase")
+    prefix = f"[Phase {phase}]" if phase is not None else "[Agent]"
+    return f"{prefix} {record['message']}"
+
+
+class AsyncLogWriter:
+    """Background JSON-lines writer with size-based rotation and a ring buffer."""
+
+    def __init__(
+        self,
+        path: Optional[str | Path],
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 3,
+        ring_size: int = 2000,
+        flush_interval: float = 0.2,
+        batch_size: int = 512
+    ):
+        """
+        Args:
+            path: JSON-lines log file (None = ring buffer and terminal only)
+            max_bytes: Rotate once the file grows past this size
+            backup_count: Rotated files to keep (path.1 ... path.N)
+            ring_size: Records kept in memory for recent()
+            flush_interval: Max seconds a record waits before being written
+            batch_size: Max records written per batch
+        """
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._ring: deque = deque(maxlen=ring_size)
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="pcb-agent-log", daemon=True
+        )
+        self._thread.start()
+
+    def emit(self, record: Dict[str, Any], echo: bool = False) -> None:
+        """Queue a record; returns immediately."""
+        if self._closed:
+            self.dropped += 1
+            return
+        self._ring.append(record)
+        self._queue.put((record, echo))
+
+    def recent(
+        self,
+        limit: int = 200,
+        request_id: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Newest records from the ring buffer (oldest first), optionally filtered."""
+        records = list(self._ring)
+        if request_id:
+            records = [r for r in records if r.get("request_id") == request_id]
+        if job_id:
+            records = [r for r in records if r.get("job_id") == job_id]
+        return records[-limit:] if limit else records
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until every record queued so far is written."""
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((_STOP, None))
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and isinstance(batch[-1][0], dict):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            records = [(r, echo) for r, echo in batch if isinstance(r, dict)]
+            self._write(records)
+
+            for item, arg in batch:
+                if item is _FLUSH:
+                    arg.set()
+                elif item is _STOP:
+                    return
+
+    def _write(self, records: List[tuple]) -> None:
+        if not records:
+            return
+        for record, echo in records:
+            if echo:
+                print(format_console(record))
+        if not self.path:
+            return
+        lines = "".join(
+            json.dumps(record, ensure_ascii=False, default=str) + "\n"
+            for record, _ in records
+        )
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(lines)
+                size = f.tell()
+            if size > self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            # Don't crash if logging fails, just print error
+            print(f"[Warning] Failed to write to log file: {e}")
+
+    def _rotate(self) -> None:
+        for i in range(self.backup_count - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+
+_writers: Dict[Optional[str], AsyncLogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_log_writer(path: Optional[str | Path]) -> AsyncLogWriter:
+    """
+    Process-wide writer for a log file, shared by every agent using it.
+
+    Pass None for a writer that only keeps the ring buffer and echoes to
+    the terminal.
+    """
+    key = str(Path(path).resolve()) if path else None
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = AsyncLogWriter(path)
+        return writer
+
+
+def recent_logs(
+    limit: int = 200,
+    request_id: Optional[str] = None,
+    job_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Recent records from every writer in the process, oldest first."""
+    with _writers_lock:
+        writers = list(_writers.values())
+    records = []
+    for writer in writers:
+        records.extend(writer.recent(0, request_id=request_id, job_id=job_id))
+    records.sort(key=lambda r: r.get("ts", 0))
+    return records[-limit:] if limit else records
+
+
+def make_record(
+    message: str,
+    phase: Optional[int] = None,
+    level: str = "info",
+    **fields: Any
+) -> Dict[str, Any]:
+    """Build a log record tagged with the current request/job IDs."""
+    record = {
+        "ts": time.time(),
+        "level": level,
+        "request_id": _request_id.get(),
+        "phase": phase,
+        "message": message,
+    }
+    job_id = _job_id.get()
+    if job_id is not None:
+        record["job_id"] = job_id
+    if fields:
+        record.update(fields)
+    return record
+
+
+@atexit.register
+def _close_writers() -> None:
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.close()
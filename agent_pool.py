@@ -0,0 +1,147 @@
+"""
+Cursor PCB - Shared Agent Pool
+
+One AsyncDedalus client (and its keep-alive HTTP connection pool) per
+process, owned by a long-lived event loop running on a background thread.
+Synchronous callers such as the Flask backend submit work with
+AgentPool.run(); each call gets a fresh PCBAgent bound to the shared
+client, so per-request state stays separate while connections and TLS
+sessions are reused.
+
+Usage:
+    pool = get_agent_pool(verbose=True)
+    result = pool.run(lambda agent: agent.generate_schematic(prompt, directory))
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+from typing import Dict, Any, Optional, Callable, Awaitable, TypeVar
+
+from pcb_agent import PCBAgent, create_client
+
+T = TypeVar("T")
+
+
+class AgentPool:
+    """Process-level owner of the shared client and its event loop."""
+
+    def __init__(
+        self,
+        agent_kwargs: Optional[Dict[str, Any]] = None,
+        client_factory: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Args:
+            agent_kwargs: Keyword arguments for every PCBAgent created by run()
+            client_factory: Builds the shared client (default: AsyncDedalus
+                with DEDALUS_API_KEY)
+        """
+        self.agent_kwargs = agent_kwargs or {}
+        self.client_factory = client_factory or create_client
+        self.client: Any = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._loop is not None
+
+    def start(self) -> "AgentPool":
+        """Start the event loop thread and create the shared client (idempotent)."""
+        with self._lock:
+            if self._loop is not None:
+                return self
+            client = self.client_factory()
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="pcb-agent-pool", daemon=True
+            )
+            thread.start()
+            self.client, self._loop, self._thread = client, loop, thread
+        return self
+
+    def submit(self, coro: Awaitable[T]) -> concurrent.futures.Future:
+        """Schedule a coroutine on the pool's loop; returns a concurrent Future."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run_async(
+        self,
+        fn: Callable[[PCBAgent], Awaitable[T]],
+        **agent_kwargs: Any
+    ) -> concurrent.futures.Future:
+        """
+        Start fn(agent) on the pool's loop without waiting for it.
+
+        Cancelling the returned Future cancels the running job.
+        """
+        async def job() -> T:
+            agent = PCBAgent(client=self.client, **{**self.agent_kwargs, **agent_kwargs})
+            try:
+                return await fn(agent)
+            finally:
+                await agent.aclose()
+
+        return self.submit(job())
+
+    def run(
+        self,
+        fn: Callable[[PCBAgent], Awaitable[T]],
+        timeout: Optional[float] = None,
+        **agent_kwargs: Any
+    ) -> T:
+        """
+        Run fn(agent) on the pool's loop and wait for the result.
+
+        Args:
+            fn: Coroutine function taking a PCBAgent bound to the shared client
+            timeout: Seconds to wait for the result (None = no limit)
+            **agent_kwargs: Per-call overrides of the pool's agent_kwargs
+
+        Returns:
+            Whatever fn's coroutine returns
+        """
+        return self.run_async(fn, **agent_kwargs).result(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Close the shared client and stop the loop thread."""
+        with self._lock:
+            loop, thread, client = self._loop, self._thread, self.client
+            self._loop = self._thread = self.client = None
+        if loop is None:
+            return
+        try:
+            if client is not None and hasattr(client, "aclose"):
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout)
+        except Exception:
+            pass
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            loop.close()
+
+
+_pool: Optional[AgentPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_agent_pool(**agent_kwargs: Any) -> AgentPool:
+    """
+    Process-wide pool, created on first use and closed at interpreter exit.
+
+    agent_kwargs only take effect on the call that creates the pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = AgentPool(agent_kwargs)
+        return _pool
+
+
+@atexit.register
+def _close_pool() -> None:
+    if _pool is not None:
+        _pool.close()
@@ -0,0 +1,86 @@
+"""
+Cursor PCB - Allowlist Registry
+
+Loads allow_list.json once per process and keeps an index by
+(lib, symbol) plus the canvas. The file's
+mtime is checked on each access and the registry reloads automatically
+when it changes, so edits are picked up without restarting the backend.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from component_search import ComponentIndex, entry_key
+
+
+class AllowlistSnapshot:
+    """Immutable, indexed view of one version of allow_list.json."""
+
+    def __init__(self, data: Dict[str, Any], stamp: Tuple[int, int]):
+        self.data = data
+        self.stamp = stamp
+        self.entries: List[Dict[str, Any]] = data.get("allowlist", [])
+        self.canvas: Dict[str, Any] = data.get("canvas", {})
+        self.by_key: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for entry in self.entries:
+            self.by_key.setdefault(entry_key(entry), entry)
+        self._search_index: Optional[ComponentIndex] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, lib: str, symbol: str) -> Optional[Dict[str, Any]]:
+        return self.by_key.get((lib, symbol))
+
+    @property
+    def search_index(self) -> ComponentIndex:
+        """BM25 index over the entries, built on first use."""
+        if self._search_index is None:
+            self._search_index = ComponentIndex(self.entries)
+        return self._search_index
+
+    def resolve(self, items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Full allowlist entries for items' (lib, symbol) pairs, in allowlist order."""
+        wanted = {entry_key(item) for item in items}
+        return [e for key, e in self.by_key.items() if key in wanted]
+
+
+class AllowlistRegistry:
+    """Process-wide cache of one allowlist file, reloaded on mtime change."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.loads = 0
+        self._lock = threading.Lock()
+        self._snapshot: Optional[AllowlistSnapshot] = None
+
+    def snapshot(self) -> AllowlistSnapshot:
+        """Current snapshot, reloading the file if it changed on disk."""
+        st = self.path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        current = self._snapshot
+        if current is not None and current.stamp == stamp:
+            return current
+        with self._lock:
+            if self._snapshot is None or self._snapshot.stamp != stamp:
+                with self.path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._snapshot = AllowlistSnapshot(data, stamp)
+                self.loads += 1
+            return self._snapshot
+
+
+_registries: Dict[str, AllowlistRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_allowlist(path: str | Path = "allow_list.json") -> AllowlistSnapshot:
+    """Current indexed allowlist for path, shared by every agent in the process."""
+    key = str(path)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = AllowlistRegistry(path)
+    return registry.snapshot()
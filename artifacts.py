@@ -0,0 +1,206 @@
+"""
+Cursor PCB - Artifact Writer
+
+A run's artifacts (phase outputs, prompts, netlist) are encoded and written
+by one background thread, so generate_schematic only queues them and never
+blocks the event loop on JSON encoding or disk I/O. ArtifactSink is the
+per-job handle; flush it at job end to wait for its files.
+
+Levels select what is written:
+
+- "off": nothing
+- "essential": the phase results other tools read (llm_output1.json, which
+  pcb.py places footprints from, llm_output1_with_pins.json and
+  llm_output2.json)
+- "full" (default): also the debug trail (phase0_output.json,
+  phase1_input.json, prompt2*.txt)
+
+Formats: "json" (minified, default), "pretty" (indented) and "gzip"
+(minified, written as <name>.gz).
+"""
+
+import asyncio
+import atexit
+import contextvars
+import gzip
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+from design_model import dumps
+from tracing import span
+
+OFF = "off"
+ESSENTIAL = "essential"
+FULL = "full"
+LEVELS = (OFF, ESSENTIAL, FULL)
+FORMATS = ("json", "pretty", "gzip")
+
+_STOP = object()
+
+
+def encode(data: Any, fmt: str = "json") -> bytes:
+    """
+    Bytes of an artifact: text as-is, anything else as JSON.
+
+    Args:
+        data: Prompt text, or dicts / lists / design_model objects
+        fmt: One of FORMATS
+    """
+    if isinstance(data, str):
+        text = data
+    else:
+        text = dumps(data, indent=2 if fmt == "pretty" else None)
+    raw = text.encode("utf-8")
+    # mtime=0 keeps identical artifacts byte-identical
+    return gzip.compress(raw, compresslevel=6, mtime=0) if fmt == "gzip" else raw
+
+
+class ArtifactWriter:
+    """Background thread running queued artifact writes in order."""
+
+    def __init__(self):
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="pcb-agent-artifacts", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, job: Callable[[], None]) -> None:
+        """Queue job; runs it inline once the writer is closed."""
+        if self._closed:
+            job()
+            return
+        self._queue.put(job)
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Finish queued writes and stop the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            job()
+
+
+_writer: Optional[ArtifactWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_artifact_writer() -> ArtifactWriter:
+    """Process-wide writer, shared by every agent."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ArtifactWriter()
+        return _writer
+
+
+@atexit.register
+def _close_writer() -> None:
+    if _writer is not None:
+        _writer.close()
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ArtifactSink:
+    """Artifacts of one job: a directory, a level and an encoding."""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        level: str = FULL,
+        format: str = "json",
+        writer: Optional[ArtifactWriter] = None
+    ):
+        """
+        Args:
+            directory: Where artifacts go (e.g. the job workspace)
+            level: One of LEVELS
+            format: One of FORMATS
+            writer: Background writer (default: the process-wide one)
+
+        Raises:
+            ValueError: If level or format is unknown
+        """
+        if level not in LEVELS:
+            raise ValueError(f"Unknown artifact level: {level!r}")
+        if format not in FORMATS:
+            raise ValueError(f"Unknown artifact format: {format!r}")
+        self.dir = Path(directory)
+        self.level = level
+        self.format = format
+        self.errors: List[str] = []
+        self._writer = writer or get_artifact_writer()
+
+    def enabled(self, level: str = FULL) -> bool:
+        """Whether artifacts of this level are written."""
+        return LEVELS.index(level) <= LEVELS.index(self.level) and self.level != OFF
+
+    def path(self, name: str) -> Path:
+        """File an artifact named name is written to."""
+        return self.dir / (f"{name}.gz" if self.format == "gzip" else name)
+
+    def write(self, name: str, data: Any, level: str = FULL) -> Optional[Path]:
+        """
+        Queue an artifact; returns immediately.
+
+        data is encoded on the writer thread, so it must not be changed
+        afterwards.
+
+        Args:
+            name: File name inside the directory, e.g. "llm_output1.json"
+            data: Text, or JSON-serializable data (see encode())
+            level: ESSENTIAL or FULL
+
+        Returns:
+            The path it will be written to, or None if the level is off
+        """
+        if not self.enabled(level):
+            return None
+        path = self.path(name)
+        # Runs in the caller's context, so the file.write span joins its trace
+        context = contextvars.copy_context()
+        self._writer.submit(lambda: context.run(self._write, path, data))
+        return path
+
+    def _write(self, path: Path, data: Any) -> None:
+        try:
+            payload = encode(data, self.format)
+            with span("file.write", path=str(path), bytes=len(payload)):
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(payload)
+        except (OSError, TypeError, ValueError) as e:
+            self.errors.append(f"{path.name}: {e}")
+
+    def flush(self, timeout: float = 30.0) -> List[str]:
+        """
+        Block until every artifact queued so far is written.
+
+        Returns:
+            Errors of failed writes ("<file>: <error>")
+        """
+        done = threading.Event()
+        self._writer.submit(done.set)
+        done.wait(timeout)
+        return list(self.errors)
+
+    async def aflush(self) -> List[str]:
+        """flush() for coroutines: waits without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._writer.submit(lambda: loop.call_soon_threadsafe(_resolve, future))
+        await future
+        return list(self.errors)
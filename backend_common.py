@@ -0,0 +1,89 @@
+"""
+Cursor PCB - Backend Helpers
+
+Request-independent pieces shared by the Flask test server
+(backend_test.py), the async server (server.py) and the render cache:
+the pcb.py command line, locating kicad-cli's SVG output, and paging
+symbol catalog searches.
+"""
+
+import os
+from typing import Dict, Any, List, Optional, Tuple
+
+from symbol_catalog import get_catalog
+from workspace import JobWorkspace
+
+KICAD_PYTHON = "/Applications/KiCad/KiCad.app/Contents/Frameworks/Python.framework/Versions/Current/bin/python3"
+# PCBAgent's default symbol_lib_path, indexed by /api/catalog/search
+SYMBOL_LIB = "/Applications/KiCad/KiCad.app/Contents/SharedSupport/symbols/"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SVG_EXPORT_TIMEOUT = 30
+PCB_TIMEOUT = 300
+CATALOG_PAGE_MAX = 200
+CATALOG_OFF = "Symbol catalog is off (set PCB_AGENT_CATALOG=1 to accept catalog parts)"
+
+
+def read_svg(svg_output_dir: str) -> Tuple[str, str]:
+    """
+    Path and content of the SVG kicad-cli wrote.
+
+    Raises:
+        FileNotFoundError: If the directory holds no .svg file
+    """
+    # kicad-cli creates a directory, find .svg file inside the directory
+    svg_files = [f for f in os.listdir(svg_output_dir) if f.endswith('.svg')]
+    if not svg_files:
+        raise FileNotFoundError('No SVG file found in output directory')
+    svg_path = os.path.join(svg_output_dir, svg_files[0])
+    with open(svg_path, 'r') as f:
+        return svg_path, f.read()
+
+
+def pcb_command(directory: str, job_id: Optional[str]) -> List[str]:
+    """
+    KiCad Python command running pcb.py for a project directory, placing
+    footprints from a schematic job's llm_output1.json (or its gzip
+    artifact, llm_output1.json.gz).
+
+    Raises:
+        ValueError: If job_id is missing or malformed
+        FileNotFoundError: If the job has no workspace or no placement file
+            (e.g. it ran with artifact level "off")
+    """
+    if not job_id:
+        raise ValueError('No job_id provided: pass the job_id of the schematic run to place from')
+    workspace = JobWorkspace.open(job_id, os.path.join(BASE_DIR, 'out', 'jobs'))
+    llm_output1_path = str(workspace.path('llm_output1.json'))
+    for path in (llm_output1_path, llm_output1_path + '.gz'):
+        if os.path.isfile(path):
+            return [KICAD_PYTHON, os.path.join(BASE_DIR, 'pcb.py'), directory, path]
+    raise FileNotFoundError(
+        f'Job {job_id} has no llm_output1.json to place footprints from '
+        '(was it run with artifact level "off"?)'
+    )
+
+
+def catalog_enabled() -> bool:
+    """
+    Whether the agents the backends build accept catalog parts
+    (PCB_AGENT_CATALOG=1, as read by PCBAgent). Catalog search is only
+    served then, since Phase 1 would drop the parts it finds.
+    """
+    return os.getenv("PCB_AGENT_CATALOG") == "1"
+
+
+def catalog_search(args: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    One page of /api/catalog/search results for query args q, offset, limit
+    and lib (limit is capped at CATALOG_PAGE_MAX).
+
+    Raises:
+        ValueError: If offset or limit is not an integer
+    """
+    offset = int(args.get('offset') or 0)
+    limit = min(max(int(args.get('limit') or 50), 1), CATALOG_PAGE_MAX)
+    catalog = get_catalog(SYMBOL_LIB).snapshot()
+    return catalog.search(
+        args.get('q', ''), offset=offset, limit=limit, lib=args.get('lib') or None
+    )
@@ -3,15 +3,78 @@ Simple Flask backend for testing frontend connection.
 Run with: python backend_test.py
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 import subprocess
-import os
+import time
+import traceback
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from admission import CPU, LLM, ROUTER, AdmissionRejected, client_id, get_scheduler
+from agent_logging import recent_logs
+from agent_pool import get_agent_pool
+from allowlist_registry import get_allowlist
+from backend_common import CATALOG_OFF, PCB_TIMEOUT, catalog_enabled, catalog_search, pcb_command
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    HTTP_IN_FLIGHT,
+    HTTP_LATENCY,
+    HTTP_REQUESTS,
+    observe_subprocess,
+    render as render_metrics,
+)
+from pcb_agent import load_env
+from render_cache import RenderError, etag_matches, get_render_cache, svg_response_parts
+from speculation import get_speculations, speculation_key, start_phase1
+from workspace import workspace_in_use
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Electron app
 
-KICAD_PYTHON = "/Applications/KiCad/KiCad.app/Contents/Frameworks/Python.framework/Versions/Current/bin/python3"
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    HTTP_IN_FLIGHT.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    # Route template (/api/allow-list), not the raw path
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_REQUESTS.inc(request.method, route, str(response.status_code))
+    HTTP_LATENCY.observe(time.perf_counter() - g.request_started, request.method, route)
+    ticket = g.get('admission_ticket')
+    if ticket is not None:
+        response.headers['X-Queue-Wait-Ms'] = f'{ticket.waited * 1000:.1f}'
+    return response
+
+@app.teardown_request
+def finish_request(exc):
+    HTTP_IN_FLIGHT.dec()
+
+@contextmanager
+def admitted(work_class):
+    """Wait for a slot of work_class (raises AdmissionRejected when full)."""
+    client = client_id(request.headers, request.remote_addr)
+    with get_scheduler()[work_class].admit_sync(client) as ticket:
+        g.admission_ticket = ticket
+        yield ticket
+
+def busy(e):
+    """429 for a request turned away by admission control."""
+    response = jsonify({
+        'success': False,
+        'error': str(e),
+        'work_class': e.work_class,
+        'retry_after': e.retry_after
+    })
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 429
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics in the text exposition format."""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
 
 @app.route('/api/hello', methods=['GET'])
 def hello_world():
@@ -25,27 +88,46 @@ def hello_world():
 @app.route('/api/allow-list', methods=['GET'])
 def get_allow_list():
     """Return allow_list.json data."""
-    import json
     try:
-        with open('allow_list.json', 'r') as f:
-            data = json.load(f)
-        allowlist = data.get('allowlist', [])
+        allowlist = get_allowlist('allow_list.json').entries
         return jsonify({'success': True, 'data': allowlist, 'count': len(allowlist)})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/catalog/search', methods=['GET'])
+def search_catalog():
+    """Paginated full-text search over every symbol in the KiCad libraries."""
+    if not catalog_enabled():
+        return jsonify({'success': False, 'enabled': False, 'error': CATALOG_OFF}), 404
+    try:
+        return jsonify({'success': True, **catalog_search(request.args)})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/logs', methods=['GET'])
+def get_logs():
+    """Return recent structured agent log records (newest last)."""
+    limit = request.args.get('limit', 200, type=int)
+    records = recent_logs(
+        limit=limit,
+        request_id=request.args.get('request_id'),
+        job_id=request.args.get('job_id')
+    )
+    return jsonify({'success': True, 'logs': records, 'count': len(records)})
+
 @app.route('/api/chat-components', methods=['POST'])
 def chat_components():
     """Filter components using Phase 0 only (_stage0_filter_components)."""
-    import asyncio
-    import sys
-    import os
-    
-    sys.path.insert(0, os.path.dirname(__file__))
     
     data = request.get_json()
     prompt = data.get('prompt', '')
     directory = data.get('directory', '')
+    use_cache = data.get('use_cache', True)
+    refresh_cache = data.get('refresh_cache', False)
+    filter_mode = data.get('filter_mode', 'auto')
+    speculate = data.get('speculate', True)
     
     if not prompt:
         return jsonify({'success': False, 'error': 'No prompt provided'}), 400
@@ -54,28 +136,33 @@ def chat_components():
         return jsonify({'success': False, 'error': 'No directory provided'}), 400
     
     try:
-        from pcb_agent import PCBAgent
-        
-        async def run_filter():
-            agent = PCBAgent(verbose=True)
-            try:
-                # Only run Phase 0: filter components
-                filtered_components = await agent._stage0_filter_components(prompt)
-                return filtered_components
-            finally:
-                await agent.aclose()
+        # Only run Phase 0: filter components (on the shared client's loop)
+        pool = get_agent_pool(verbose=True)
+        filtered_components = pool.run(
+            lambda agent: agent._stage0_filter_components(
+                prompt,
+                use_cache=use_cache,
+                refresh_cache=refresh_cache,
+                mode=filter_mode
+            )
+        )
         
-        # Execute async function
-        filtered_components = asyncio.run(run_filter())
+        # Start Phase 1 while the user reviews the list; /api/generate reuses
+        # it if the list comes back unchanged
+        speculation_id = None
+        if speculate:
+            speculation_id = start_phase1(
+                pool, get_speculations(), prompt, filtered_components, use_cache=use_cache
+            )
         
         return jsonify({
             'success': True,
             'components': filtered_components,
+            'speculation_id': speculation_id,
             'message': f'I found {len(filtered_components)} components for your circuit. Would you like to add or remove any components?'
         })
         
     except Exception as e:
-        import traceback
         return jsonify({
             'success': False,
             'error': str(e),
@@ -85,18 +172,20 @@ def chat_components():
 @app.route('/api/generate', methods=['POST'])
 def generate():
     """Generate schematic using PCB Agent - Full Workflow."""
-    from flask import request
-    import asyncio
-    import sys
-    import os
-    
-    # Add parent directory to path for imports
-    sys.path.insert(0, os.path.dirname(__file__))
     
     data = request.get_json()
     prompt = data.get('prompt', '')
     directory = data.get('directory', '')
     selected_components = data.get('selected_components', None)
+    use_cache = data.get('use_cache', True)
+    refresh_cache = data.get('refresh_cache', False)
+    stream = data.get('stream', False)
+    netlist_mode = data.get('netlist_mode', 'auto')
+    request_id = data.get('request_id')
+    job_id = data.get('job_id')
+    speculation_id = data.get('speculation_id')
+    resume = data.get('resume', False)
+    from_phase = data.get('from_phase')
     
     if not prompt:
         return jsonify({
@@ -111,98 +200,144 @@ def generate():
         }), 400
     
     try:
-        # Import PCBAgent
-        from pcb_agent import PCBAgent
-        
-        # Run full generate_schematic workflow
-        async def run_generation():
-            agent = PCBAgent(verbose=True)
-            try:
-                result = await agent.generate_schematic(
+        with admitted(LLM):
+            # Phase 1 started by /api/chat-components; cancelled if the user
+            # changed the prompt or the component list since
+            speculative_phase1 = None
+            if speculation_id:
+                speculative_phase1 = get_speculations().claim(
+                    speculation_id, speculation_key(prompt, selected_components or [])
+                )
+                if speculative_phase1 is not None and not job_id:
+                    job_id = speculation_id
+            
+            # Run full generate_schematic workflow on the shared client's loop
+            result = get_agent_pool(verbose=True).run(
+                lambda agent: agent.generate_schematic(
                     user_prompt=prompt,
                     directory_path=directory,
-                    selected_components=selected_components
+                    selected_components=selected_components,
+                    use_cache=use_cache,
+                    refresh_cache=refresh_cache,
+                    stream=stream,
+                    netlist_mode=netlist_mode,
+                    request_id=request_id,
+                    job_id=job_id,
+                    speculative_phase1=speculative_phase1,
+                    resume=resume,
+                    from_phase=from_phase
                 )
-                return result
-            finally:
-                await agent.aclose()
-        
-        # Execute async function
-        result = asyncio.run(run_generation())
+            )
         
         return jsonify(result)
         
+    except AdmissionRejected as e:
+        return busy(e)
     except Exception as e:
-        import traceback
         return jsonify({
             'success': False,
             'error': str(e),
             'traceback': traceback.format_exc()
         }), 500
 
+def render_admitted(schematic_path):
+    """Cached render; a cache miss waits for a CPU slot."""
+    cache = get_render_cache()
+    if cache.lookup(schematic_path) is not None:
+        return cache.render(schematic_path)
+    with admitted(CPU):
+        return cache.render(schematic_path)
+
 @app.route('/api/render-schematic', methods=['POST'])
 def render_schematic():
-    """Render schematic to SVG using kicad-cli."""
+    """Render schematic to SVG using kicad-cli (cached by schematic content)."""
     
     data = request.get_json()
     schematic_path = data.get('schematic_path', '')
     
     try:
-        # Generate SVG output path
-        base = schematic_path.replace('.kicad_sch', '')
-        svg_output_dir = f"{base}_schematic_svg"
-        
-        # Run kicad-cli
-        result = subprocess.run(
-            ['kicad-cli', 'sch', 'export', 'svg', '--output', svg_output_dir, schematic_path],
-            capture_output=True, text=True, timeout=30
-        )
-
-        # kicad-cli creates a directory, find .svg file inside the directory
-        svg_files = [f for f in os.listdir(svg_output_dir) if f.endswith('.svg')]
-        if svg_files:
-            svg_path = os.path.join(svg_output_dir, svg_files[0])
-        else:
-            return jsonify({'success': False, 'error': 'No SVG file found in output directory'}), 500
-        
-        with open(svg_path, 'r') as f:
-            svg_content = f.read()
-        
-        return jsonify({'success': True, 'svg_content': svg_content, 'svg_path': svg_path})
-        
+        rendered = render_admitted(schematic_path)
+        return jsonify({
+            'success': True,
+            'svg_content': rendered.svg_text(),
+            'etag': rendered.etag,
+            'cached': rendered.cached,
+            'svg_url': f'/api/schematic-svg?path={quote(schematic_path)}'
+        })
+    except AdmissionRejected as e:
+        return busy(e)
+    except RenderError as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
     except Exception as e:
-        import traceback
         return jsonify({'success': False, 'error': str(e), 'traceback': traceback.format_exc()}), 500
 
+@app.route('/api/schematic-svg', methods=['GET'])
+def schematic_svg():
+    """Raw (gzip when accepted) SVG of a schematic, with ETag revalidation."""
+    
+    schematic_path = request.args.get('path', '')
+    if not schematic_path.endswith('.kicad_sch'):
+        return jsonify({'success': False, 'error': 'path must be a .kicad_sch file'}), 400
+    
+    cache = get_render_cache()
+    try:
+        etag = cache.content_hash(schematic_path)
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
+        body, headers = svg_response_parts(
+            render_admitted(schematic_path), request.headers.get('Accept-Encoding', '')
+        )
+        return Response(body, mimetype='image/svg+xml', headers=headers)
+    except AdmissionRejected as e:
+        return busy(e)
+    except FileNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except RenderError as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/generate-pcb', methods=['POST'])
 def generate_pcb():
     """Generate PCB layout using pcb.py with KiCad Python."""
     
     data = request.get_json()
     directory = data.get('directory', '')
+    job_id = data.get('job_id')
     print("directory:", directory)
     
     if not directory:
         return jsonify({'success': False, 'error': 'No directory provided'}), 400
     
+    if not job_id:
+        return jsonify({'success': False, 'error': 'No job_id provided'}), 400
+    
     try:
-        pcb_script = os.path.join(os.path.dirname(__file__), 'pcb.py')
-        llm_output1_path = os.path.join(os.path.dirname(__file__), 'out', 'llm_output1.json')
-        cmd = [KICAD_PYTHON, pcb_script, directory]
-        if os.path.isfile(llm_output1_path):
-            cmd.append(llm_output1_path)
-        result = subprocess.run(
-            cmd,
-            capture_output=False, text=True, timeout=300
-        )
+        # Component placement from this job's own workspace, kept while pcb.py reads it
+        with workspace_in_use(job_id):
+            cmd = pcb_command(directory, job_id)
+            with admitted(ROUTER):
+                started = time.monotonic()
+                returncode = None
+                try:
+                    result = subprocess.run(
+                        cmd,
+                        capture_output=False, text=True, timeout=PCB_TIMEOUT
+                    )
+                    returncode = result.returncode
+                finally:
+                    observe_subprocess('pcb', started, returncode)
         
         if result.returncode != 0:
             return jsonify({'success': False, 'error': f'PCB generation failed: {result.stderr}'}), 500
         
         return jsonify({'success': True, 'message': 'PCB generated successfully', 'output': result.stdout})
         
+    except AdmissionRejected as e:
+        return busy(e)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
     except Exception as e:
-        import traceback
         return jsonify({'success': False, 'error': str(e), 'traceback': traceback.format_exc()}), 500
 
 if __name__ == '__main__':
@@ -211,11 +346,22 @@ if __name__ == '__main__':
     print("Flask Test Server Starting...")
     print("=" * 50)
     print("Available endpoints:")
+    print(f"  GET  http://localhost:{port}/metrics")
     print(f"  GET  http://localhost:{port}/api/hello")
     print(f"  GET  http://localhost:{port}/api/allow-list")
+    print(f"  GET  http://localhost:{port}/api/catalog/search")
+    print(f"  GET  http://localhost:{port}/api/logs")
     print(f"  POST http://localhost:{port}/api/chat-components")
     print(f"  POST http://localhost:{port}/api/generate")
     print(f"  POST http://localhost:{port}/api/render-schematic")
+    print(f"  GET  http://localhost:{port}/api/schematic-svg")
     print(f"  POST http://localhost:{port}/api/generate-pcb")
     print("=" * 50)
+    
+    # Create the shared Dedalus client up front; closed at exit by agent_pool
+    load_env()
+    try:
+        get_agent_pool(verbose=True).start()
+    except ValueError as e:
+        print(f"Warning: {e}")
     app.run(debug=True, port=port)
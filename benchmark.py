@@ -0,0 +1,227 @@
+"""
+Cursor PCB - Offline Benchmark
+
+Runs a corpus of prompts through PCBAgent.generate_schematic with the LLM
+replaced by fake_llm.FakeLLMRunner (recorded responses, simulated latency),
+so pipeline changes can be measured without network or API key.
+
+For each concurrency level it reports throughput, job latency, per-phase
+p50/p95 (from the run's trace), CPU time and peak RSS.
+
+Usage:
+    python benchmark.py --concurrency 1,4,8 --iterations 3 --latency 0.2
+    python benchmark.py --stream --output-rate 2000 --json out/bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from fake_llm import FakeLLMRunner
+from pcb_agent import PCBAgent
+
+BENCH_DIR = Path(__file__).parent / "bench"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100); 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None if unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def run_job(
+    entry: Dict[str, Any],
+    runner: FakeLLMRunner,
+    work_dir: Path,
+    job_name: str,
+    stream: bool,
+    agent_kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Run one corpus prompt end to end in its own project directory."""
+    project = work_dir / "projects" / job_name
+    shutil.copytree(BENCH_DIR / "project", project)
+    agent = PCBAgent(
+        runner=runner,
+        symbol_lib_path=str(BENCH_DIR / "lib"),
+        workspace_root=str(work_dir / "jobs"),
+        log_file=str(work_dir / "bench.log"),
+        **agent_kwargs
+    )
+    start = time.perf_counter()
+    try:
+        result = await agent.generate_schematic(
+            entry["prompt"], str(project), stream=stream, job_id=job_name
+        )
+    finally:
+        await agent.aclose()
+    return {
+        "name": entry["name"],
+        "status": result["status"],
+        "error": result.get("error"),
+        "wall_ms": (time.perf_counter() - start) * 1000,
+        "phases": result["trace"]["phases"],
+    }
+
+
+async def run_level(
+    corpus: List[Dict[str, Any]],
+    concurrency: int,
+    iterations: int,
+    runner_kwargs: Dict[str, Any],
+    work_dir: Path,
+    stream: bool,
+    agent_kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Run every corpus entry `iterations` times with `concurrency` jobs in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    runners = {e["name"]: FakeLLMRunner(e["responses"], **runner_kwargs) for e in corpus}
+    jobs = [(e, i) for i in range(iterations) for e in corpus]
+
+    async def bounded(entry: Dict[str, Any], i: int) -> Dict[str, Any]:
+        async with semaphore:
+            return await run_job(
+                entry, runners[entry["name"]], work_dir,
+                f"c{concurrency}-{entry['name']}-{i}", stream, agent_kwargs
+            )
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    results = await asyncio.gather(*(bounded(e, i) for e, i in jobs))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    ok = [r for r in results if r["status"] == "success"]
+    phase_names = sorted({name for r in ok for name in r["phases"]})
+    latencies = [r["wall_ms"] for r in ok]
+    return {
+        "concurrency": concurrency,
+        "jobs": len(results),
+        "errors": [f"{r['name']}: {r['error']}" for r in results if r["status"] != "success"],
+        "wall_s": round(wall, 3),
+        "throughput_jobs_s": round(len(ok) / wall, 2) if wall else 0.0,
+        "job_ms": {"p50": round(percentile(latencies, 50), 1),
+                   "p95": round(percentile(latencies, 95), 1)},
+        "phases_ms": {
+            name: {
+                "p50": round(percentile([r["phases"].get(name, 0.0) for r in ok], 50), 1),
+                "p95": round(percentile([r["phases"].get(name, 0.0) for r in ok], 95), 1),
+            }
+            for name in phase_names
+        },
+        "cpu_s": round(cpu, 3),
+        "cpu_ms_per_job": round(cpu * 1000 / len(results), 1) if results else 0.0,
+        "llm_calls": sum(r.calls for r in runners.values()),
+        "injected_failures": sum(r.failures for r in runners.values()),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_report(levels: List[Dict[str, Any]]) -> None:
+    """Human-readable summary table."""
+    print(f"{'conc':>4} {'jobs':>5} {'err':>4} {'jobs/s':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'cpu ms/job':>11} {'rss MB':>7}")
+    for level in levels:
+        print(f"{level['concurrency']:>4} {level['jobs']:>5} {len(level['errors']):>4} "
+              f"{level['throughput_jobs_s']:>8} {level['job_ms']['p50']:>9} "
+              f"{level['job_ms']['p95']:>9} {level['cpu_ms_per_job']:>11} "
+              f"{level['peak_rss_mb'] or '-':>7}")
+    for level in levels:
+        print(f"\nconcurrency {level['concurrency']} - per phase p50 / p95 ms")
+        for name, stats in level["phases_ms"].items():
+            print(f"  {name:<8} {stats['p50']:>9} {stats['p95']:>9}")
+        for error in level["errors"][:5]:
+            print(f"  error: {error}")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline PCB Agent benchmark")
+    parser.add_argument("--corpus", default=str(BENCH_DIR / "corpus.json"),
+                        help="Recorded responses (default: bench/corpus.json)")
+    parser.add_argument("--concurrency", default="1,4",
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--iterations", type=int, default=3, help="Runs of each prompt per level")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake time to first token (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Latency jitter, +/- s")
+    parser.add_argument("--output-rate", type=float, default=0,
+                        help="Fake output speed in chars/s (0 = instant)")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Probability of an injected transient failure per call")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--stream", action="store_true", help="Stream Phases 1 and 5")
+    parser.add_argument("--placement", choices=["local", "llm"], default="local")
+    parser.add_argument("--cache", action="store_true",
+                        help="Enable the LLM response cache (off by default)")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    corpus = json.loads(Path(args.corpus).read_text(encoding="utf-8"))["entries"]
+    levels_wanted = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    runner_kwargs = {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "output_rate": args.output_rate or None,
+        "failure_rate": args.failure_rate,
+        "seed": args.seed,
+    }
+
+    # Work in a scratch directory so nothing in the repo is touched
+    root = Path(__file__).parent.resolve()
+    work_dir = Path(tempfile.mkdtemp(prefix="pcb-bench-"))
+    agent_kwargs = {
+        "allow_list_path": str(root / "allow_list.json"),
+        "prompt1_path": str(root / "prompt1.txt"),
+        "prompt1_selection_path": str(root / "prompt1_selection.txt"),
+        "prompt2_instructions_path": str(root / "prompt2_instructions.txt"),
+        "llm_cache_path": str(work_dir / "llm_cache.sqlite") if args.cache else None,
+        "trace_dir": None,
+        "placement": args.placement,
+    }
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        # Warm-up: imports, library parsing caches, allowlist registry
+        await run_level(corpus, 1, 1, {**runner_kwargs, "latency": 0, "jitter": 0,
+                                       "output_rate": None, "failure_rate": 0},
+                        work_dir / "warmup", args.stream, agent_kwargs)
+        levels = []
+        for concurrency in levels_wanted:
+            levels.append(await run_level(
+                corpus, concurrency, args.iterations, runner_kwargs,
+                work_dir / f"c{concurrency}", args.stream, agent_kwargs
+            ))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(levels)
+    if args.json:
+        report = {"config": {**vars(args), "corpus_entries": len(corpus)}, "levels": levels}
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nWrote {args.json}")
+    return 1 if any(level["errors"] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
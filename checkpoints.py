@@ -0,0 +1,163 @@
+"""
+Cursor PCB - Phase Checkpoints
+
+The generation pipeline as a DAG of phases, and an on-disk store of phase
+outputs keyed by a hash of their inputs, so a run can resume without
+repeating phases whose inputs have not changed.
+
+    filter (0) -> select (1) -> place (2) -----------------------> draw (6)
+                             -> pins (3) -> prompt2 (4) -> netlist (5) -^
+
+The LLM phases (0, 1 and 5) are checkpointed. The local phases take
+milliseconds and phases 2 and 6 edit the schematic, so they always run.
+
+A key hashes the phase's own inputs (prompt, model, instructions, allowlist
+and library versions) together with the upstream outputs it reads. A changed
+upstream output therefore misses every downstream checkpoint, with no
+explicit invalidation. Checkpoints live in one shared directory
+(out/checkpoints/<phase>/<key>.json), so they can be reused across jobs.
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from artifacts import ArtifactSink, ArtifactWriter
+
+# phase: (name, phases whose output it reads)
+PHASES: Dict[int, Tuple[str, Tuple[int, ...]]] = {
+    0: ("filter", ()),
+    1: ("select", (0,)),
+    2: ("place", (1,)),
+    3: ("pins", (1,)),
+    4: ("prompt2", (3,)),
+    5: ("netlist", (4,)),
+    6: ("draw", (2, 3, 5)),
+}
+
+CHECKPOINTED = (0, 1, 5)
+
+
+def downstream(phase: int) -> Set[int]:
+    """phase and every phase that (transitively) reads its output."""
+    if phase not in PHASES:
+        raise ValueError(f"Unknown phase: {phase!r}")
+    found = {phase}
+    changed = True
+    while changed:
+        changed = False
+        for p, (_, deps) in PHASES.items():
+            if p not in found and found.intersection(deps):
+                found.add(p)
+                changed = True
+    return found
+
+
+def reusable_phases(resume: bool, from_phase: Optional[int] = None) -> Set[int]:
+    """
+    Checkpointed phases a run may load instead of running.
+
+    Args:
+        resume: Reuse checkpoints whose inputs are unchanged
+        from_phase: Re-run this phase and everything downstream of it, reusing
+            the other checkpoints (implies resume)
+
+    Raises:
+        ValueError: If from_phase is not a phase
+    """
+    if from_phase is not None:
+        return set(CHECKPOINTED) - downstream(from_phase)
+    return set(CHECKPOINTED) if resume else set()
+
+
+def phase_key(phase: int, **inputs: Any) -> str:
+    """SHA-256 of a phase and the inputs its output depends on."""
+    payload = json.dumps(
+        [PHASES[phase][0], inputs],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_version(path: str | Path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it is missing."""
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def library_versions(lib_dir: str | Path, libs: Iterable[str]) -> Dict[str, Optional[Tuple[int, int]]]:
+    """
+    Version of each symbol library used.
+
+    Args:
+        lib_dir: Symbol library directory
+        libs: Library file names as in the allowlist, e.g. "Device.kicad_sym"
+    """
+    return {lib: file_version(Path(lib_dir) / lib) for lib in sorted(set(libs))}
+
+
+class CheckpointStore:
+    """Phase outputs on disk, keyed by phase_key()."""
+
+    def __init__(
+        self,
+        root: str | Path = "out/checkpoints",
+        max_age_seconds: Optional[float] = 7 * 24 * 3600,
+        writer: Optional[ArtifactWriter] = None
+    ):
+        """
+        Args:
+            root: Checkpoint directory
+            max_age_seconds: Checkpoints older than this are ignored and
+                pruned (None = keep forever)
+            writer: Background writer (default: the process-wide artifact writer)
+        """
+        self.root = Path(root)
+        self.max_age_seconds = max_age_seconds
+        # Saved off the event loop, like the run's other artifacts
+        self._sink = ArtifactSink(self.root, writer=writer)
+
+    def path(self, phase: int, key: str) -> Path:
+        return self.root / PHASES[phase][0] / f"{key}.json"
+
+    def load(self, phase: int, key: str) -> Optional[Dict[str, Any]]:
+        """Checkpointed output, or None if missing, expired or unreadable."""
+        path = self.path(phase, key)
+        try:
+            if self.max_age_seconds is not None and time.time() - path.stat().st_mtime > self.max_age_seconds:
+                return None
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            # A write cut short by a crash reads as a miss
+            return None
+
+    def save(self, phase: int, key: str, data: Dict[str, Any]) -> Path:
+        """Queue a checkpoint for the background writer (data must not change afterwards)."""
+        return self._sink.write(f"{PHASES[phase][0]}/{key}.json", data)
+
+    async def aflush(self) -> List[str]:
+        """Wait for queued checkpoints; returns errors of failed writes."""
+        return await self._sink.aflush()
+
+    def prune(self) -> int:
+        """Delete expired checkpoints; returns how many were removed."""
+        if self.max_age_seconds is None or not self.root.is_dir():
+            return 0
+        cutoff = time.time() - self.max_age_seconds
+        removed = 0
+        for path in self.root.glob("*/*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
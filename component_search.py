@@ -0,0 +1,226 @@
+"""
+Cursor PCB - Local Component Search
+
+BM25 keyword ranking over allowlist entries, used by Stage 0 to pick
+relevant components without an LLM round trip. Each entry is indexed by
+its symbol, lib, ref prefix and footprint plus optional "aliases",
+"keywords" and "description" fields. Scoring walks an inverted index, so
+only entries sharing a term with the query are touched; this keeps search
+over the full symbol catalog (symbol_catalog.py) in the millisecond range.
+"""
+
+import math
+import re
+from collections import Counter
+from itertools import islice
+from typing import Dict, Any, List, Tuple, Iterable
+
+POWER_LIB = "power.kicad_sym"
+BASIC_PASSIVES = {("Device.kicad_sym", "R"), ("Device.kicad_sym", "C")}
+
+# Weight of each field when building an entry's document
+FIELD_WEIGHTS = {
+    "symbol": 3,
+    "aliases": 3,
+    "keywords": 2,
+    "lib": 1,
+    "ref": 1,
+    "footprint": 1,
+    "description": 1,
+}
+
+# Fields that only exist to help ranking or browsing and never need to reach an LLM
+SEARCH_ONLY_FIELDS = ("aliases", "keywords", "description", "pins")
+
+STOPWORDS = {
+    "a", "an", "and", "the", "with", "for", "of", "to", "in", "on", "or",
+    "create", "make", "build", "design", "simple", "basic", "circuit",
+    "board", "pcb", "schematic", "using", "use", "that", "this", "some",
+    "kicad", "sym", "smd", "i", "want", "need", "please",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_.+][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+
+    Compound identifiers are kept whole and also split into parts, so
+    "ESP32-C3" yields ["esp32-c3", "esp32", "c3"].
+    """
+    tokens = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        parts = re.split(r"[-_.+]", word)
+        if len(parts) > 1:
+            tokens.append(word)
+        tokens.extend(p for p in parts if p)
+    # Single letters and bare numbers ("c" from "USB-C", "3" from "3.2mm")
+    # match too many footprints to be useful
+    return [
+        t for t in tokens
+        if len(t) > 1 and not t.isdigit() and t not in STOPWORDS
+    ]
+
+
+def entry_key(entry: Dict[str, Any]) -> Tuple[str, str]:
+    """Identity of an allowlist entry."""
+    return (entry.get("lib", ""), entry.get("symbol", ""))
+
+
+def is_power_symbol(entry: Dict[str, Any]) -> bool:
+    """
+    True for power-rail symbols (GND, +5V, +3V3, ...): allowlist entries
+    (ref "#PWR") and plan symbols (ref_des "#PWR1") alike.
+    """
+    ref = entry.get("ref") or entry.get("ref_des") or ""
+    return entry.get("lib") == POWER_LIB or ref.startswith("#PWR")
+
+
+def strip_search_fields(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an entry without the search-only fields."""
+    return {k: v for k, v in entry.items() if k not in SEARCH_ONLY_FIELDS}
+
+
+def _field_text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    return str(value or "")
+
+
+class ComponentIndex:
+    """BM25 index over allowlist entries."""
+
+    def __init__(
+        self,
+        entries: Iterable[Dict[str, Any]],
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        """
+        Build the index.
+
+        Args:
+            entries: Allowlist entries (duplicates by lib + symbol are dropped)
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.entries: List[Dict[str, Any]] = []
+        self._term_freqs: List[Counter] = []
+        self._lengths: List[int] = []
+        # term -> indexes of the entries containing it
+        self._postings: Dict[str, List[int]] = {}
+
+        seen = set()
+        for entry in entries:
+            key = entry_key(entry)
+            if key in seen:
+                continue
+            seen.add(key)
+            terms = self.document_terms(entry)
+            tf = Counter(terms)
+            for term in tf:
+                self._postings.setdefault(term, []).append(len(self.entries))
+            self.entries.append(entry)
+            self._term_freqs.append(tf)
+            self._lengths.append(len(terms))
+
+        self._avg_length = (
+            sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        )
+        n = len(self.entries)
+        self._idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self._postings.items()
+        }
+        self._norms = [
+            k1 * (1 - b + b * length / (self._avg_length or 1)) for length in self._lengths
+        ]
+
+    @staticmethod
+    def document_terms(entry: Dict[str, Any]) -> List[str]:
+        """Tokens an entry is indexed under, repeated by field weight."""
+        terms = []
+        for field, weight in FIELD_WEIGHTS.items():
+            text = _field_text(entry.get(field))
+            if field == "lib":
+                text = text.replace(".kicad_sym", "")
+            terms.extend(tokenize(text) * weight)
+        return terms
+
+    def score(self, query: str) -> List[Tuple[float, Dict[str, Any]]]:
+        """Score every entry against query, best first (zero scores dropped)."""
+        totals: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for i in self._postings[term]:
+                freq = self._term_freqs[i][term]
+                totals[i] = totals.get(i, 0.0) + idf * freq * (self.k1 + 1) / (freq + self._norms[i])
+        # Ties keep index order
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+        return [(total, self.entries[i]) for i, total in ranked if total > 0]
+
+    def search(self, query: str, top_k: int | None = None) -> List[Dict[str, Any]]:
+        """Entries matching query, best first."""
+        ranked = [entry for _, entry in self.score(query)]
+        return ranked[:top_k] if top_k else ranked
+
+
+def select_components(
+    user_prompt: str,
+    allowlist: List[Dict[str, Any]],
+    top_k: int | None = None,
+    index: ComponentIndex | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Pick allowlist entries relevant to a prompt.
+
+    Ranks entries with BM25, then applies simple rules: power symbols are
+    always included, and the basic passives (R, C) are added whenever any
+    part matched, since nearly every active part needs pull-ups or
+    decoupling.
+
+    Args:
+        user_prompt: User's circuit description
+        allowlist: Full allowlist entries
+        top_k: Maximum number of ranked (non-rule) matches to keep
+        index: Prebuilt index over allowlist (built here if not given)
+
+    Returns:
+        Selected entries with an "explanation" of why each was chosen
+    """
+    if index is None:
+        index = ComponentIndex(allowlist)
+    query_terms = set(tokenize(user_prompt))
+
+    selected: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    # Power symbols are added below, so they don't take up top_k slots
+    ranked = (entry for _, entry in index.score(user_prompt) if not is_power_symbol(entry))
+    for entry in islice(ranked, top_k):
+        matched = sorted(query_terms & set(index.document_terms(entry)))
+        selected[entry_key(entry)] = {
+            **strip_search_fields(entry),
+            "explanation": f"Matched request terms: {', '.join(matched)}"
+        }
+
+    if selected:
+        for entry in index.entries:
+            key = entry_key(entry)
+            if key in BASIC_PASSIVES and key not in selected:
+                selected[key] = {
+                    **strip_search_fields(entry),
+                    "explanation": "Basic passive for pull-ups and decoupling"
+                }
+
+    for entry in index.entries:
+        if is_power_symbol(entry):
+            selected.setdefault(entry_key(entry), {
+                **strip_search_fields(entry),
+                "explanation": "Power symbol (always included)"
+            })
+
+    return list(selected.values())
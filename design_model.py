@@ -0,0 +1,336 @@
+"""
+Cursor PCB - Design Model
+
+Compact in-memory form of the component plan from Phase 3 on (placed
+symbols with their pins), used instead of nested dicts:
+
+- PinTable: one symbol's pins as parallel arrays (numbers, names, x/y in
+  array("d"), rotation in array("H")) rather than one
+  {"name": ..., "pos": (x, y, rot)} dict per pin
+- Symbol: __slots__ record for one placed part, holding its PinTable
+- Net: __slots__ record for one net's connections
+- Design: the symbols (plus the plan's other keys such as circuit_intent),
+  indexed by ref_des
+
+Projections are views, not copies: PinTable.names() is a read-only mapping
+over the table, and Design.netlist_view() hands each table's own name list
+to the netlist prompt. The llm_output1_with_pins dict format exists only at
+the edges: from_dict() when reading it, to_dict() / dumps() when writing
+artifacts and API responses.
+
+Symbols also answer get() / [] like the dicts they replace, so read-only
+helpers (netlist_sharding, validation) accept either form.
+"""
+
+import json
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Any, List, Optional, Iterator, Sequence, Tuple
+
+Point = Tuple[float, float]
+
+
+class PinTable:
+    """Pins of one placed symbol, in library order, as parallel arrays."""
+
+    __slots__ = ("numbers", "_names", "_xy", "_rot", "_index")
+
+    def __init__(self):
+        self.numbers: List[str] = []
+        self._names: List[str] = []
+        self._xy = array("d")
+        self._rot = array("H")
+        self._index: Dict[str, int] = {}
+
+    def add(self, number: str, name: str, x: float, y: float, rot: int) -> None:
+        """Add a pin (a repeated number replaces the earlier pin, as in a dict)."""
+        i = self._index.get(number)
+        if i is None:
+            self._index[number] = len(self.numbers)
+            self.numbers.append(number)
+            self._names.append(name)
+            self._xy.extend((x, y))
+            self._rot.append(rot % 360)
+        else:
+            self._names[i] = name
+            self._xy[2 * i:2 * i + 2] = array("d", (x, y))
+            self._rot[i] = rot % 360
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.numbers)
+
+    def __contains__(self, number: Any) -> bool:
+        return str(number) in self._index
+
+    def name(self, number: Any) -> str:
+        """Pin name (raises KeyError for an unknown pin)."""
+        return self._names[self._index[str(number)]]
+
+    def xy(self, number: Any) -> Point:
+        """Absolute schematic position (raises KeyError for an unknown pin)."""
+        i = self._index[str(number)]
+        return self._xy[2 * i], self._xy[2 * i + 1]
+
+    def pos(self, number: Any) -> Tuple[float, float, int]:
+        """(x, y, rotation), the "pos" of the dict format."""
+        i = self._index[str(number)]
+        return self._xy[2 * i], self._xy[2 * i + 1], self._rot[i]
+
+    def names(self) -> "PinNames":
+        """Read-only {number: name} view of the table (no copy)."""
+        return PinNames(self)
+
+    def encoded_names(self) -> List[str] | Dict[str, str]:
+        """
+        Names as sent to the netlist LLM (see prompt_encoding.PINS_NOTE): a
+        list when pins are numbered exactly "1".."n", else {number: name}.
+
+        The list is the table's own when pins are already in that order;
+        treat it as read-only.
+        """
+        n = len(self.numbers)
+        if all(str(i) in self._index for i in range(1, n + 1)):
+            if all(self.numbers[i - 1] == str(i) for i in range(1, n + 1)):
+                return self._names
+            return [self._names[self._index[str(i)]] for i in range(1, n + 1)]
+        return dict(zip(self.numbers, self._names))
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """{number: {"name": ..., "pos": (x, y, rot)}} as written by add_pin_outs."""
+        xy = self._xy
+        return {
+            number: {"name": name, "pos": (xy[2 * i], xy[2 * i + 1], rot)}
+            for i, (number, name, rot) in enumerate(zip(self.numbers, self._names, self._rot))
+        }
+
+    @classmethod
+    def from_dict(cls, pins: Dict[str, Any]) -> "PinTable":
+        table = cls()
+        for number, data in pins.items():
+            x, y, rot = data["pos"]
+            table.add(str(number), data.get("name", ""), float(x), float(y), int(rot))
+        return table
+
+
+class PinNames(Mapping):
+    """{pin number: name} over a PinTable, without copying it."""
+
+    __slots__ = ("_table",)
+
+    def __init__(self, table: PinTable):
+        self._table = table
+
+    def __getitem__(self, number: Any) -> str:
+        return self._table.name(number)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+class Symbol:
+    """One placed part: the Phase 1 fields, its position and its pins."""
+
+    # Field order of the Phase 1 schema, then the placement
+    FIELDS = ("lib", "symbol", "ref_des", "value", "footprint", "explanation", "at")
+
+    __slots__ = FIELDS + ("pins", "extra")
+
+    def __init__(self, pins: Optional[PinTable] = None, extra: Optional[Dict[str, Any]] = None, **fields: Any):
+        for field in self.FIELDS:
+            setattr(self, field, fields.get(field))
+        self.pins = pins
+        # Keys outside the schema, kept so to_dict() round-trips
+        self.extra = extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get() over the fields, for helpers written against symbol dicts."""
+        if key in self.FIELDS or key == "pins":
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {field: getattr(self, field) for field in self.FIELDS if getattr(self, field) is not None}
+        if self.extra:
+            data.update(self.extra)
+        if self.pins is not None:
+            data["pins"] = self.pins.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], pins: Optional[PinTable] = None) -> "Symbol":
+        """
+        Args:
+            data: Symbol dict from llm_output1 (pins, if present, are read
+                unless a table is given)
+            pins: Pin table to use instead
+        """
+        if pins is None and isinstance(data.get("pins"), dict):
+            pins = PinTable.from_dict(data["pins"])
+        extra = {k: v for k, v in data.items() if k not in cls.FIELDS and k != "pins"}
+        return cls(pins=pins, extra=extra or None, **{k: data.get(k) for k in cls.FIELDS})
+
+
+class Net:
+    """One net: its name and (ref, pin) connections as parallel lists."""
+
+    __slots__ = ("name", "refs", "pins")
+
+    def __init__(self, name: str, refs: Sequence[str] = (), pins: Sequence[str] = ()):
+        self.name = name
+        self.refs = list(refs)
+        self.pins = list(pins)
+
+    def connections(self) -> Iterator[Tuple[str, str]]:
+        return zip(self.refs, self.pins)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "connections": [{"ref": ref, "pin": pin} for ref, pin in zip(self.refs, self.pins)],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Net":
+        """Net from a validated llm_output2 net ({"name", "connections"})."""
+        conns = data.get("connections", [])
+        return cls(
+            data.get("name", ""),
+            [str(c["ref"]) for c in conns],
+            [str(c["pin"]) for c in conns]
+        )
+
+
+class Design:
+    """Placed symbols with pin tables: llm_output1_with_pins without the dicts."""
+
+    __slots__ = ("symbols", "meta", "_by_ref")
+
+    def __init__(self, symbols: List[Symbol], meta: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            symbols: Placed symbols, in plan order
+            meta: The plan's other top-level keys (e.g. circuit_intent)
+        """
+        self.symbols = symbols
+        self.meta = meta or {}
+        self._by_ref: Optional[Dict[str, Symbol]] = None
+
+    @classmethod
+    def from_dict(
+        cls,
+        output: Dict[str, Any],
+        pin_tables: Optional[Sequence[PinTable]] = None
+    ) -> "Design":
+        """
+        Args:
+            output: llm_output1 (with or without pins)
+            pin_tables: Pin tables in symbol order, overriding any dict pins
+        """
+        raw = output.get("symbols", [])
+        tables = pin_tables if pin_tables is not None else [None] * len(raw)
+        return cls(
+            [Symbol.from_dict(s, pins) for s, pins in zip(raw, tables)],
+            {k: v for k, v in output.items() if k != "symbols"}
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The llm_output1_with_pins dict format."""
+        return {**self.meta, "symbols": [s.to_dict() for s in self.symbols]}
+
+    def with_symbols(self, symbols: List[Symbol]) -> "Design":
+        """A design over some of these symbols (shared, not copied), e.g. a netlist shard."""
+        return Design(symbols, self.meta)
+
+    def by_ref(self, ref: str) -> Symbol:
+        """Symbol by ref_des (raises KeyError)."""
+        if self._by_ref is None:
+            self._by_ref = {s.ref_des: s for s in self.symbols}
+        return self._by_ref[ref]
+
+    def pin_table(self) -> Dict[str, PinTable]:
+        """{ref_des: PinTable}; tables support `pin in table` like validation's pin sets."""
+        return {s.ref_des: s.pins if s.pins is not None else PinTable() for s in self.symbols}
+
+    def pin_xy(self, ref: str, pin: Any) -> Point:
+        """
+        Absolute position of a pin.
+
+        Raises:
+            KeyError: If the symbol or pin does not exist
+        """
+        try:
+            symbol = self.by_ref(ref)
+        except KeyError:
+            raise KeyError(f"Symbol {ref} not found") from None
+        if symbol.pins is None or pin not in symbol.pins:
+            raise KeyError(f"Pin {pin} not found on {ref}")
+        return symbol.pins.xy(pin)
+
+    def netlist_view(self) -> Dict[str, Any]:
+        """
+        Component list for the netlist LLM (Phase 4): ref_des, symbol, value,
+        explanation and encoded pin names (PinTable.encoded_names), without
+        coordinates, libraries or footprints. Pin names are taken from the
+        tables without copying them.
+        """
+        symbols = []
+        for s in self.symbols:
+            item = {"ref_des": s.ref_des, "symbol": s.symbol, "value": s.value}
+            if s.explanation:
+                item["explanation"] = s.explanation
+            if s.pins is not None:
+                item["pins"] = s.pins.encoded_names()
+            symbols.append(item)
+        out = {"symbols": symbols}
+        if "circuit_intent" in self.meta:
+            out = {"circuit_intent": self.meta["circuit_intent"], **out}
+        return out
+
+    def wire_segments(self, nets: Sequence[Net]) -> List[Tuple[Point, Point]]:
+        """
+        Wires joining each net's first pin to every other pin of the net.
+
+        Raises:
+            KeyError: If a connection names an unknown symbol or pin
+        """
+        segments = []
+        for net in nets:
+            if len(net.refs) < 2:
+                continue
+            anchor = self.pin_xy(net.refs[0], net.pins[0])
+            for ref, pin in zip(net.refs[1:], net.pins[1:]):
+                segments.append((anchor, self.pin_xy(ref, pin)))
+        return segments
+
+
+def _to_json(obj: Any) -> Any:
+    if isinstance(obj, (Design, Symbol, PinTable, Net)):
+        return obj.to_dict()
+    if isinstance(obj, PinNames):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(data: Any, indent: Optional[int] = None) -> str:
+    """
+    JSON of dicts and model objects (converted as they are encoded),
+    minified unless indent is given.
+    """
+    separators = (",", ":") if indent is None else None
+    return json.dumps(data, default=_to_json, indent=indent, separators=separators, ensure_ascii=False)
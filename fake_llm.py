@@ -0,0 +1,103 @@
+"""
+Cursor PCB - Fake LLM Runner
+
+Offline stand-in for DedalusRunner that replays recorded responses, for
+benchmarks and local runs without DEDALUS_API_KEY. Pass it as
+PCBAgent(runner=...): it goes through the same ResilientRunner (timeouts,
+retries, limiter) and cache paths as the real runner.
+
+Responses are rules matched against the prompt text; the first rule whose
+"match" string occurs in the prompt wins:
+
+    [{"match": "Choose the parts", "response": {"symbols": [...]}},
+     {"match": "expert hardware design assistant", "response": {"nets": [...]}}]
+
+Latency, jitter, output speed and transient failures are configurable and
+seeded, so runs are reproducible.
+"""
+
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+
+class InjectedFailure(Exception):
+    """Simulated transient API error (retried like a 503)."""
+
+    status_code = 503
+
+
+class FakeLLMRunner:
+    """Replays recorded responses with simulated latency and failures."""
+
+    def __init__(
+        self,
+        responses: List[Dict[str, Any]],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        output_rate: Optional[float] = None,
+        failure_rate: float = 0.0,
+        chunk_size: int = 64,
+        seed: Optional[int] = 0
+    ):
+        """
+        Args:
+            responses: Rules of {"match": prompt substring, "response": str or JSON}
+            latency: Seconds before the first output (time to first token)
+            jitter: Uniform +/- seconds added to latency
+            output_rate: Output characters per second (None = instant)
+            failure_rate: Probability that a call fails with InjectedFailure
+            chunk_size: Characters per streamed chunk
+            seed: Random seed for jitter and failures (None = unseeded)
+        """
+        self.responses = [
+            (rule["match"], rule["response"] if isinstance(rule["response"], str)
+             else json.dumps(rule["response"]))
+            for rule in responses
+        ]
+        self.latency = latency
+        self.jitter = jitter
+        self.output_rate = output_rate
+        self.failure_rate = failure_rate
+        self.chunk_size = chunk_size
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+
+    def _response(self, prompt: str) -> str:
+        for match, text in self.responses:
+            if match in prompt:
+                return text
+        raise KeyError(f"No recorded response matches prompt: {prompt[:80]!r}")
+
+    async def _wait_first_token(self) -> None:
+        self.calls += 1
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(0.0, delay))
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.failures += 1
+            raise InjectedFailure("Injected failure (simulated 503)")
+
+    def run(self, input: str = "", model: str = "", stream: bool = False, **kwargs: Any):
+        """Same call shape as DedalusRunner.run."""
+        text = self._response(input)
+        if stream:
+            return self._stream(text)
+        return self._complete(text)
+
+    async def _complete(self, text: str) -> SimpleNamespace:
+        await self._wait_first_token()
+        if self.output_rate:
+            await asyncio.sleep(len(text) / self.output_rate)
+        return SimpleNamespace(final_output=text)
+
+    async def _stream(self, text: str) -> AsyncIterator[SimpleNamespace]:
+        await self._wait_first_token()
+        for i in range(0, len(text), self.chunk_size):
+            part = text[i:i + self.chunk_size]
+            await asyncio.sleep(len(part) / self.output_rate if self.output_rate else 0)
+            yield SimpleNamespace(choices=[
+                SimpleNamespace(delta=SimpleNamespace(content=part), finish_reason=None)
+            ])
@@ -5,6 +5,76 @@ import SchematicViewer from "./components/SchematicViewer";
 import ComponentLibrary from "./components/ComponentLibrary";
 import "./App.css";
 
+const API_BASE = "http://localhost:5001";
+
+const PHASE_NAMES = {
+  0: "Filtering components",
+  1: "Selecting components",
+  2: "Placing components",
+  3: "Mapping pins",
+  4: "Building netlist prompt",
+  5: "Generating netlist",
+  6: "Drawing wires",
+};
+
+// Follow a background job's Server-Sent Events until it finishes, then
+// resolve with its final status payload (including the result).
+const waitForJob = (job, onEvent) =>
+  new Promise((resolve, reject) => {
+    const source = new EventSource(API_BASE + job.events_url);
+    const handle = (e) => onEvent(JSON.parse(e.data));
+    ["phase_start", "phase_finish", "symbol_placed", "net_drawn"].forEach(
+      (type) => source.addEventListener(type, handle),
+    );
+    source.addEventListener("job_finished", async () => {
+      source.close();
+      try {
+        const response = await fetch(API_BASE + job.status_url);
+        resolve(await response.json());
+      } catch (error) {
+        reject(error);
+      }
+    });
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        reject(new Error("Lost connection to job progress stream"));
+      }
+    };
+  });
+
+// Run kind ("generate" or "generate-pcb") as a background job and resolve
+// with its result. The Flask test server (backend_test.py) has no /api/jobs
+// routes, so an unmatched route falls back to the blocking /api/<kind> call.
+const runJob = async (kind, body, onEvent) => {
+  const request = {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+  };
+  const response = await fetch(`${API_BASE}/api/jobs/${kind}`, request);
+  // Our own 404s (e.g. an unknown schematic job) are JSON
+  const isJSON = (response.headers.get("Content-Type") || "").includes(
+    "application/json",
+  );
+  if (response.status === 404 && !isJSON) {
+    const fallback = await fetch(`${API_BASE}/api/${kind}`, request);
+    return fallback.json();
+  }
+
+  const job = await response.json();
+  if (!job.success) {
+    throw new Error(job.error);
+  }
+  const status = await waitForJob(job, onEvent);
+  return (
+    status.result || {
+      success: false,
+      status: "error",
+      error: status.error || `Job ${status.status}`,
+    }
+  );
+};
+
 function App() {
   const [projectPath, setProjectPath] = useState(null);
   const [currentFile, setCurrentFile] = useState(null);
@@ -15,6 +85,9 @@ function App() {
   const [activePanel, setActivePanel] = useState("prompt");
   const [generatedComponents, setGeneratedComponents] = useState([]);
   const [prompt, setPrompt] = useState("");
+  const [jobId, setJobId] = useState(null);
+  const [speculationId, setSpeculationId] = useState(null);
+  const [progressMessage, setProgressMessage] = useState(null);
 
   const handleSelectProject = async () => {
     if (window.electronAPI) {
@@ -30,16 +103,19 @@ function App() {
       alert("Please select a project directory first");
       return;
     }
+    if (!jobId) {
+      // pcb.py places footprints from a schematic job's component plan
+      alert("Please generate a schematic first");
+      return;
+    }
 
     setIsGeneratingPCB(true);
     try {
-      const response = await fetch("http://localhost:5001/api/generate-pcb", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ directory: projectPath }),
-      });
-
-      const result = await response.json();
+      const result = await runJob(
+        "generate-pcb",
+        { directory: projectPath, job_id: jobId },
+        () => {},
+      );
       console.log("Generate PCB result:", result);
 
       if (result.success) {
@@ -80,6 +156,7 @@ function App() {
 
       if (result.success) {
         setGeneratedComponents(result.components);
+        setSpeculationId(result.speculation_id || null);
         setActivePanel("components"); // Switch to components tab
         alert(
           `Selected ${result.components.length} components. Check the Components tab to review.`,
@@ -112,6 +189,8 @@ function App() {
       // If user has selected components, pass them to skip Phase 0
       if (generatedComponents.length > 0) {
         requestBody.selected_components = generatedComponents;
+        // Lets the backend reuse Phase 1 started during review (if unchanged)
+        requestBody.speculation_id = speculationId;
         console.log(
           "Calling generate with selected components:",
           generatedComponents.length,
@@ -120,44 +199,42 @@ function App() {
 
       console.log("Calling generate with:", requestBody);
 
-      const response = await fetch("http://localhost:5001/api/generate", {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify(requestBody),
+      // Submit as a background job and follow its phase progress
+      const result = await runJob("generate", requestBody, (event) => {
+        if (event.event === "phase_start") {
+          setProgressMessage(
+            `Phase ${event.phase}: ${PHASE_NAMES[event.phase] || "Working"}...`,
+          );
+        } else if (event.event === "symbol_placed") {
+          setProgressMessage(`Placed ${event.ref_des} (${event.count})`);
+        }
       });
-
-      const result = await response.json();
       console.log("Generate result:", result);
 
       if (result.success || result.status === "success") {
         const componentCount = result.components?.length || 0;
         const netCount = result.nets?.length || 0;
 
-        // Store generated components
+        // Store generated components and the job whose artifacts the PCB step uses
         setGeneratedComponents(result.components || []);
+        setJobId(result.job_id || null);
+        setSpeculationId(null);
 
         // Render schematic using kicad-cli
         const schematicPath = result.files?.schematic || result.schematic_path;
 
         if (schematicPath) {
+          // Cached by schematic content; the browser revalidates via ETag
           const svgResponse = await fetch(
-            "http://localhost:5001/api/render-schematic",
-            {
-              method: "POST",
-              headers: { "Content-Type": "application/json" },
-              body: JSON.stringify({ schematic_path: schematicPath }),
-            },
+            `${API_BASE}/api/schematic-svg?path=${encodeURIComponent(schematicPath)}`,
           );
 
-          const svgResult = await svgResponse.json();
-
-          if (svgResult.success) {
-            setSchematicSVG(svgResult.svg_content);
+          if (svgResponse.ok) {
+            setSchematicSVG(await svgResponse.text());
             setCurrentFile(schematicPath);
             console.log("Schematic rendered and displayed!");
           } else {
+            const svgResult = await svgResponse.json();
             console.error("SVG render failed:", svgResult.error);
           }
         } else {
@@ -175,6 +252,7 @@ function App() {
       alert("Error generating schematic: " + error.message);
     } finally {
       setIsGeneratingSchematic(false);
+      setProgressMessage(null);
     }
   };
 
@@ -272,6 +350,7 @@ function App() {
             svgContent={schematicSVG}
             currentFile={currentFile}
             isGenerating={isGeneratingSchematic}
+            progressMessage={progressMessage}
             onReset={handleReset}
           />
         </div>
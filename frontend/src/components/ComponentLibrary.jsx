@@ -12,6 +12,9 @@ const ComponentLibrary = ({
   const [filteredComponents, setFilteredComponents] = useState([]);
   const [filteredAllowList, setFilteredAllowList] = useState([]);
   const [allowList, setAllowList] = useState([]);
+  const [catalogResults, setCatalogResults] = useState([]);
+  // Off unless the backend's agents accept catalog parts (PCB_AGENT_CATALOG=1)
+  const [catalogEnabled, setCatalogEnabled] = useState(true);
 
   // Load allow_list.json on mount
   useEffect(() => {
@@ -33,6 +36,48 @@ const ComponentLibrary = ({
       .catch((err) => console.error("Error loading allow list:", err));
   }, []);
 
+  // Search the full KiCad symbol catalog as the user types (debounced)
+  useEffect(() => {
+    if (!catalogEnabled || !searchTerm.trim()) {
+      setCatalogResults([]);
+      return;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(() => {
+      fetch(
+        `http://localhost:5001/api/catalog/search?q=${encodeURIComponent(searchTerm)}&limit=20`,
+        { signal: controller.signal },
+      )
+        .then((res) => res.json())
+        .then((data) => {
+          if (data.success) {
+            setCatalogResults(
+              data.results.map((c) => ({
+                name: c.symbol,
+                symbol: c.symbol,
+                library: c.lib?.replace(".kicad_sym", "") || "",
+                lib: c.lib,
+                ref: c.ref,
+                footprint: c.footprint,
+                description: c.description,
+              })),
+            );
+          } else if (data.enabled === false) {
+            setCatalogEnabled(false);
+          }
+        })
+        .catch((err) => {
+          if (err.name !== "AbortError") {
+            console.error("Error searching catalog:", err);
+          }
+        });
+    }, 200);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [searchTerm, catalogEnabled]);
+
   useEffect(() => {
     // Filter selected components
     let filtered = components;
@@ -49,19 +94,26 @@ const ComponentLibrary = ({
     }
     setFilteredComponents(filtered);
 
-    // Filter allow list (exclude already selected components)
-    let filteredAllow = allowList;
+    // Filter allow list plus catalog matches (exclude already selected components)
+    const allowKeys = new Set(allowList.map((c) => `${c.lib}::${c.symbol}`));
+    let filteredAllow = allowList.concat(
+      catalogResults.filter((c) => !allowKeys.has(`${c.lib}::${c.symbol}`)),
+    );
     if (components.length > 0) {
       const selectedSymbols = new Set(
         components.map((c) => `${c.lib}::${c.symbol}`),
       );
-      filteredAllow = allowList.filter(
+      filteredAllow = filteredAllow.filter(
         (c) => !selectedSymbols.has(`${c.lib}::${c.symbol}`),
       );
     }
     if (searchTerm) {
+      const catalogKeys = new Set(
+        catalogResults.map((c) => `${c.lib}::${c.symbol}`),
+      );
       filteredAllow = filteredAllow.filter(
         (c) =>
+          catalogKeys.has(`${c.lib}::${c.symbol}`) ||
           (c.name || c.symbol || "")
             .toLowerCase()
             .includes(searchTerm.toLowerCase()) ||
@@ -71,7 +123,7 @@ const ComponentLibrary = ({
       );
     }
     setFilteredAllowList(filteredAllow);
-  }, [searchTerm, components, allowList]);
+  }, [searchTerm, components, allowList, catalogResults]);
 
   const handleDragStart = (e, component) => {
     e.dataTransfer.setData("component", JSON.stringify(component));
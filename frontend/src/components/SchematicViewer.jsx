@@ -6,6 +6,7 @@ const SchematicViewer = ({
   svgContent,
   currentFile,
   isGenerating,
+  progressMessage,
   onReset,
 }) => {
   const [zoom, setZoom] = React.useState(1);
@@ -102,7 +103,7 @@ const SchematicViewer = ({
         {isGenerating ? (
           <div className="viewer-placeholder">
             <FaSpinner className="spinner large" />
-            <p>Generating schematic...</p>
+            <p>{progressMessage || "Generating schematic..."}</p>
           </div>
         ) : svgContent ? (
           <div
@@ -0,0 +1,118 @@
+"""
+Cursor PCB - Import Time Check
+
+Measures the cold import cost of the entry-point modules with
+`python -X importtime` (each in a fresh interpreter) and guards against
+regressions: a module fails the check when it pulls in a dependency that
+should only load on first use (the Dedalus SDK, dotenv, wx, multiprocessing)
+or when its import takes longer than its budget.
+
+Usage:
+    python import_benchmark.py                  # report
+    python import_benchmark.py --check          # exit 1 on a regression
+    python import_benchmark.py --top 10 pcb_agent
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+ROOT = Path(__file__).parent
+
+# Loaded lazily by create_client(), load_env(), pcb.init_wx() and
+# SymbolCatalog.refresh(); importing them eagerly is a regression
+LAZY = ("dedalus_labs", "dotenv", "wx", "multiprocessing")
+
+# module: (budget in ms, top-level packages it must not import)
+ENTRY_POINTS: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    "pcb_agent": (150.0, LAZY + ("httpx", "pydantic")),
+    "agent_pool": (150.0, LAZY + ("httpx", "pydantic")),
+    "backend_common": (60.0, LAZY),
+    "run_schematic": (60.0, LAZY),
+    "server": (300.0, ("dedalus_labs", "wx", "multiprocessing")),
+    "backend_test": (400.0, ("dedalus_labs", "wx", "multiprocessing")),
+}
+
+_PROBE = (
+    "import sys, json; before = set(sys.modules); import {module}; "
+    "print(json.dumps(sorted(set(sys.modules) - before)))"
+)
+
+
+def measure(module: str) -> Dict[str, Any]:
+    """
+    Import module in a fresh interpreter.
+
+    Returns:
+        {"ms": cumulative import ms, "modules": newly imported module names,
+        "timings": [(cumulative_us, self_us, name), ...] of its imports}
+
+    Raises:
+        RuntimeError: If the import fails
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    timings = []
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if name.strip() == module and not name.startswith("  "):
+            total_us = int(cumulative_us)
+        timings.append((int(cumulative_us), int(self_us), name.strip()))
+    imported = set(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {
+        "ms": total_us / 1000,
+        "modules": imported,
+        "timings": [t for t in timings if t[2] in imported],
+    }
+
+
+def check(module: str, runs: int = 3) -> Dict[str, Any]:
+    """Best of runs for module, with its budget and forbidden-import violations."""
+    budget, forbidden = ENTRY_POINTS.get(module, (float("inf"), LAZY))
+    results = [measure(module) for _ in range(runs)]
+    best = min(results, key=lambda r: r["ms"])
+    packages = {name.split(".")[0] for name in best["modules"]}
+    problems = [f"imports {pkg} eagerly" for pkg in forbidden if pkg in packages]
+    if best["ms"] > budget:
+        problems.append(f"{best['ms']:.1f} ms exceeds budget of {budget:.0f} ms")
+    return {**best, "module": module, "budget_ms": budget, "problems": problems}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time check for the entry-point modules")
+    parser.add_argument("modules", nargs="*", help=f"Modules to measure (default: {', '.join(ENTRY_POINTS)})")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh imports per module; the fastest counts")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest imports of each module")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if any module regresses")
+    args = parser.parse_args(argv)
+
+    failed = False
+    print(f"{'module':<16} {'import ms':>10} {'budget':>8}  status")
+    for module in args.modules or list(ENTRY_POINTS):
+        try:
+            result = check(module, args.runs)
+        except RuntimeError as e:
+            print(f"{module:<16} {'-':>10} {'-':>8}  ERROR: {e}")
+            failed = True
+            continue
+        status = "; ".join(result["problems"]) or "ok"
+        failed = failed or bool(result["problems"])
+        print(f"{module:<16} {result['ms']:>10.1f} {result['budget_ms']:>8.0f}  {status}")
+        for cumulative_us, self_us, name in sorted(result["timings"], reverse=True)[:args.top]:
+            print(f"    {cumulative_us / 1000:>8.1f} ms  {name}")
+    return 1 if failed and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Cursor PCB - Background Jobs
+
+Long-running work (schematic generation, PCB routing) runs as an asyncio
+task; the HTTP request that submits it returns the job ID at once. Progress
+events (phase start/finish with timings, symbols placed, nets drawn) are
+kept per job and fanned out to any number of subscribers, which server.py
+streams as Server-Sent Events.
+
+Event dicts follow PCBAgent's on_progress format, plus a sequence number and
+timestamp:
+
+    {"seq": 3, "ts": 1718000000.1, "phase": 1, "event": "phase_finish", "duration_ms": 812.4}
+
+The last event of every job is {"event": "job_finished", "status": ...}.
+
+A job submitted with an admission.Ticket stays "queued" until the ticket is
+admitted; its status payload then reports queue_wait_ms.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Awaitable, AsyncIterator, Set
+
+from admission import Ticket
+from workspace import new_job_id, validate_job_id
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL = {SUCCEEDED, FAILED, CANCELLED}
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class Job:
+    """One background job: status, result, and its event history."""
+
+    def __init__(self, job_id: str, kind: str, meta: Optional[Dict[str, Any]] = None):
+        self.job_id = job_id
+        self.kind = kind
+        self.meta = meta or {}
+        self.status = QUEUED
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.queue_wait_ms: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self.task: Optional[asyncio.Task] = None
+        self._loop = asyncio.get_running_loop()
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Record an event and wake subscribers (safe to call from any thread)."""
+        self._loop.call_soon_threadsafe(self._append, dict(event))
+
+    def _append(self, event: Dict[str, Any]) -> None:
+        event = {"seq": len(self.events), "ts": round(time.time(), 3), **event}
+        self.events.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    async def subscribe(self, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Past events, then live ones, until the job finishes.
+
+        Args:
+            heartbeat: Yield None after this many idle seconds (for keep-alives)
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        backlog = list(self.events)
+        self._subscribers.add(queue)
+        try:
+            for event in backlog:
+                yield event
+            if backlog and backlog[-1]["event"] == "job_finished":
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event["event"] == "job_finished":
+                    return
+        finally:
+            self._subscribers.discard(queue)
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        """Status payload for GET /api/jobs/<id>."""
+        data = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "duration_ms": round(((self.finished or time.time()) - self.started) * 1000, 2)
+            if self.started else None,
+            "queue_wait_ms": self.queue_wait_ms,
+            "error": self.error,
+            "events": len(self.events),
+            "phases": {
+                e["phase"]: e.get("duration_ms")
+                for e in self.events if e.get("event") == "phase_finish"
+            },
+            **self.meta,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """Submits, tracks, cancels and expires background jobs."""
+
+    def __init__(self, max_finished: int = 200, ttl: float = 3600.0):
+        """
+        Args:
+            max_finished: Finished jobs kept for status queries
+            ttl: Seconds a finished job is kept
+        """
+        self.max_finished = max_finished
+        self.ttl = ttl
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def submit(
+        self,
+        kind: str,
+        fn: Callable[[ProgressCallback], Awaitable[Dict[str, Any]]],
+        job_id: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        ticket: Optional[Ticket] = None
+    ) -> Job:
+        """
+        Start fn(on_progress) as a background task.
+
+        Args:
+            kind: Job type, e.g. "generate" or "generate-pcb"
+            fn: Coroutine function receiving the job's progress callback and
+                returning the result dict (a "status": "error" or
+                "success": False result marks the job failed)
+            job_id: ID to use (default: a new one); must not be running already
+            meta: Extra fields for the status payload
+            ticket: Admission ticket to wait for before running (released
+                when the job finishes or is cancelled)
+
+        Raises:
+            ValueError: If job_id is malformed or that job is still running
+                (the ticket is released)
+        """
+        try:
+            self._prune()
+            job_id = validate_job_id(job_id) if job_id else new_job_id()
+            existing = self._jobs.get(job_id)
+            if existing is not None and not existing.done:
+                raise ValueError(f"Job {job_id} is already running")
+        except BaseException:
+            # The job never starts, so nothing else would free its slot
+            if ticket is not None:
+                ticket.release()
+            raise
+        job = Job(job_id, kind, meta)
+        self._jobs[job_id] = job
+        self._jobs.move_to_end(job_id)
+        if ticket is not None and not ticket.admitted:
+            job.publish({"event": "job_queued", "work_class": ticket.queue.name, "queued": ticket.queue.queued})
+        job.task = asyncio.create_task(self._run(job, fn, ticket))
+        return job
+
+    async def _run(
+        self,
+        job: Job,
+        fn: Callable[[ProgressCallback], Awaitable[Dict[str, Any]]],
+        ticket: Optional[Ticket] = None
+    ) -> None:
+        try:
+            if ticket is not None:
+                job.queue_wait_ms = round(await ticket.wait() * 1000, 2)
+            job.status = RUNNING
+            job.started = time.time()
+            job.publish({"event": "job_started", "kind": job.kind, "queue_wait_ms": job.queue_wait_ms})
+            job.result = await fn(job.publish)
+            failed = job.result.get("status") == "error" or job.result.get("success") is False
+            job.status = FAILED if failed else SUCCEEDED
+            if failed:
+                job.error = job.result.get("error")
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+        finally:
+            if ticket is not None:
+                ticket.release()
+            job.finished = time.time()
+            job.publish({
+                "event": "job_finished",
+                "status": job.status,
+                "error": job.error,
+                "duration_ms": round((job.finished - job.started) * 1000, 2) if job.started else None,
+            })
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a running job; False if unknown or already finished."""
+        job = self._jobs.get(job_id)
+        if job is None or job.done or job.task is None:
+            return False
+        job.task.cancel()
+        return True
+
+    def active(self) -> Dict[str, int]:
+        """Number of unfinished jobs by status."""
+        counts = {QUEUED: 0, RUNNING: 0}
+        for job in self._jobs.values():
+            if not job.done:
+                counts[job.status] += 1
+        return counts
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [job.to_dict(include_result=False) for job in self._jobs.values()]
+
+    def _prune(self) -> None:
+        now = time.time()
+        finished = [j for j in self._jobs.values() if j.done]
+        excess = len(finished) - self.max_finished
+        for job in finished:
+            if excess > 0 or now - (job.finished or now) > self.ttl:
+                del self._jobs[job.job_id]
+                excess -= 1
+
+
+def sse_format(event: Optional[Dict[str, Any]]) -> str:
+    """One Server-Sent Events message (a comment keep-alive for None)."""
+    if event is None:
+        return ": keep-alive\n\n"
+    return f"id: {event['seq']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
@@ -0,0 +1,103 @@
+"""
+Cursor PCB - Incremental JSON Parsing
+
+Extracts complete elements of top-level JSON arrays (e.g. "symbols" or
+"nets") from a response that is still streaming in, so downstream phases
+can start work before the LLM has finished generating.
+"""
+
+import json
+from typing import Any, List, Tuple, Iterable
+
+
+class JSONArrayStream:
+    """
+    Incremental parser yielding elements of named top-level arrays.
+
+    Feed text chunks as they arrive; each call returns the array elements
+    that became complete during that chunk. Only object and array elements
+    are emitted (scalars are ignored). Text before the first "{" (such as a
+    markdown code fence) is skipped.
+
+    Example:
+        parser = JSONArrayStream("symbols")
+        for chunk in chunks:
+            for symbol in parser.feed(chunk):
+                place(symbol)
+    """
+
+    def __init__(self, keys: str | Iterable[str]):
+        """
+        Args:
+            keys: Top-level key (or keys) whose array elements to emit
+        """
+        self.keys = {keys} if isinstance(keys, str) else set(keys)
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string = None
+        self._pending_key = None
+        self._array_key = None
+        self._array_depth = 0
+        self._item_start = -1
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Add a chunk of text and return newly completed elements."""
+        return [item for _, item in self.feed_items(chunk)]
+
+    def feed_items(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Like feed(), but returns (key, element) pairs."""
+        self.text += chunk
+        items = []
+        text = self.text
+
+        for i in range(self._pos, len(text)):
+            c = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = json.loads(text[self._string_start:i + 1])
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":" and self._depth == 1:
+                self._pending_key = self._last_string
+            elif c == "," and self._depth == 1:
+                self._pending_key = None
+            elif c in "{[":
+                if (
+                    c == "["
+                    and self._depth == 1
+                    and self._array_key is None
+                    and self._pending_key in self.keys
+                ):
+                    self._array_key = self._pending_key
+                    self._array_depth = self._depth + 1
+                elif self._array_key is not None and self._depth == self._array_depth:
+                    self._item_start = i
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._array_key is not None:
+                    if self._depth == self._array_depth and self._item_start >= 0:
+                        items.append(
+                            (self._array_key, json.loads(text[self._item_start:i + 1]))
+                        )
+                        self._item_start = -1
+                    elif self._depth < self._array_depth:
+                        self._array_key = None
+                        self._pending_key = None
+
+        self._pos = len(text)
+        return items
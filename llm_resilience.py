@@ -0,0 +1,370 @@
+"""
+Cursor PCB - Resilient LLM Calls
+
+Wraps a Dedalus-style runner with per-phase timeouts, jittered exponential
+retry on transient errors, optional hedged duplicate requests once a call
+runs past the phase's p95 latency, and a process-wide concurrency/rate
+limiter shared by every PCBAgent (across threads and event loops).
+"""
+
+import asyncio
+import inspect
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, AsyncIterator
+
+from metrics import LLM_CALLS, LLM_ERRORS, LLM_IN_FLIGHT, LLM_LATENCY, LLM_QUEUE_DEPTH, LLM_RETRIES
+
+TRANSIENT_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+TRANSIENT_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "RateLimitError",
+    "InternalServerError",
+}
+
+
+def is_transient(exc: BaseException) -> bool:
+    """True for errors worth retrying (timeouts, connection drops, 429/5xx)."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int) and (status in TRANSIENT_STATUS_CODES or status >= 500):
+        return True
+    return type(exc).__name__ in TRANSIENT_ERROR_NAMES
+
+
+def _record_failure(model: Optional[str], exc: BaseException) -> None:
+    LLM_CALLS.inc(model, "error")
+    LLM_ERRORS.inc(model, type(exc).__name__)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After response header, if the error carries one."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMCallLimiter:
+    """
+    Concurrency cap plus optional token-bucket rate limit for LLM calls.
+
+    Safe to share between threads and event loops (the Flask backend runs
+    each request in its own thread with its own loop). Use as
+    `async with limiter: ...`.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        rate_per_second: Optional[float] = None,
+        burst: Optional[int] = None
+    ):
+        """
+        Args:
+            max_concurrent: Calls allowed in flight at once
+            rate_per_second: Sustained call starts per second (None = unlimited)
+            burst: Token bucket size (default: max_concurrent)
+        """
+        self.max_concurrent = max_concurrent
+        self.rate_per_second = rate_per_second
+        self.burst = burst or max_concurrent
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters: deque = deque()
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+
+    @property
+    def in_flight(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def __aenter__(self) -> "LLMCallLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+    async def acquire(self) -> None:
+        """Wait for a free slot (and a rate token, if rate limited)."""
+        await self._acquire_slot()
+        if self.rate_per_second:
+            try:
+                await self._take_token()
+            except BaseException:
+                self.release()
+                raise
+
+    async def _acquire_slot(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.max_concurrent and not self._waiters:
+                self._active += 1
+                return
+            fut = loop.create_future()
+            entry = (loop, fut)
+            self._waiters.append(entry)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(entry)
+                    handed_over = False
+                except ValueError:
+                    handed_over = True
+            # A slot handed to a cancelled future is passed on by _hand_over;
+            # one we actually received must be given back here
+            if handed_over and fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Free a slot, handing it directly to the oldest waiter if any."""
+        with self._lock:
+            while self._waiters:
+                loop, fut = self._waiters.popleft()
+                if loop.is_closed():
+                    continue
+                loop.call_soon_threadsafe(self._hand_over, fut)
+                return
+            self._active -= 1
+
+    def _hand_over(self, fut: asyncio.Future) -> None:
+        if fut.cancelled():
+            self.release()
+        else:
+            fut.set_result(None)
+
+    async def _take_token(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst,
+                    self._tokens + (now - self._refilled) * self.rate_per_second
+                )
+                self._refilled = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate_per_second
+            await asyncio.sleep(wait)
+
+
+_default_limiter: Optional[LLMCallLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_default_limiter() -> LLMCallLimiter:
+    """
+    Process-wide limiter shared by all agents.
+
+    Sized from PCB_AGENT_LLM_CONCURRENCY (default 8) and
+    PCB_AGENT_LLM_RATE (calls per second, default unlimited).
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            rate = os.getenv("PCB_AGENT_LLM_RATE")
+            _default_limiter = LLMCallLimiter(
+                max_concurrent=int(os.getenv("PCB_AGENT_LLM_CONCURRENCY", "8")),
+                rate_per_second=float(rate) if rate else None
+            )
+            limiter = _default_limiter
+            LLM_QUEUE_DEPTH.set_function(lambda: limiter.waiting)
+            LLM_IN_FLIGHT.set_function(lambda: limiter.in_flight)
+        return _default_limiter
+
+
+class LatencyTracker:
+    """Rolling window of call latencies per (phase, model), for hedging thresholds."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[Any, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Any, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, key: Any, q: float) -> Optional[float]:
+        """Latency at quantile q, or None until min_samples are recorded."""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+# Shared so hedging thresholds learn from every agent in the process
+DEFAULT_LATENCY = LatencyTracker()
+
+
+class ResilientRunner:
+    """Retrying, hedging, rate-limited front end for runner.run()."""
+
+    def __init__(
+        self,
+        runner: Any,
+        limiter: Optional[LLMCallLimiter] = None,
+        timeouts: Optional[Dict[int, float]] = None,
+        default_timeout: float = 300.0,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        latency: Optional[LatencyTracker] = None
+    ):
+        """
+        Args:
+            runner: Object with run(**kwargs) (DedalusRunner or a fake)
+            limiter: Shared limiter (default: process-wide limiter)
+            timeouts: Per-phase timeout in seconds, e.g. {0: 60, 1: 300, 5: 300}
+            default_timeout: Timeout for phases not listed in timeouts
+            max_retries: Retries after the first attempt on transient errors
+            backoff_base: First retry delay in seconds (doubles each retry)
+            backoff_max: Upper bound on a single retry delay
+            hedge: Send a duplicate request once a call exceeds the phase's p95
+            hedge_quantile: Latency quantile that triggers a hedge
+            latency: Latency history (default: process-wide tracker)
+        """
+        self.runner = runner
+        self.limiter = limiter or get_default_limiter()
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.latency = latency or DEFAULT_LATENCY
+        self.retries = 0
+        self.hedges = 0
+
+    def _timeout(self, phase: int) -> float:
+        return self.timeouts.get(phase, self.default_timeout)
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After."""
+        hinted = _retry_after(exc)
+        if hinted is not None:
+            return min(hinted, self.backoff_max)
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    async def run(self, kwargs: Dict[str, Any], phase: int) -> Any:
+        """
+        Call runner.run(**kwargs) with timeout, retries and optional hedging.
+
+        Returns:
+            The runner's result object (with final_output)
+        """
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(kwargs, phase)
+            except Exception as e:
+                if not is_transient(e) or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                self.retries += 1
+                LLM_RETRIES.inc(kwargs.get("model"))
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, kwargs: Dict[str, Any], phase: int) -> Any:
+        model = kwargs.get("model")
+        async with self.limiter:
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(self.runner.run(**kwargs), self._timeout(phase))
+            except Exception as e:
+                _record_failure(model, e)
+                raise
+            elapsed = time.monotonic() - started
+            self.latency.record((phase, model), elapsed)
+            LLM_CALLS.inc(model, "success")
+            LLM_LATENCY.observe(elapsed, model)
+            return result
+
+    async def _hedged(self, kwargs: Dict[str, Any], phase: int) -> Any:
+        threshold = None
+        if self.hedge:
+            threshold = self.latency.quantile((phase, kwargs.get("model")), self.hedge_quantile)
+        if threshold is None:
+            return await self._attempt(kwargs, phase)
+
+        pending = {asyncio.ensure_future(self._attempt(kwargs, phase))}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=threshold)
+            if not done:
+                self.hedges += 1
+                pending.add(asyncio.ensure_future(self._attempt(kwargs, phase)))
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, kwargs: Dict[str, Any], phase: int) -> AsyncIterator[Any]:
+        """
+        Stream runner.run(**kwargs, stream=True) chunks.
+
+        The phase timeout applies to the wait for each chunk. Transient
+        failures are retried only before the first chunk has been yielded.
+        """
+        model = kwargs.get("model")
+        attempt = 0
+        while True:
+            started = False
+            try:
+                async with self.limiter:
+                    began = time.monotonic()
+                    stream = self.runner.run(**kwargs, stream=True)
+                    if inspect.isawaitable(stream):
+                        stream = await stream
+                    chunks = stream.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(
+                                chunks.__anext__(), self._timeout(phase)
+                            )
+                        except StopAsyncIteration:
+                            LLM_CALLS.inc(model, "success")
+                            LLM_LATENCY.observe(time.monotonic() - began, model)
+                            return
+                        started = True
+                        yield chunk
+            except Exception as e:
+                _record_failure(model, e)
+                if started or not is_transient(e) or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+            attempt += 1
+            self.retries += 1
+            LLM_RETRIES.inc(model)
+            await asyncio.sleep(delay)
@@ -0,0 +1,390 @@
+"""
+Cursor PCB - Metrics
+
+Prometheus-style counters, gauges and histograms for the backend and the
+generation pipeline, rendered in the text exposition format for GET /metrics.
+
+Updates are cheap and take no lock: every metric keeps one shard per thread,
+a thread only ever writes its own shard, and a scrape sums the shards.
+Shards of finished threads are folded into one total, so servers starting a
+thread per request don't accumulate them.
+Gauges describing current state (LLM queue depth, active jobs, cache hit
+ratio) can instead be read from a callback at scrape time.
+
+The metrics below are shared by every module; import and update them
+directly:
+
+    from metrics import LLM_CALLS
+    LLM_CALLS.inc("openai/gpt-5.2", "success")
+"""
+
+import bisect
+import math
+import threading
+import time
+import weakref
+from typing import Dict, Any, List, Optional, Callable, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers fast endpoints through multi-minute LLM calls and routing
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)
+
+LabelValues = Tuple[Any, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base class: one shard of values per thread, merged on scrape."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        # (owning thread, shard) per live thread, plus the merged shards of
+        # finished threads
+        self._shards: List[Tuple[weakref.ref, Dict[LabelValues, Any]]] = []
+        self._retired: Dict[LabelValues, Any] = {}
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict[LabelValues, Any]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            # Only taken once per thread
+            with self._shards_lock:
+                self._fold_finished()
+                self._shards.append((weakref.ref(threading.current_thread()), values))
+            return values
+
+    def _fold_finished(self) -> None:
+        """Merge shards of finished threads into _retired (hold _shards_lock)."""
+        live = []
+        for owner, shard in self._shards:
+            thread = owner()
+            if thread is not None and thread.is_alive():
+                live.append((owner, shard))
+                continue
+            # A finished thread never writes again, so its shard is stable
+            for labels, value in shard.items():
+                self._merge(self._retired, labels, value)
+        self._shards = live
+
+    def _merge(self, into: Dict[LabelValues, Any], labels: LabelValues, value: Any) -> None:
+        into[labels] = into.get(labels, 0.0) + value
+
+    def _snapshots(self) -> List[Dict[LabelValues, Any]]:
+        with self._shards_lock:
+            self._fold_finished()
+            shards = [shard for _, shard in self._shards]
+            retired = {
+                labels: list(value) if isinstance(value, list) else value
+                for labels, value in self._retired.items()
+            }
+        # dict.copy() is atomic under the GIL, so a writer can't tear it
+        return [retired] + [shard.copy() for shard in shards]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. requests served."""
+
+    kind = "counter"
+
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        """Add amount (default 1) to the series for labels (in labelnames order)."""
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        """Totals per label set, summed over all threads."""
+        totals: Dict[LabelValues, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values().items(), key=lambda kv: str(kv[0]))
+        ]
+
+
+class Gauge(Counter):
+    """
+    Value that goes up and down: either inc()/dec() from code, or a
+    callback set with set_function() that is read at scrape time.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._function: Optional[Callable[[], Any]] = None
+
+    def dec(self, *labels: Any, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set_function(self, function: Optional[Callable[[], Any]]) -> None:
+        """
+        Read the gauge from function() at scrape time.
+
+        function returns a number (no labels) or {label_values_tuple: number}.
+        """
+        self._function = function
+
+    def values(self) -> Dict[LabelValues, float]:
+        if self._function is None:
+            return super().values()
+        try:
+            value = self._function()
+        except Exception:
+            return {}
+        return dict(value) if isinstance(value, dict) else {(): float(value)}
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (durations in seconds) in fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: Any) -> None:
+        """Record one observation for labels (in labelnames order)."""
+        shard = self._shard()
+        # Per-bucket counts (not cumulative), then +Inf, sum and count
+        cells = shard.get(labels)
+        if cells is None:
+            cells = shard[labels] = [0.0] * (len(self.buckets) + 3)
+        cells[bisect.bisect_left(self.buckets, value)] += 1
+        cells[-2] += value
+        cells[-1] += 1
+
+    def _merge(self, into: Dict[LabelValues, Any], labels: LabelValues, value: Any) -> None:
+        cells = into.get(labels)
+        if cells is None:
+            into[labels] = list(value)
+            return
+        for i, count in enumerate(value):
+            cells[i] += count
+
+    def values(self) -> Dict[LabelValues, List[float]]:
+        totals: Dict[LabelValues, List[float]] = {}
+        for shard in self._snapshots():
+            for labels, cells in shard.items():
+                merged = totals.setdefault(labels, [0.0] * len(cells))
+                for i, value in enumerate(list(cells)):
+                    merged[i] += value
+        return totals
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, cells in sorted(self.values().items(), key=lambda kv: str(kv[0])):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), cells):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} "
+                    f"{_format_value(cumulative)}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(cells[-2])}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(cells[-1])}")
+        return lines
+
+
+class Registry:
+    """Named set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Add metric; returns the already registered one for a repeated name.
+
+        Raises:
+            ValueError: If the name is registered with another type
+        """
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric):
+            raise ValueError(f"Metric {metric.name} is already registered as a {existing.kind}")
+        return existing
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labelnames))
+
+
+def histogram(
+    name: str,
+    help: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+def render() -> str:
+    """Text for GET /metrics."""
+    return REGISTRY.render()
+
+
+# HTTP (server.py / backend_test.py)
+HTTP_REQUESTS = counter(
+    "pcb_http_requests_total", "HTTP requests by route template and status",
+    ("method", "route", "status")
+)
+HTTP_LATENCY = histogram(
+    "pcb_http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+HTTP_IN_FLIGHT = gauge("pcb_http_requests_in_flight", "HTTP requests being served")
+
+# Pipeline (pcb_agent.py)
+PHASE_DURATION = histogram(
+    "pcb_phase_duration_seconds", "PCBAgent phase duration", ("phase",)
+)
+PHASE_ERRORS = counter("pcb_phase_errors_total", "PCBAgent phases that raised", ("phase",))
+
+# LLM calls (llm_resilience.py, pcb_agent.py)
+LLM_CALLS = counter(
+    "pcb_llm_calls_total", "LLM call attempts by model and outcome (success/error)",
+    ("model", "outcome")
+)
+LLM_LATENCY = histogram(
+    "pcb_llm_call_duration_seconds", "Latency of successful LLM call attempts", ("model",)
+)
+LLM_ERRORS = counter(
+    "pcb_llm_errors_total", "Failed LLM call attempts by model and exception type",
+    ("model", "error")
+)
+LLM_RETRIES = counter("pcb_llm_retries_total", "LLM calls retried after a transient error", ("model",))
+LLM_TOKENS = counter(
+    "pcb_llm_tokens_total", "Estimated tokens sent to / received from the model (cache hits excluded)",
+    ("model", "direction")
+)
+LLM_QUEUE_DEPTH = gauge("pcb_llm_queue_depth", "LLM calls waiting for the shared limiter")
+LLM_IN_FLIGHT = gauge("pcb_llm_in_flight", "LLM calls holding a limiter slot")
+
+# Caches (pcb_agent.py, render_cache.py)
+CACHE_REQUESTS = counter(
+    "pcb_cache_requests_total", "Cache lookups by cache (llm/render) and result (hit/miss)",
+    ("cache", "result")
+)
+CACHE_HIT_RATIO = gauge(
+    "pcb_cache_hit_ratio", "Share of cache lookups served from the cache", ("cache",)
+)
+
+# Subprocesses (render_cache.py, server.py / backend_test.py)
+SUBPROCESS_DURATION = histogram(
+    "pcb_subprocess_duration_seconds",
+    "External command duration (kicad-cli, pcb.py including Freerouting)",
+    ("command", "outcome")
+)
+
+# Background jobs (server.py)
+JOBS_ACTIVE = gauge("pcb_jobs_active", "Background jobs not yet finished, by status", ("status",))
+
+# Admission control (admission.py)
+ADMISSION_WAIT = histogram(
+    "pcb_admission_wait_seconds", "Time admitted requests spent queued, by work class",
+    ("work_class",)
+)
+ADMISSION_REJECTED = counter(
+    "pcb_admission_rejected_total", "Requests rejected with 429 (queue_full/client_limit)",
+    ("work_class", "reason")
+)
+ADMISSION_RUNNING = gauge(
+    "pcb_admission_running", "Admitted requests holding a slot, by work class", ("work_class",)
+)
+ADMISSION_QUEUED = gauge(
+    "pcb_admission_queued", "Requests waiting for a slot, by work class", ("work_class",)
+)
+
+
+def observe_subprocess(command: str, started: float, returncode: Optional[int]) -> None:
+    """
+    Record a subprocess run that began at time.monotonic() == started.
+
+    Args:
+        command: Label, e.g. "kicad-cli" or "pcb"
+        started: time.monotonic() before the process was started
+        returncode: Exit code, or None if it timed out or could not start
+    """
+    SUBPROCESS_DURATION.observe(
+        time.monotonic() - started, command, "success" if returncode == 0 else "error"
+    )
+
+
+def _cache_hit_ratios() -> Dict[LabelValues, float]:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in CACHE_REQUESTS.values().items():
+        hits_total = totals.setdefault(cache, [0.0, 0.0])
+        hits_total[1] += value
+        if result == "hit":
+            hits_total[0] += value
+    return {(cache,): hits / total for cache, (hits, total) in totals.items() if total}
+
+
+CACHE_HIT_RATIO.set_function(_cache_hit_ratios)
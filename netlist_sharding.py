@@ -0,0 +1,190 @@
+"""
+Cursor PCB - Sharded Netlist Generation
+
+Splits a design into subsystems (power tree, MCU core + support parts, one
+shard per connector) so Phase 5 can ask the LLM for each shard's nets
+concurrently, then merges the shard netlists back into one.
+"""
+
+import re
+from typing import Dict, Any, List, Tuple
+
+from component_search import is_power_symbol
+
+POWER_SHARD = "power"
+CORE_SHARD = "core"
+
+_POWER_WORDS = re.compile(
+    r"\b(regulator|ldo|buck|boost|vin|vbus|vout|input power|power input|"
+    r"reverse|polarity|ferrite|bulk)\b",
+    re.IGNORECASE
+)
+
+SHARD_NOTE = """This is one shard of a larger design. Generate nets ONLY for the pins of the
+components in this shard's component list; do not list pins of other components.
+
+Global power nets - use these exact names: {global_nets}
+
+Components in other shards (reach them only through named nets):
+{others}
+
+Signals that continue to components in other shards must use a conventional,
+descriptive net name (e.g. VBUS, USB_DP, USB_DN, UART_TX, UART_RX, SDA, SCL, EN).
+Nets with the same name in different shards are merged into one net."""
+
+
+def _ref_prefix(ref_des: str) -> str:
+    return re.sub(r"\d+$", "", ref_des or "")
+
+
+def _is_regulator(symbol: Dict[str, Any]) -> bool:
+    lib = symbol.get("lib", "")
+    text = f"{symbol.get('symbol', '')} {symbol.get('explanation', '')}"
+    return lib.startswith("Regulator") or bool(
+        re.search(r"\b(regulator|ldo)\b", text, re.IGNORECASE)
+    )
+
+
+def _is_connector(symbol: Dict[str, Any]) -> bool:
+    return (
+        symbol.get("lib", "").startswith("Connector")
+        and _ref_prefix(symbol.get("ref_des")) in ("J", "P")
+    )
+
+
+def _mentions(symbol: Dict[str, Any], anchor: Dict[str, Any]) -> bool:
+    """True if symbol's explanation names the anchor's ref_des or symbol."""
+    text = symbol.get("explanation", "")
+    for word in (anchor.get("ref_des"), anchor.get("symbol")):
+        if word and re.search(rf"(?<![\w-]){re.escape(word)}(?![\w-])", text, re.IGNORECASE):
+            return True
+    return False
+
+
+def partition_components(symbols: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Group symbols into netlist shards.
+
+    - Power symbols (GND, +3V3, ...) are shared by every shard
+    - Regulators go to the "power" shard; each connector gets its own shard
+    - Every other IC (MCU, flash, ...) goes to the "core" shard
+    - Passives and other parts follow the shard of the part their
+      explanation names (e.g. "decoupling for U2"), else power-related
+      wording, else the "core" shard
+
+    Args:
+        symbols: Symbols from llm_output1 (with or without pins)
+
+    Returns:
+        List of {"name", "symbols"} shards (shared power symbols included
+        in each), in a stable order: power, core, then connectors
+    """
+    shared = [s for s in symbols if is_power_symbol(s)]
+    shared_ids = {id(s) for s in shared}
+
+    assignment: Dict[int, str] = {}
+    anchors: List[Tuple[Dict[str, Any], str]] = []
+    for s in symbols:
+        if id(s) in shared_ids:
+            continue
+        if _is_regulator(s):
+            shard = POWER_SHARD
+        elif _is_connector(s):
+            shard = f"conn_{s.get('ref_des')}"
+        elif _ref_prefix(s.get("ref_des")) == "U":
+            shard = CORE_SHARD
+        else:
+            continue
+        assignment[id(s)] = shard
+        anchors.append((s, shard))
+
+    for s in symbols:
+        if id(s) in shared_ids or id(s) in assignment:
+            continue
+        shard = next((name for anchor, name in anchors if _mentions(s, anchor)), None)
+        if shard is None:
+            shard = POWER_SHARD if _POWER_WORDS.search(s.get("explanation", "")) else CORE_SHARD
+        assignment[id(s)] = shard
+
+    order = [POWER_SHARD, CORE_SHARD] + sorted(
+        {name for name in assignment.values()} - {POWER_SHARD, CORE_SHARD}
+    )
+    shards = []
+    for name in order:
+        members = [s for s in symbols if assignment.get(id(s)) == name]
+        if members:
+            shards.append({"name": name, "symbols": members + shared})
+    return shards
+
+
+def global_net_names(symbols: List[Dict[str, Any]]) -> List[str]:
+    """Names of the power rails defined by power symbols, e.g. ["GND", "+3V3"]."""
+    names = []
+    for s in symbols:
+        if is_power_symbol(s):
+            name = s.get("value") or s.get("symbol")
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def shard_note(shard: Dict[str, Any], shards: List[Dict[str, Any]]) -> str:
+    """Instructions telling the LLM how one shard fits into the whole design."""
+    own = {s.get("ref_des") for s in shard["symbols"]}
+    others = []
+    for other in shards:
+        if other is shard:
+            continue
+        for s in other["symbols"]:
+            ref = s.get("ref_des")
+            if ref in own or is_power_symbol(s):
+                continue
+            others.append(f"- {ref}: {s.get('symbol')} ({s.get('value')}) [{other['name']}]")
+    return SHARD_NOTE.format(
+        global_nets=", ".join(global_net_names(shard["symbols"])) or "none",
+        others="\n".join(others) or "- none"
+    )
+
+
+def merge_netlists(
+    shard_outputs: List[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Merge per-shard netlists into one.
+
+    Nets with the same name are unified (connections de-duplicated). A pin
+    that appears in two differently named nets is a conflict: it is kept in
+    the first net and dropped from the later one.
+
+    Args:
+        shard_outputs: Netlist JSON ({"nets": [...]}) from each shard
+
+    Returns:
+        (merged netlist, conflicts) where each conflict is
+        {"ref", "pin", "kept_in", "dropped_from"}
+    """
+    nets: Dict[str, Dict[str, Any]] = {}
+    pin_owner: Dict[Tuple[str, str], str] = {}
+    conflicts = []
+
+    for output in shard_outputs:
+        for net in output.get("nets", []):
+            name = net.get("name", "")
+            merged = nets.setdefault(name, {"name": name, "connections": []})
+            for conn in net.get("connections", []):
+                pin_key = (str(conn.get("ref")), str(conn.get("pin")))
+                owner = pin_owner.get(pin_key)
+                if owner == name:
+                    continue
+                if owner is not None:
+                    conflicts.append({
+                        "ref": pin_key[0],
+                        "pin": pin_key[1],
+                        "kept_in": owner,
+                        "dropped_from": name
+                    })
+                    continue
+                pin_owner[pin_key] = name
+                merged["connections"].append(conn)
+
+    return {"nets": [n for n in nets.values() if n["connections"]]}, conflicts
@@ -1,10 +1,20 @@
 from pathlib import Path
 from typing import Optional
+import gzip
 import json
 import subprocess
 import pcbnew
-import wx
-app = wx.App()
+
+_wx_app = None
+
+
+def init_wx():
+    """Create the wx.App pcbnew's Specctra export/import needs (once, from main)."""
+    global _wx_app
+    if _wx_app is None:
+        import wx
+        _wx_app = wx.App()
+    return _wx_app
 
 
 def place_footprints_from_schematic(board: pcbnew.BOARD, llm_output1: dict):
@@ -184,6 +194,7 @@ def autoroute_with_freerouting(board: pcbnew.BOARD, project_dir: Path, timeout_s
 
 def main(project_path_str: str, llm_output1_path_arg: Optional[str] = None):
     """Main function to process PCB layout. If llm_output1_path_arg is set and exists, place footprints from schematic; else relayout with min spacing."""
+    init_wx()
     project_path = Path(project_path_str)
     print("project_path:", project_path)
     # Find .kicad_pcb file in directory
@@ -198,7 +209,8 @@ def main(project_path_str: str, llm_output1_path_arg: Optional[str] = None):
 
     llm_output1_path = llm_output1_path_arg if llm_output1_path_arg else None
     if llm_output1_path and Path(llm_output1_path).exists():
-        with open(llm_output1_path, "r", encoding="utf-8") as f:
+        opener = gzip.open if llm_output1_path.endswith(".gz") else open
+        with opener(llm_output1_path, "rt", encoding="utf-8") as f:
             llm_output1 = json.load(f)
         place_footprints_from_schematic(board, llm_output1)
     else:
@@ -6,22 +6,172 @@ Stops after llm_output2.json is generated (before wire drawing).
 """
 
 import asyncio
+import concurrent.futures
+import copy
 import json
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional, List
-from dotenv import load_dotenv
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Collection, Set, Tuple
 import os
 
-from dedalus_labs import AsyncDedalus, DedalusRunner
-
 # Import existing schematic functions
 from schematic import (
     place_from_llm_output,
-    add_pin_outs,
+    read_pin_table,
+    load_design,
     clear_schematic,
+    draw_nets,
+)
+from design_model import Design, PinTable
+from artifacts import ArtifactSink, ESSENTIAL, FORMATS, FULL, LEVELS
+from checkpoints import CheckpointStore, file_version, library_versions, phase_key, reusable_phases
+from llm_cache import LLMCache
+from json_stream import JSONArrayStream
+from prompt_encoding import (
+    TABLE_NOTE,
+    PINS_NOTE,
+    TokenBudgetExceeded,
+    compact_json,
+    encode_table,
+    estimate_tokens,
+)
+from netlist_sharding import partition_components, shard_note, merge_netlists
+from llm_resilience import LLMCallLimiter, ResilientRunner
+from metrics import CACHE_REQUESTS, LLM_TOKENS, PHASE_DURATION, PHASE_ERRORS
+from component_search import entry_key, is_power_symbol, select_components, strip_search_fields
+from tracing import Tracer, span, current_span
+from agent_logging import get_log_writer, log_context, make_record, new_request_id
+from allowlist_registry import AllowlistSnapshot, get_allowlist
+from symbol_catalog import get_catalog
+from speculation import get_speculations
+from workspace import JobWorkspace, prune_workspaces, workspace_in_use, workspaces_in_use
+from placement import IncrementalPlacer, layout_components
+from validation import (
+    check_against_placed,
+    check_net,
+    check_symbol,
+    claim_pins,
+    errors,
+    format_issues,
+    LAYOUT_CODES,
+    pin_table,
+    prune_invalid_connections,
+    validate_components,
+    validate_netlist,
 )
 
-load_dotenv()
+_env_loaded = False
+
+
+def load_env() -> None:
+    """
+    Load .env into os.environ (once per process).
+
+    Called by create_client() and the entry points rather than at import,
+    so importing this module stays cheap.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    _env_loaded = True
+
+
+def create_client() -> Any:
+    """
+    New AsyncDedalus client for DEDALUS_API_KEY (from the environment or .env).
+
+    Raises:
+        ValueError: If DEDALUS_API_KEY is not set
+    """
+    load_env()
+    api_key = os.getenv("DEDALUS_API_KEY")
+    if not api_key:
+        raise ValueError(
+            "DEDALUS_API_KEY not found. "
+            "Set it in .env file or environment variable."
+        )
+    # Imported on first use: the SDK (pydantic, httpx) dominates import time
+    from dedalus_labs import AsyncDedalus
+
+    return AsyncDedalus(api_key=api_key)
+
+
+def _dedalus_runner(client: Any) -> Any:
+    from dedalus_labs import DedalusRunner
+
+    return DedalusRunner(client)
+
+
+def _path_str(path: Optional[Path]) -> Optional[str]:
+    # Artifacts skipped by the artifact level have no path
+    return str(path) if path else None
+
+
+def _cacheable(output: Any) -> bool:
+    # A JSON object that is not an {"error": ...} report
+    try:
+        data = json.loads(output)
+    except (TypeError, json.JSONDecodeError):
+        return False
+    return isinstance(data, dict) and "error" not in data
+
+
+class _SerialWorker:
+    """
+    Runs blocking calls on a worker thread, one at a time and in order.
+
+    Stream callbacks run on the event loop, so they hand their schematic
+    and library work to this queue instead of blocking every other job.
+    `then` callbacks run back on the loop with each call's result. After
+    a call fails the remaining ones are skipped and join() re-raises.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        then: Optional[Callable[[Any], None]] = None
+    ) -> None:
+        """Queue fn(*args) behind everything submitted before it."""
+        self._queue.put_nowait((fn, args, then))
+        if self._task is None:
+            self._task = asyncio.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while True:
+            fn, args, then = await self._queue.get()
+            try:
+                if self._error is None and not self._closed:
+                    result = await asyncio.to_thread(fn, *args)
+                    if then:
+                        then(result)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    async def join(self) -> None:
+        """Wait for every queued call; raise the first failure, if any."""
+        await self._queue.join()
+        if self._error is not None:
+            raise self._error
+
+    async def aclose(self) -> None:
+        """Drop queued calls, wait for the running one and stop the consumer."""
+        self._closed = True
+        await self._queue.join()
+        if self._task is not None:
+            self._task.cancel()
 
 
 class PCBAgent:
@@ -32,9 +182,35 @@ class PCBAgent:
         allow_list_path: str = "allow_list.json",
         symbol_lib_path: str = "/Applications/KiCad/KiCad.app/Contents/SharedSupport/symbols/",
         prompt1_path: str = "prompt1.txt",
+        prompt1_selection_path: str = "prompt1_selection.txt",
         prompt2_instructions_path: str = "prompt2_instructions.txt",
         verbose: bool = False,
-        log_file: str = "pcb_agent.log"
+        log_file: str = "pcb_agent.log",
+        llm_cache_path: Optional[str] = "out/llm_cache.sqlite",
+        llm_cache_ttl: Optional[float] = 7 * 24 * 3600,
+        llm_cache_max_bytes: int = 64 * 1024 * 1024,
+        local_filter_max: int = 64,
+        prefilter_top_k: int = 40,
+        token_budget: Optional[int] = None,
+        shard_threshold: int = 16,
+        max_concurrent_shards: int = 4,
+        runner: Optional[Any] = None,
+        client: Optional[Any] = None,
+        llm_timeouts: Optional[Dict[int, float]] = None,
+        llm_max_retries: int = 3,
+        hedge_requests: bool = False,
+        llm_limiter: Optional[LLMCallLimiter] = None,
+        trace_dir: Optional[str] = "out/traces",
+        workspace_root: str = "out/jobs",
+        workspace_max_age: Optional[float] = 7 * 24 * 3600,
+        workspace_max_jobs: Optional[int] = 200,
+        max_repair_rounds: int = 2,
+        placement: str = "local",
+        use_catalog: bool = False,
+        artifact_level: Optional[str] = None,
+        artifact_format: Optional[str] = None,
+        checkpoint_dir: Optional[str] = "out/checkpoints",
+        checkpoint_max_age: Optional[float] = 7 * 24 * 3600
     ):
         """
         Initialize PCB Agent.
@@ -42,78 +218,415 @@ class PCBAgent:
         Args:
             allow_list_path: Path to component allowlist JSON
             symbol_lib_path: Path to KiCAD symbol library directory
-            prompt1_path: Path to Phase 1 LLM instructions
+            prompt1_path: Path to Phase 1 LLM instructions (placement="llm")
+            prompt1_selection_path: Path to selection-only Phase 1 instructions
+                (placement="local")
             prompt2_instructions_path: Path to Phase 5 LLM instructions
             verbose: Enable verbose logging
-            log_file: Path to log file (set to None to disable file logging)
+            log_file: Path to JSON-lines log file, shared with other agents
+                (set to None to disable file logging)
+            llm_cache_path: Path to LLM response cache (set to None to disable caching)
+            llm_cache_ttl: Seconds before a cached response expires (None = never)
+            llm_cache_max_bytes: Cache size limit before LRU eviction
+            local_filter_max: Allowlists up to this size are filtered locally (no LLM)
+            prefilter_top_k: Candidates kept by local ranking before the filter LLM
+            token_budget: Max estimated input tokens per LLM call (None = unlimited)
+            shard_threshold: Non-power symbol count above which Phase 5 is sharded
+            max_concurrent_shards: Max Phase 5 shard LLM calls in flight at once
+            runner: Runner to use instead of a Dedalus one (e.g. a local fake)
+            client: Shared AsyncDedalus client to reuse (e.g. from agent_pool);
+                it is not closed by aclose()
+            llm_timeouts: Per-phase LLM timeouts in seconds (default {0: 60, 1: 300, 5: 300})
+            llm_max_retries: Retries on transient LLM errors (timeouts, 429, 5xx)
+            hedge_requests: Send a duplicate LLM request once a call passes its p95 latency
+            llm_limiter: Concurrency/rate limiter (default: shared process-wide limiter)
+            trace_dir: Directory for OTLP/JSON trace files (set to None to disable export)
+            workspace_root: Directory holding one artifact directory per job
+            workspace_max_age: Seconds before a job directory is deleted (None = never)
+            workspace_max_jobs: Job directories kept before the oldest are deleted
+            max_repair_rounds: Re-prompts for items that fail validation (0 = no repair)
+            placement: "local" (Phase 1 only picks parts; positions come from
+                placement.py) or "llm" (the model also places them)
+            use_catalog: Offer every symbol in symbol_lib_path (symbol_catalog.py)
+                on top of the allowlist
+            artifact_level: Artifacts written per job - "off", "essential" or
+                "full" (default: PCB_AGENT_ARTIFACTS, else "full"; see artifacts.py)
+            artifact_format: "json", "pretty" or "gzip" (default:
+                PCB_AGENT_ARTIFACT_FORMAT, else "json")
+            checkpoint_dir: Directory of phase checkpoints for resume (set to
+                None to disable checkpointing)
+            checkpoint_max_age: Seconds a checkpoint is kept (None = forever)
         """
         self.allow_list_path = Path(allow_list_path)
         self.symbol_lib = Path(symbol_lib_path)
         self.prompt1_path = Path(prompt1_path)
+        self.prompt1_selection_path = Path(prompt1_selection_path)
         self.prompt2_instructions_path = Path(prompt2_instructions_path)
         self.verbose = verbose or os.getenv("PCB_AGENT_VERBOSE") == "1"
         self.log_file = Path(log_file) if log_file else None
+        self.local_filter_max = local_filter_max
+        self.prefilter_top_k = prefilter_top_k
+        self.token_budget = token_budget
+        self.token_usage: Dict[str, Dict[str, int]] = {}
+        self.shard_threshold = shard_threshold
+        self.max_concurrent_shards = max_concurrent_shards
+        self.trace_dir = Path(trace_dir) if trace_dir else None
+        self.workspace_root = Path(workspace_root)
+        self.workspace_max_age = workspace_max_age
+        self.workspace_max_jobs = workspace_max_jobs
+        self.max_repair_rounds = max_repair_rounds
+        if placement not in ("local", "llm"):
+            raise ValueError(f"Unknown placement mode: {placement!r}")
+        self.placement = placement
+        self.use_catalog = use_catalog or os.getenv("PCB_AGENT_CATALOG") == "1"
+        self.artifact_level = artifact_level or os.getenv("PCB_AGENT_ARTIFACTS", FULL)
+        if self.artifact_level not in LEVELS:
+            raise ValueError(f"Unknown artifact level: {self.artifact_level!r}")
+        self.artifact_format = artifact_format or os.getenv("PCB_AGENT_ARTIFACT_FORMAT", "json")
+        if self.artifact_format not in FORMATS:
+            raise ValueError(f"Unknown artifact format: {self.artifact_format!r}")
         
-        # Clear log file at start of new session
-        if self.log_file:
-            self.log_file.write_text("")  # Clear previous logs
+        # Shared background writer; records are tagged with the request ID
+        self._log_writer = get_log_writer(self.log_file)
         
-        # Initialize Dedalus client
-        api_key = os.getenv("DEDALUS_API_KEY")
-        if not api_key:
-            raise ValueError(
-                "DEDALUS_API_KEY not found. "
-                "Set it in .env file or environment variable."
+        # Initialize Dedalus client (unless a runner or client was injected)
+        self._owns_client = False
+        if runner is not None:
+            self.client = client
+            self.runner = runner
+        elif client is not None:
+            self.client = client
+            self.runner = _dedalus_runner(client)
+        else:
+            self.client = create_client()
+            self.runner = _dedalus_runner(self.client)
+            self._owns_client = True
+        
+        # Timeouts, retries, hedging and the shared concurrency limit
+        self.llm = ResilientRunner(
+            self.runner,
+            limiter=llm_limiter,
+            timeouts=llm_timeouts or {0: 60.0, 1: 300.0, 5: 300.0},
+            max_retries=llm_max_retries,
+            hedge=hedge_requests
+        )
+        
+        # Content-addressed response cache shared by Phases 0, 1 and 5
+        if llm_cache_path and os.getenv("PCB_AGENT_NO_CACHE") != "1":
+            self.cache = LLMCache(
+                llm_cache_path,
+                ttl_seconds=llm_cache_ttl,
+                max_bytes=llm_cache_max_bytes
             )
+        else:
+            self.cache = None
         
-        self.client = AsyncDedalus(api_key=api_key)
-        self.runner = DedalusRunner(self.client)
+        # Outputs of Phases 0, 1 and 5 by input hash (checkpoints.py)
+        self.checkpoints = (
+            CheckpointStore(checkpoint_dir, checkpoint_max_age) if checkpoint_dir else None
+        )
         
         self.log("PCBAgent initialized")
     
     async def aclose(self):
-        """Close the async Dedalus client properly."""
+        """Close the async Dedalus client (if this agent created it) and the cache."""
         try:
-            await self.client.aclose()
+            if self.client and self._owns_client:
+                await self.client.aclose()
         except:
             pass
+        if self.cache:
+            self.cache.close()
     
-    def log(self, message: str, phase: Optional[int] = None):
-        """Log message if verbose mode enabled."""
+    def log(self, message: str, phase: Optional[int] = None, level: str = "info"):
+        """
+        Log message if verbose mode enabled.
+        
+        Records are queued for the background writer (terminal + JSON-lines
+        file), so this never blocks the event loop on I/O.
+        """
         if self.verbose:
-            from datetime import datetime
-            
-            # Format log message
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            prefix = f"[Phase {phase}]" if phase else "[Agent]"
-            log_message = f"{prefix} {message}"
-            full_log = f"[{timestamp}] {log_message}"
-            
-            # Print to terminal
-            print(log_message)
-            
-            # Write to log file if enabled
-            if self.log_file:
-                try:
-                    with self.log_file.open("a", encoding="utf-8") as f:
-                        f.write(f"{full_log}\n")
-                except Exception as e:
-                    # Don't crash if logging fails, just print error
-                    print(f"[Warning] Failed to write to log file: {e}")
-
-    def _write_output(self, data: dict, file_path: str | Path, msg: str) -> None:
-        path = Path(file_path)
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-
-        self.log(msg)
+            self._log_writer.emit(make_record(message, phase, level), echo=True)
+
+    def artifact_sink(self, workspace: Optional[JobWorkspace] = None) -> ArtifactSink:
+        """Background artifact writer for a job workspace (default: out/)."""
+        return ArtifactSink(
+            workspace.dir if workspace else "out", self.artifact_level, self.artifact_format
+        )
+
+    def _save(
+        self,
+        artifacts: ArtifactSink,
+        name: str,
+        data: Any,
+        level: str = FULL,
+        phase: Optional[int] = None
+    ) -> Optional[Path]:
+        """Queue an artifact for the background writer and log where it goes."""
+        path = artifacts.write(name, data, level)
+        if path is not None:
+            self.log(f"Saved {path}", phase=phase)
+        return path
+
+    def _phase0_key(self, user_prompt: str, mode: str) -> str:
+        """Checkpoint key of Phase 0: the prompt, the allowlist and the filter settings."""
+        catalog = None
+        if self.use_catalog:
+            # Refreshes the catalog first if a library changed
+            get_catalog(self.symbol_lib).snapshot()
+            catalog = get_catalog(self.symbol_lib).library_stamps()
+        return phase_key(
+            0, prompt=user_prompt, mode=mode,
+            allowlist=get_allowlist(self.allow_list_path).stamp, catalog=catalog,
+            local_filter_max=self.local_filter_max, prefilter_top_k=self.prefilter_top_k
+        )
+
+    def _phase1_key(
+        self,
+        user_prompt: str,
+        model: str,
+        components: List[Dict[str, Any]],
+        stream: bool
+    ) -> str:
+        """
+        Checkpoint key of Phase 1 (selection, repair and local placement).
+
+        Streaming places symbols in arrival order, so it is part of the key.
+        """
+        prompt_path = self.prompt1_selection_path if self.placement == "local" else self.prompt1_path
+        libs = [c.get("lib", "") for c in components if isinstance(c, dict)]
+        return phase_key(
+            1, prompt=user_prompt, model=model, components=components,
+            instructions=file_version(prompt_path),
+            allowlist=get_allowlist(self.allow_list_path).stamp,
+            libraries=library_versions(self.symbol_lib, libs),
+            placement=self.placement, stream=stream,
+            repair_rounds=self.max_repair_rounds
+        )
+
+    async def _load_checkpoint(
+        self,
+        phase: int,
+        key: str,
+        reuse: Set[int],
+        resumed: List[int],
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Checkpointed output of phase if it may be reused and exists (recorded in resumed)."""
+        if self.checkpoints is None or phase not in reuse:
+            return None
+        checkpoint = await asyncio.to_thread(self.checkpoints.load, phase, key)
+        if checkpoint is not None:
+            resumed.append(phase)
+            self.log(f"Resumed from checkpoint {key[:12]} (inputs unchanged)", phase=phase)
+            self._progress(on_progress, phase, "checkpoint_loaded", key=key)
+        return checkpoint
+
+    def _save_checkpoint(self, phase: int, key: str, data: Dict[str, Any]) -> None:
+        if self.checkpoints is not None:
+            self.checkpoints.save(phase, key, data)
+
+    def _finish_trace(self, tracer: Tracer) -> Dict[str, Any]:
+        """Export a finished trace (if enabled) and return its timing summary."""
+        if self.trace_dir:
+            try:
+                path = tracer.export(self.trace_dir / f"{tracer.trace_id}.json")
+                self.log(f"Wrote trace to {path}")
+            except OSError as e:
+                self.log(f"Warning: Failed to write trace: {e}", level="warning")
+        return tracer.summary()
+
+    async def _run_llm(
+        self,
+        kwargs: Dict[str, Any],
+        phase: int,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        stream_key: Optional[str] = None,
+        on_item: Optional[Callable[[Any], None]] = None,
+        pending_cache: Optional[List[Tuple[str, str, str]]] = None
+    ) -> str:
+        """
+        Call the LLM through the response cache.
+        
+        When on_item is given, the response is streamed and on_item is called
+        with each complete element of the top-level stream_key array as soon
+        as it arrives (cache hits replay every element immediately).
+        
+        Only JSON objects without an "error" key are cached. With
+        pending_cache, the entry is appended there instead of stored, so the
+        caller can store it (_commit_cache) once the reply passes validation.
+        
+        Args:
+            kwargs: Arguments for runner.run (input, model, response_format)
+            phase: Phase number used for logging
+            use_cache: Read and write the cache for this call
+            refresh_cache: Skip the cached entry but store the fresh response
+            stream_key: Top-level array whose elements are passed to on_item
+            on_item: Callback for each streamed array element
+            pending_cache: Collects (key, model, output) to store later
+        
+        Returns:
+            The model's final text output
+        """
+        input_tokens = estimate_tokens(kwargs["input"])
+        if self.token_budget and input_tokens > self.token_budget:
+            raise TokenBudgetExceeded(phase, input_tokens, self.token_budget)
+        
+        with span(
+            "llm.call",
+            phase=phase,
+            model=kwargs["model"],
+            streamed=on_item is not None,
+            input_bytes=len(kwargs["input"].encode("utf-8"))
+        ):
+            parser = JSONArrayStream(stream_key) if on_item else None
+            key = None
+            if self.cache and use_cache:
+                key = LLMCache.make_key(
+                    kwargs["model"], kwargs["input"], kwargs.get("response_format")
+                )
+                if not refresh_cache:
+                    cached = self.cache.get(key)
+                    CACHE_REQUESTS.inc("llm", "miss" if cached is None else "hit")
+                    if cached is not None:
+                        self.log(f"LLM cache hit ({key[:12]})", phase=phase)
+                        self._record_tokens(phase, input_tokens, cached, cached=True)
+                        if parser:
+                            for item in parser.feed(cached):
+                                on_item(item)
+                        return cached
+
+            if parser:
+                output = await self._stream_llm(kwargs, phase, parser, on_item)
+            else:
+                response = await self.llm.run(kwargs, phase)
+                output = response.final_output
+        
+            self._record_tokens(phase, input_tokens, output)
+            LLM_TOKENS.inc(kwargs["model"], "input", amount=input_tokens)
+            LLM_TOKENS.inc(kwargs["model"], "output", amount=estimate_tokens(output or ""))
+
+            # A bad or error reply is not kept, so it is retried next run
+            if key and _cacheable(output):
+                if pending_cache is not None:
+                    pending_cache.append((key, kwargs["model"], output))
+                else:
+                    self.cache.put(key, kwargs["model"], output)
+
+            return output
+    
+    def _commit_cache(self, pending_cache: List[Tuple[str, str, str]]) -> None:
+        """Store the replies _run_llm held back, once they passed validation."""
+        for key, model, output in pending_cache:
+            self.cache.put(key, model, output)
+        pending_cache.clear()
+
+    def _record_tokens(
+        self,
+        phase: int,
+        input_tokens: int,
+        output: str,
+        cached: bool = False
+    ) -> None:
+        """Accumulate estimated input/output tokens for a phase."""
+        usage = self.token_usage.setdefault(
+            f"phase{phase}",
+            {"input": 0, "output": 0, "calls": 0, "cached_calls": 0}
+        )
+        usage["input"] += input_tokens
+        usage["output"] += estimate_tokens(output or "")
+        usage["calls"] += 1
+        if cached:
+            usage["cached_calls"] += 1
+        current_span().set_many(
+            input_tokens=input_tokens,
+            output_tokens=estimate_tokens(output or ""),
+            output_bytes=len((output or "").encode("utf-8")),
+            cached=int(cached)
+        )
+        self.log(
+            f"Tokens (estimated): {input_tokens} in, {estimate_tokens(output or '')} out",
+            phase=phase
+        )
+
+    async def _stream_llm(
+        self,
+        kwargs: Dict[str, Any],
+        phase: int,
+        parser: JSONArrayStream,
+        on_item: Callable[[Any], None]
+    ) -> str:
+        """Stream a completion, feeding content deltas through parser."""
+        parts = []
+        async for chunk in self.llm.stream(kwargs, phase):
+            choices = getattr(chunk, "choices", None)
+            if not choices:
+                continue
+            content = getattr(choices[0].delta, "content", None)
+            if not content:
+                continue
+            parts.append(content)
+            for item in parser.feed(content):
+                on_item(item)
+        
+        return "".join(parts)
+
+    def _progress(
+        self,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]],
+        phase: int,
+        event: str,
+        **data: Any
+    ) -> None:
+        """Send a progress event to the caller's callback, if any."""
+        if on_progress:
+            on_progress({"phase": phase, "event": event, **data})
+    
+    @contextmanager
+    def _phase(
+        self,
+        phase: int,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]]
+    ):
+        """Trace span plus phase_start / phase_finish (or phase_error) progress events."""
+        self._progress(on_progress, phase, "phase_start")
+        start = time.perf_counter()
+        with span(f"phase{phase}", phase=phase) as phase_span:
+            try:
+                yield phase_span
+            except BaseException as e:
+                self._progress(
+                    on_progress, phase, "phase_error",
+                    duration_ms=round((time.perf_counter() - start) * 1000, 2),
+                    error=str(e) or type(e).__name__
+                )
+                PHASE_ERRORS.inc(str(phase))
+                raise
+        elapsed = time.perf_counter() - start
+        PHASE_DURATION.observe(elapsed, str(phase))
+        self._progress(
+            on_progress, phase, "phase_finish",
+            duration_ms=round(elapsed * 1000, 2)
+        )
     
     async def generate_schematic(
         self,
         user_prompt: str,
         directory_path: str,
         model: str = "openai/gpt-5.2",
-        selected_components: List[Dict[str, Any]] = None
+        selected_components: List[Dict[str, Any]] = None,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        filter_mode: str = "auto",
+        stream: bool = False,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        netlist_mode: str = "auto",
+        request_id: Optional[str] = None,
+        job_id: Optional[str] = None,
+        speculative_phase1: Optional[Awaitable[Dict[str, Any]]] = None,
+        resume: bool = False,
+        from_phase: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Run complete workflow from user prompt to netlist generation.
@@ -131,158 +644,507 @@ class PCBAgent:
             directory_path: Directory containing .kicad_sch file
             model: LLM model to use (default: Claude Sonnet)
             selected_components: Pre-selected components (skips Phase 0 if provided)
+            use_cache: Reuse cached LLM responses for identical prompts
+            refresh_cache: Ignore cached responses and overwrite them
+            filter_mode: Phase 0 strategy - "auto", "local" or "llm"
+            stream: Stream Phases 1 and 5, placing each symbol (Phases 2-3) and
+                drawing each net (Phase 6) as soon as the model emits it
+            on_progress: Callback receiving {"phase", "event", ...} dicts at each
+                phase start / finish (with duration_ms) and, while streaming,
+                for each symbol placed / net drawn
+            netlist_mode: Phase 5 strategy - "auto", "single" or "sharded"
+                (one concurrent LLM call per subsystem, merged afterwards)
+            request_id: ID attached to every log record of this run
+                (default: a new random ID, returned in the result)
+            job_id: Workspace ID; artifacts are written to
+                workspace_root/<job_id>/ (default: the request ID)
+            speculative_phase1: Phase 1 output already being computed for the
+                same prompt and components (awaitable or concurrent Future,
+                see speculation.py); Phase 1 is run normally if it fails
+            resume: Load the output of Phases 0, 1 and 5 from a checkpoint
+                when their inputs (prompt, model, allowlist, libraries and
+                upstream outputs) are unchanged since an earlier run
+            from_phase: Re-run this phase and every phase downstream of it,
+                resuming the others (implies resume)
         
         Returns:
-            Dictionary with status, components, nets, and file paths
-        """
-        # Find .kicad_sch file in directory_path
-        dir_path = Path(directory_path)
-        sch_files = list(dir_path.glob("*.kicad_sch"))
-        
-        if not sch_files:
-            raise FileNotFoundError(f"No .kicad_sch file found in {directory_path}")
+            Dictionary with status, job_id, components, nets, file paths,
+            "resumed_phases" (loaded from checkpoints) and a "trace" timing
+            breakdown (per phase, LLM calls, library reads, file writes)
         
-        sch_path = sch_files[0]  # Use first .kicad_sch file found
-        self.log(f"Found schematic file: {sch_path}")
-        
-        clear_schematic(sch_path)
-        try:
-            # ============================================================
-            # STAGE 0: Component Filtering (Fast LLM)
-            # ============================================================
-            if selected_components:
-                # Use provided components, skip Phase 0
-                self.log("Using pre-selected components (skipping Phase 0)", phase=0)
-                filtered_allowlist = selected_components
-                self.log(f"Using {len(filtered_allowlist)} pre-selected components", phase=0)
-            else:
-                # Run Phase 0: filter components
-                self.log("Pre-filtering components from allowlist", phase=0)
-                filtered_allowlist = await self._stage0_filter_components(
-                    user_prompt
-                )
-                self.log(
-                    f"Filtered to {len(filtered_allowlist)} relevant components "
-                    f"(from {self._get_total_components()} total)",
-                    phase=0
-                )
-                self._write_output(filtered_allowlist, "out/phase0_output.json", "Wrote output of phase 0 to out/phase0.json")
+        Raises:
+            ValueError: If from_phase is not a phase (0-6)
+        """
+        reuse = reusable_phases(resume, from_phase)
+        resumed: List[int] = []
+        self.token_usage = {}
+        request_id = request_id or new_request_id()
+        job_id = job_id or request_id
+        tracer = Tracer(attributes={"model": model, "stream": stream})
+        with (
+            log_context(request_id, job_id),
+            workspace_in_use(job_id),
+            tracer.activate(),
+            span("generate_schematic", model=model, request_id=request_id) as root
+        ):
+            # Find .kicad_sch file in directory_path
+            dir_path = Path(directory_path)
+            sch_files = list(dir_path.glob("*.kicad_sch"))
+            
+            if not sch_files:
+                raise FileNotFoundError(f"No .kicad_sch file found in {directory_path}")
             
-            # ============================================================
-            # PHASE 1: Component Selection (LLM with filtered list)
-            # ============================================================
-            self.log("Starting component selection with filtered list", phase=1)
-            llm_output1 = await self._phase1_component_selection(
-                user_prompt, model, filtered_allowlist
+            sch_path = sch_files[0]  # Use first .kicad_sch file found
+            self.log(f"Found schematic file: {sch_path}")
+            
+            clear_schematic(sch_path)
+            
+            # Per-job artifact directory, so concurrent runs never collide.
+            # Running jobs and unclaimed speculations keep their workspaces.
+            prune_workspaces(
+                self.workspace_root, self.workspace_max_age, self.workspace_max_jobs,
+                keep=[job_id, *workspaces_in_use(), *get_speculations().ids()]
             )
+            if self.checkpoints:
+                self.checkpoints.prune()
+            workspace = JobWorkspace.create(
+                job_id, self.workspace_root,
+                meta={"request_id": request_id, "model": model, "prompt": user_prompt}
+            )
+            artifacts = self.artifact_sink(workspace)
+            if artifacts.enabled():
+                self.log(f"Writing artifacts to {workspace.dir}")
+            # Schematic writes of streamed symbols and nets, off the event loop
+            worker = _SerialWorker()
+            try:
+                # ============================================================
+                # STAGE 0: Component Filtering (Fast LLM)
+                # ============================================================
+                with self._phase(0, on_progress):
+                    if selected_components:
+                        # Use provided components, skip Phase 0
+                        self.log("Using pre-selected components (skipping Phase 0)", phase=0)
+                        filtered_allowlist = selected_components
+                        self.log(f"Using {len(filtered_allowlist)} pre-selected components", phase=0)
+                    else:
+                        key0 = self._phase0_key(user_prompt, filter_mode)
+                        checkpoint = await self._load_checkpoint(0, key0, reuse, resumed, on_progress)
+                        if checkpoint is not None:
+                            filtered_allowlist = checkpoint["components"]
+                        else:
+                            # Run Phase 0: filter components
+                            self.log("Pre-filtering components from allowlist", phase=0)
+                            filtered_allowlist = await self._stage0_filter_components(
+                                user_prompt,
+                                use_cache=use_cache,
+                                refresh_cache=refresh_cache,
+                                mode=filter_mode
+                            )
+                            self._save_checkpoint(0, key0, {"components": filtered_allowlist})
+                        self.log(
+                            f"Filtered to {len(filtered_allowlist)} relevant components "
+                            f"(from {self._get_total_components()} total)",
+                            phase=0
+                        )
+                        self._save(artifacts, "phase0_output.json", filtered_allowlist, phase=0)
             
-            # Save llm_output1.json
-            output1_path = Path("out/llm_output1.json")
-            with output1_path.open("w", encoding="utf-8") as f:
-                json.dump(llm_output1, f, indent=2)
-            self.log(f"Saved {output1_path}", phase=1)
+                # ============================================================
+                # PHASE 1: Component Selection (LLM with filtered list)
+                # ============================================================
+                with self._phase(1, on_progress):
+                    self.log("Starting component selection with filtered list", phase=1)
+                    allowlist = self.allowlist
+                    arrived = []
+                    streamed_symbols: Dict[int, Dict[str, Any]] = {}
+                    streamed_pins: Dict[int, PinTable] = {}
+                    placer = (
+                        IncrementalPlacer(self.symbol_lib, allowlist.canvas)
+                        if self.placement == "local" and stream else None
+                    )
+                    # Cells taken for held-back symbols, reused on every repair round
+                    placed_at: Dict[int, Dict[str, Any]] = {}
+                    
+                    def assign_positions(output: Dict[str, Any]) -> Dict[str, Any]:
+                        # Local placement: the model only picked parts
+                        symbols = [s for s in output.get("symbols", []) if isinstance(s, dict)]
+                        if not stream:
+                            positions = layout_components(symbols, self.symbol_lib, allowlist.canvas)
+                            for symbol, at in zip(symbols, positions):
+                                symbol["at"] = at
+                            return output
+                        for i, symbol in enumerate(output.get("symbols", [])):
+                            if i in streamed_symbols:
+                                symbol["at"] = streamed_symbols[i]["at"]
+                            elif isinstance(symbol, dict):
+                                if i not in placed_at:
+                                    placed_at[i] = placer.place(symbol)
+                                symbol["at"] = dict(placed_at[i])
+                        return output
+                    
+                    def write_symbol(symbol: Dict[str, Any]) -> PinTable:
+                        place_from_llm_output(sch_path, self.symbol_lib, {"symbols": [symbol]})
+                        return read_pin_table(self.symbol_lib, symbol)
+                    
+                    def place_streamed(index: int, symbol: Dict[str, Any]) -> None:
+                        # Accepted now, so later symbols are checked against it;
+                        # the file is written in order on the worker thread
+                        streamed_symbols[index] = symbol
+                        
+                        def placed(pins: PinTable) -> None:
+                            streamed_pins[index] = pins
+                            self._progress(
+                                on_progress, 2, "symbol_placed",
+                                ref_des=symbol.get("ref_des"), count=len(streamed_pins)
+                            )
+                        
+                        worker.submit(write_symbol, symbol, then=placed)
             
-            # ============================================================
-            # PHASE 2: Component Placement (Python)
-            # ============================================================
-            self.log("Placing components in schematic", phase=2)
-            place_from_llm_output(sch_path, self.symbol_lib, llm_output1)
-            self.log(f"Components placed in {sch_path}", phase=2)
+                    def on_symbol(symbol: Any) -> None:
+                        # Phases 2 + 3 for one symbol while the model keeps generating;
+                        # symbols that fail validation wait for the repair step
+                        index = len(arrived)
+                        arrived.append(symbol)
+                        if placer is not None and isinstance(symbol, dict):
+                            symbol["at"] = placer.peek(symbol)
+                        issues = check_symbol(symbol, index, allowlist)
+                        if not issues:
+                            issues = check_against_placed(symbol, index, streamed_symbols.values())
+                        if issues:
+                            self.log(
+                                f"Holding back {issues[0]['ref']} for repair: {issues[0]['message']}",
+                                phase=1, level="warning"
+                            )
+                            return
+                        if placer is not None:
+                            placer.place(symbol)
+                        place_streamed(index, symbol)
+                        self.log(f"Placing {symbol.get('ref_des')} while streaming", phase=2)
             
-            # ============================================================
-            # PHASE 3: Pin Mapping (Python)
-            # ============================================================
-            self.log("Extracting pin information from libraries", phase=3)
-            llm_output1_with_pins = add_pin_outs(self.symbol_lib, llm_output1)
+                    key1 = self._phase1_key(user_prompt, model, filtered_allowlist, stream)
+                    checkpoint = await self._load_checkpoint(1, key1, reuse, resumed, on_progress)
+                    if checkpoint is not None:
+                        # Validated and positioned; Phase 2 places every symbol
+                        llm_output1, phase1_issues = checkpoint["output"], checkpoint["issues"]
+                    else:
+                        # Stored in the LLM cache once the plan passes validation
+                        pending_cache: List[Tuple[str, str, str]] = []
+                        llm_output1 = await self._await_speculation(speculative_phase1)
+                        if llm_output1 is not None:
+                            self.log("Reusing speculative Phase 1 result", phase=1)
+                            if stream:
+                                for symbol in llm_output1.get("symbols", []):
+                                    on_symbol(symbol)
+                        else:
+                            llm_output1 = await self._phase1_component_selection(
+                                user_prompt, model, filtered_allowlist,
+                                use_cache=use_cache, refresh_cache=refresh_cache,
+                                on_symbol=on_symbol if stream else None,
+                                artifacts=artifacts, pending_cache=pending_cache
+                            )
+                        llm_output1, phase1_issues = await self._validate_components(
+                            llm_output1, filtered_allowlist, model,
+                            use_cache=use_cache, refresh_cache=refresh_cache,
+                            place=assign_positions if self.placement == "local" else None,
+                            locked=set(streamed_symbols), pending_cache=pending_cache
+                        )
+                        self._save_checkpoint(1, key1, {"output": llm_output1, "issues": phase1_issues})
             
-            # Save llm_output1_with_pins.json
-            output1_pins_path = Path("out/llm_output1_with_pins.json")
-            with output1_pins_path.open("w", encoding="utf-8") as f:
-                json.dump(llm_output1_with_pins, f, indent=2)
-            self.log(f"Saved {output1_pins_path}", phase=3)
+                    output1_path = self._save(artifacts, "llm_output1.json", llm_output1, ESSENTIAL, phase=1)
             
-            # ============================================================
-            # PHASE 4: Prompt Generation (Python)
-            # ============================================================
-            self.log("Generating prompt for netlist LLM", phase=4)
-            prompt2_path = self._phase4_generate_prompt(llm_output1_with_pins)
-            self.log(f"Saved {prompt2_path}", phase=4)
+                # ============================================================
+                # PHASE 2: Component Placement (Python)
+                # ============================================================
+                with self._phase(2, on_progress):
+                    if stream:
+                        # Placed symbol by symbol during Phase 1; place repaired ones now
+                        for i, symbol in enumerate(llm_output1["symbols"]):
+                            if i not in streamed_symbols:
+                                place_streamed(i, symbol)
+                        await worker.join()
+                        self.log(f"{len(streamed_symbols)} components placed in {sch_path}", phase=2)
+                    else:
+                        self.log("Placing components in schematic", phase=2)
+                        # File and library work runs off the event loop
+                        await asyncio.to_thread(
+                            place_from_llm_output, sch_path, self.symbol_lib, llm_output1
+                        )
+                        self.log(f"Components placed in {sch_path}", phase=2)
             
-            # ============================================================
-            # PHASE 5: Netlist Generation (LLM)
-            # ============================================================
-            self.log("Generating netlist connections", phase=5)
-            llm_output2 = await self._phase5_netlist_generation(
-                prompt2_path, model
-            )
+                # ============================================================
+                # PHASE 3: Pin Mapping (Python)
+                # ============================================================
+                with self._phase(3, on_progress):
+                    if stream:
+                        placed = sorted(streamed_symbols)
+                        design = Design.from_dict(
+                            {**llm_output1, "symbols": [streamed_symbols[i] for i in placed]},
+                            [streamed_pins[i] for i in placed]
+                        )
+                    else:
+                        self.log("Extracting pin information from libraries", phase=3)
+                        design = await asyncio.to_thread(
+                            load_design, self.symbol_lib, llm_output1
+                        )
             
-            # Save llm_output2.json
-            output2_path = Path("out/llm_output2.json")
-            with output2_path.open("w", encoding="utf-8") as f:
-                json.dump(llm_output2, f, indent=2)
-            self.log(f"Saved {output2_path}", phase=5)
+                    output1_pins_path = self._save(
+                        artifacts, "llm_output1_with_pins.json", design, ESSENTIAL, phase=3
+                    )
             
-            # ============================================================
-            # PHASE 6: Wire Drawing (Python)
-            # ============================================================
-            self.log("Drawing wires between pins", phase=6)
-            self._phase6_draw_wires(sch_path, llm_output1_with_pins, llm_output2)
-            self.log(f"Wires drawn in {sch_path}", phase=6)
+                # ============================================================
+                # PHASE 4: Prompt Generation (Python)
+                # ============================================================
+                with self._phase(4, on_progress):
+                    self.log("Generating prompt for netlist LLM", phase=4)
+                    # Prompts are passed on in memory; the files are only the debug trail
+                    prompt2 = self._phase4_generate_prompt(design)
+                    prompt2_path = self._save(artifacts, "prompt2.txt", prompt2, phase=4)
             
-            # ============================================================
-            # COMPLETE - Return results
-            # ============================================================
-            self.log("Workflow complete! All 6 phases finished.")
+                    shards = self._plan_netlist_shards(design, prompt2, netlist_mode)
+                    shard_prompts = []
+                    shard_prompt_paths = []
+                    if shards:
+                        shard_prompts = self._phase4_generate_shard_prompts(design, shards)
+                        shard_prompt_paths = [
+                            self._save(artifacts, f"prompt2_{shard['name']}.txt", prompt, phase=4)
+                            for shard, prompt in zip(shards, shard_prompts)
+                        ]
+                        self.log(
+                            f"Split netlist into {len(shards)} shards: "
+                            + ", ".join(shard["name"] for shard in shards),
+                            phase=4
+                        )
             
-            return {
-                "status": "success",
-                "phases_completed": 6,
-                "components": llm_output1_with_pins.get("symbols", []),
-                "nets": llm_output2.get("nets", []),
-                "files": {
-                    "schematic": str(sch_path),
-                    "output1": str(output1_path),
-                    "output1_with_pins": str(output1_pins_path),
-                    "prompt2": str(prompt2_path),
-                    "output2": str(output2_path)
-                },
-                "message": "Complete schematic generated with components and wires!"
-            }
+                # ============================================================
+                # PHASE 5: Netlist Generation (LLM)
+                # ============================================================
+                with self._phase(5, on_progress):
+                    self.log("Generating netlist connections", phase=5)
+                    pins = pin_table(design)
+                    pin_owners = {}
+                    drawn_nets: Dict[str, List[Dict[str, Any]]] = {}
+                    
+                    def draw_streamed(net: Dict[str, Any]) -> None:
+                        # Draw only connections not yet on the schematic, joined to
+                        # the net's existing anchor pin if part of it is drawn
+                        done = drawn_nets.setdefault(net["name"], [])
+                        seen = {(str(c["ref"]), str(c["pin"])) for c in done}
+                        new = [c for c in net["connections"] if (str(c["ref"]), str(c["pin"])) not in seen]
+                        if not new:
+                            return
+                        piece = {"nets": [{"name": net["name"], "connections": done[:1] + new}]}
+                        done.extend(new)
+                        count = len(drawn_nets)
+                        worker.submit(
+                            draw_nets, sch_path, design, piece,
+                            then=lambda _: self._progress(
+                                on_progress, 6, "net_drawn", name=net["name"], count=count
+                            )
+                        )
             
-        except Exception as e:
-            self.log(f"Error: {str(e)}")
-            return {
-                "status": "error",
-                "error": str(e),
-                "message": "Workflow failed. Check logs for details."
-            }
+                    def on_net(net: Any) -> None:
+                        # Phase 6 for one net while the model keeps generating;
+                        # nets that fail validation wait for the repair step
+                        if check_net(net, len(drawn_nets), pins, pin_owners):
+                            self.log(f"Holding back net {net.get('name')} for repair", phase=5, level="warning")
+                            return
+                        claim_pins(net, pin_owners)
+                        draw_streamed(net)
+            
+                    # Sharded nets are drawn after merging: a net split across shards
+                    # may only be connected once its pieces are unified
+                    nets_streamed = stream and not shards
+                    net_conflicts = []
+                    # The prompts carry the components, pin names and instructions
+                    key5 = phase_key(
+                        5, prompts=shard_prompts or [prompt2], model=model,
+                        repair_rounds=self.max_repair_rounds
+                    )
+                    checkpoint = await self._load_checkpoint(5, key5, reuse, resumed, on_progress)
+                    if checkpoint is not None:
+                        # Validated; Phase 6 draws every net
+                        llm_output2 = checkpoint["output"]
+                        net_conflicts, phase5_issues = checkpoint["conflicts"], checkpoint["issues"]
+                    else:
+                        # Stored in the LLM cache once the netlist passes validation
+                        pending_cache = []
+                        if shards:
+                            llm_output2, net_conflicts = await self._phase5_sharded_netlist_generation(
+                                shards, shard_prompts, model,
+                                use_cache=use_cache, refresh_cache=refresh_cache,
+                                pending_cache=pending_cache
+                            )
+                        else:
+                            llm_output2 = await self._phase5_netlist_generation(
+                                prompt2, model,
+                                use_cache=use_cache, refresh_cache=refresh_cache,
+                                on_net=on_net if nets_streamed else None,
+                                pending_cache=pending_cache
+                            )
+                        llm_output2, phase5_issues = await self._validate_netlist(
+                            llm_output2, design, model,
+                            use_cache=use_cache, refresh_cache=refresh_cache,
+                            pending_cache=pending_cache
+                        )
+                        self._save_checkpoint(5, key5, {
+                            "output": llm_output2, "conflicts": net_conflicts, "issues": phase5_issues
+                        })
+            
+                    output2_path = self._save(artifacts, "llm_output2.json", llm_output2, ESSENTIAL, phase=5)
+            
+                # ============================================================
+                # PHASE 6: Wire Drawing (Python)
+                # ============================================================
+                with self._phase(6, on_progress):
+                    if nets_streamed:
+                        # Drawn net by net during Phase 5; draw repaired connections now
+                        for net in llm_output2["nets"]:
+                            draw_streamed(net)
+                        await worker.join()
+                        self.log(f"{len(drawn_nets)} nets drawn in {sch_path} while streaming", phase=6)
+                    else:
+                        self.log("Drawing wires between pins", phase=6)
+                        await asyncio.to_thread(
+                            self._phase6_draw_wires, sch_path, design, llm_output2
+                        )
+                        self.log(f"Wires drawn in {sch_path}", phase=6)
+            
+                # ============================================================
+                # COMPLETE - Return results
+                # ============================================================
+                self.log("Workflow complete! All 6 phases finished.")
+            
+                result = {
+                    "status": "success",
+                    "request_id": request_id,
+                    "job_id": workspace.job_id,
+                    "phases_completed": 6,
+                    "components": [s.to_dict() for s in design.symbols],
+                    "nets": llm_output2.get("nets", []),
+                    "files": {
+                        "workspace": str(workspace.dir),
+                        "schematic": str(sch_path),
+                        "output1": _path_str(output1_path),
+                        "output1_with_pins": _path_str(output1_pins_path),
+                        "prompt2": _path_str(prompt2_path),
+                        "prompt2_shards": [str(p) for p in shard_prompt_paths if p],
+                        "output2": _path_str(output2_path)
+                    },
+                    "netlist_shards": [
+                        {"name": shard["name"], "refs": [s.get("ref_des") for s in shard["symbols"]]}
+                        for shard in shards
+                    ],
+                    "net_conflicts": net_conflicts,
+                    "resumed_phases": resumed,
+                    "validation": {"phase1": phase1_issues, "phase5": phase5_issues},
+                    "tokens": self.token_usage,
+                    "cache": self.cache.stats() if self.cache else None,
+                    "message": "Complete schematic generated with components and wires!"
+                }
+            
+            except Exception as e:
+                self.log(f"Error: {str(e)}", level="error")
+                root.set_error(e)
+                result = {
+                    "status": "error",
+                    "request_id": request_id,
+                    "job_id": job_id,
+                    "error": str(e),
+                    "resumed_phases": resumed,
+                    "tokens": self.token_usage,
+                    "message": "Workflow failed. Check logs for details."
+                }
+            finally:
+                await worker.aclose()
+            
+            # Artifacts of a failed run are kept too, for debugging; its
+            # checkpoints let the next run resume
+            write_errors = await artifacts.aflush()
+            if self.checkpoints:
+                write_errors += await self.checkpoints.aflush()
+            for error in write_errors:
+                self.log(f"Warning: Failed to write artifact {error}", level="warning")
+        
+        result["trace"] = self._finish_trace(tracer)
+        return result
+    
+    @property
+    def allowlist(self) -> AllowlistSnapshot:
+        """
+        Indexed allowlist, loaded once per process and reloaded when the file changes.
+        
+        With use_catalog, it is merged with the symbol catalog of symbol_lib.
+        """
+        allowlist = get_allowlist(self.allow_list_path)
+        if self.use_catalog:
+            return get_catalog(self.symbol_lib).snapshot().merged(allowlist)
+        return allowlist
     
     def _get_total_components(self) -> int:
         """Get total number of components in allowlist."""
-        with self.allow_list_path.open("r", encoding="utf-8") as f:
-            allow_list_data = json.load(f)
-        return len(allow_list_data.get("allowlist", []))
+        return len(self.allowlist)
     
     async def _stage0_filter_components(
         self,
         user_prompt: str,
-        filter_model: str = "openai/gpt-4o"
+        filter_model: str = "openai/gpt-4o",
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        mode: str = "auto"
     ) -> List[Dict[str, Any]]:
         """
-        Stage 0: Pre-filter components using fast LLM.
+        Stage 0: Pre-filter components using local ranking and/or a fast LLM.
+        
+        In "auto" mode, allowlists up to local_filter_max entries are filtered
+        locally with BM25 keyword ranking. Larger allowlists are ranked locally
+        first and only the top candidates are sent to the filter LLM.
         
         Args:
             user_prompt: User's circuit description
             filter_model: Fast model for filtering (default: gpt-4o-mini)
+            use_cache: Reuse a cached response for an identical prompt
+            refresh_cache: Ignore any cached response and overwrite it
+            mode: "auto", "local" (never call the LLM) or "llm" (full allowlist to LLM)
         
         Returns:
             Filtered list of relevant components
         """
         # Load full allowlist
-        with self.allow_list_path.open("r", encoding="utf-8") as f:
-            allow_list_data = json.load(f)
+        allowlist = self.allowlist
+        full_allowlist = allowlist.entries
+        
+        if mode not in ("auto", "local", "llm"):
+            raise ValueError(f"Unknown Phase 0 filter mode: {mode}")
+        
+        # Small allowlists: local ranking is good enough, skip the LLM
+        small = len(full_allowlist) <= self.local_filter_max
+        if mode == "local" or (mode == "auto" and small):
+            selected = select_components(
+                user_prompt, full_allowlist, top_k=None if small else self.prefilter_top_k,
+                index=allowlist.search_index
+            )
+            component_names = [c.get("symbol", "?") for c in selected]
+            self.log(f"Selected components locally: {', '.join(component_names)}", phase=0)
+            return selected
         
-        full_allowlist = allow_list_data.get("allowlist", [])
+        # Large allowlists: shrink the LLM prompt to the top-ranked candidates
+        candidates = full_allowlist
+        if mode == "auto":
+            ranked = select_components(
+                user_prompt, full_allowlist, top_k=self.prefilter_top_k,
+                index=allowlist.search_index
+            )
+            # Rule-only results (power, passives) mean nothing matched; keep
+            # everything curated (the catalog is too large to send whole)
+            if any(c["explanation"].startswith("Matched") for c in ranked):
+                candidates = [
+                    {k: v for k, v in c.items() if k != "explanation"} for c in ranked
+                ]
+                self.log(
+                    f"Pre-filtered {len(full_allowlist)} -> {len(candidates)} candidates",
+                    phase=0
+                )
+            elif self.use_catalog:
+                candidates = get_allowlist(self.allow_list_path).entries
         
         # Build filtering prompt
         filter_prompt = f"""You are a component selector for PCB design.
@@ -291,8 +1153,8 @@ Task: Select ONLY the components needed for this circuit from the allowlist.
 
 User Request: "{user_prompt}"
 
-Available Components:
-{json.dumps(full_allowlist, indent=2)}
+Available Components ({TABLE_NOTE}):
+{compact_json(encode_table(candidates))}
 
 Instructions:
 1. Analyze the user request carefully
@@ -322,16 +1184,21 @@ Rules:
         if filter_model.startswith("openai/"):
             kwargs["response_format"] = {"type": "json_object"}
         
-        response = await self.runner.run(**kwargs)
+        output = await self._run_llm(
+            kwargs, phase=0, use_cache=use_cache, refresh_cache=refresh_cache
+        )
         
         # Parse response
         try:
-            result = json.loads(response.final_output)
+            result = json.loads(output)
             selected = result.get("selected", [])
             
             if not selected:
-                self.log("Warning: No components selected, using full allowlist", phase=0)
-                return full_allowlist
+                self.log(
+                    "Warning: No components selected, using all candidates",
+                    phase=0, level="warning"
+                )
+                return candidates
             
             # Log filtered components
             component_names = [c.get("symbol", "?") for c in selected]
@@ -340,14 +1207,45 @@ Rules:
             return selected
             
         except json.JSONDecodeError as e:
-            self.log(f"Warning: Filter LLM returned invalid JSON, using full allowlist", phase=0)
-            return full_allowlist
+            self.log(
+                "Warning: Filter LLM returned invalid JSON, using all candidates",
+                phase=0, level="warning"
+            )
+            return candidates
+    
+    async def _await_speculation(
+        self,
+        speculation: Optional[Awaitable[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Result of a speculative Phase 1 run, or None if absent, failed or cancelled."""
+        if speculation is None:
+            return None
+        source = speculation
+        if isinstance(speculation, concurrent.futures.Future):
+            speculation = asyncio.wrap_future(speculation)
+        try:
+            with span("phase1.speculation"):
+                # Shielded, so cancelling this run leaves the speculation alone
+                return copy.deepcopy(await asyncio.shield(speculation))
+        except asyncio.CancelledError:
+            # Only swallow the speculation's own cancellation, not this task's
+            if not getattr(source, "cancelled", lambda: False)():
+                raise
+            self.log("Speculative Phase 1 was cancelled, running it now", phase=1, level="warning")
+        except Exception as e:
+            self.log(f"Speculative Phase 1 failed ({e}), running it now", phase=1, level="warning")
+        return None
     
     async def _phase1_component_selection(
         self,
         user_prompt: str,
         model: str,
-        filtered_allowlist: List[Dict[str, Any]] = None
+        filtered_allowlist: List[Dict[str, Any]] = None,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        on_symbol: Optional[Callable[[Dict[str, Any]], None]] = None,
+        artifacts: Optional[ArtifactSink] = None,
+        pending_cache: Optional[List[Tuple[str, str, str]]] = None
     ) -> Dict[str, Any]:
         """
         Phase 1: LLM selects components from filtered allowlist.
@@ -356,35 +1254,50 @@ Rules:
             user_prompt: User's circuit description
             model: LLM model to use
             filtered_allowlist: Pre-filtered component list
+            use_cache: Reuse a cached response for an identical prompt
+            refresh_cache: Ignore any cached response and overwrite it
+            on_symbol: Stream the response, calling this with each symbol as it arrives
+            artifacts: Where the prompt is saved (default: out/)
+            pending_cache: Hold the reply back from the cache (see _run_llm)
         
         Returns:
             Component list JSON (llm_output1)
         """
         # Load allowlist
-        with self.allow_list_path.open("r", encoding="utf-8") as f:
-            allow_list_data = json.load(f)
+        allowlist = self.allowlist
         
-        # Load prompt1 instructions
-        with self.prompt1_path.open("r", encoding="utf-8") as f:
+        # Load prompt1 instructions (selection only when placement is local)
+        prompt_path = self.prompt1_selection_path if self.placement == "local" else self.prompt1_path
+        with prompt_path.open("r", encoding="utf-8") as f:
             prompt1_template = f.read()
 
-        allowed_keys = { (item["lib"], item["symbol"]) for item in filtered_allowlist }
-        filtered_allowlist = [ item for item in allow_list_data["allowlist"] if (item.get("lib"), item.get("symbol")) in allowed_keys ]
+        resolved = allowlist.resolve(filtered_allowlist)
+        known = {entry_key(entry) for entry in resolved}
+        dropped = [item for item in filtered_allowlist if entry_key(item) not in known]
+        if dropped:
+            hint = "" if self.use_catalog else " (catalog parts need use_catalog / PCB_AGENT_CATALOG=1)"
+            self.log(
+                f"Warning: Ignoring {len(dropped)} selected components not in the allowlist{hint}: "
+                + ", ".join(f"{item.get('lib')}:{item.get('symbol')}" for item in dropped),
+                phase=1, level="warning"
+            )
+        filtered_allowlist = [strip_search_fields(item) for item in resolved]
         
         # Build complete prompt with filtered allowlist
         input_data = {
-            "allowlist": filtered_allowlist,
-            "canvas": allow_list_data.get("canvas", {}),
+            "allowlist": encode_table(filtered_allowlist),
+            "canvas": allowlist.canvas,
             "request": user_prompt
         }
         
         full_prompt = (
             prompt1_template.rstrip()
+            + "\n\n" + TABLE_NOTE
             + "\n\nINPUT:\n"
-            + json.dumps(input_data, indent=2)
+            + compact_json(input_data)
         )
 
-        self._write_output(full_prompt, "out/phase1_input.json", "Wrote phase 1 input to out/phase1_input.json")
+        self._save(artifacts or self.artifact_sink(), "phase1_input.json", full_prompt, phase=1)
         
         self.log(f"Calling LLM for component selection (model: {model})", phase=1)
         
@@ -394,11 +1307,14 @@ Rules:
         if model.startswith("openai/"):
             kwargs["response_format"] = {"type": "json_object"}
         
-        response = await self.runner.run(**kwargs)
+        output = await self._run_llm(
+            kwargs, phase=1, use_cache=use_cache, refresh_cache=refresh_cache,
+            stream_key="symbols", on_item=on_symbol, pending_cache=pending_cache
+        )
         
         # Parse JSON response
         try:
-            result = json.loads(response.final_output)
+            result = json.loads(output)
             
             # Check for error response
             if "error" in result:
@@ -412,84 +1328,288 @@ Rules:
         except json.JSONDecodeError as e:
             raise ValueError(f"LLM returned invalid JSON: {e}")
     
+    async def _validate_components(
+        self,
+        llm_output1: Dict[str, Any],
+        filtered_allowlist: List[Dict[str, Any]],
+        model: str,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        place: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        locked: Collection[int] = (),
+        pending_cache: Optional[List[Tuple[str, str, str]]] = None
+    ) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Validate the Phase 1 plan, re-asking the model for broken symbols only.
+        
+        Up to max_repair_rounds repair prompts are sent; each returns
+        replacements for the failing symbols, which are patched in place.
+        When place is given, it assigns positions before every validation
+        and layout issues are never sent back to the model.
+        
+        Symbols at locked indices (already placed on the schematic while
+        streaming) are never repaired: they are validated first, so conflicts
+        with them are reported on, and repaired in, the other symbol.
+        
+        Replies held back in pending_cache (the Phase 1 reply and the
+        repairs) are stored in the LLM cache only if the plan passes.
+        
+        Returns:
+            (validated llm_output1, remaining warning-level issues)
+        
+        Raises:
+            ValueError: If error-level issues remain after repair
+        """
+        allowlist = self.allowlist
+        
+        def check(output: Dict[str, Any]) -> tuple[Dict[str, Any], List, List]:
+            if place is not None:
+                output = place(output)
+            issues = validate_components(output, allowlist, fixed=locked)
+            repairable = [
+                i for i in issues
+                if i["index"] not in locked and (place is None or i["code"] not in LAYOUT_CODES)
+            ]
+            return output, issues, repairable
+        
+        llm_output1, issues, repairable = check(llm_output1)
+        rounds = 0
+        while (repairable and rounds < self.max_repair_rounds
+               and all(i["index"] >= 0 for i in repairable)):
+            rounds += 1
+            self.log(
+                f"{len(repairable)} validation issues, requesting repair (round {rounds}):\n"
+                + format_issues(repairable),
+                phase=1, level="warning"
+            )
+            llm_output1 = await self._repair_components(
+                llm_output1, repairable, filtered_allowlist, model,
+                use_cache=use_cache, refresh_cache=refresh_cache,
+                pending_cache=pending_cache
+            )
+            llm_output1, issues, repairable = check(llm_output1)
+        
+        if errors(issues):
+            raise ValueError(
+                "Component plan failed validation:\n" + format_issues(errors(issues))
+            )
+        if issues:
+            self.log(
+                f"Continuing with {len(issues)} layout warnings:\n" + format_issues(issues),
+                phase=1, level="warning"
+            )
+        elif rounds:
+            self.log(f"Component plan repaired in {rounds} round(s)", phase=1)
+        if pending_cache:
+            self._commit_cache(pending_cache)
+        return llm_output1, issues
+    
+    async def _repair_components(
+        self,
+        llm_output1: Dict[str, Any],
+        issues: List[Dict[str, Any]],
+        filtered_allowlist: List[Dict[str, Any]],
+        model: str,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        pending_cache: Optional[List[Tuple[str, str, str]]] = None
+    ) -> Dict[str, Any]:
+        """Ask the model to fix only the symbols named in issues and patch them in."""
+        symbols = llm_output1["symbols"]
+        problems: Dict[int, List[str]] = {}
+        for issue in issues:
+            problems.setdefault(issue["index"], []).append(issue["message"])
+        
+        allowlist = self.allowlist
+        candidates = [
+            strip_search_fields(e)
+            for e in (allowlist.resolve(filtered_allowlist) if filtered_allowlist else allowlist.entries)
+        ]
+        others = [
+            {"ref_des": s.get("ref_des"), "at": s.get("at")}
+            for i, s in enumerate(symbols) if i not in problems and isinstance(s, dict)
+        ]
+        broken = [
+            {"index": i, "symbol": symbols[i], "problems": msgs}
+            for i, msgs in sorted(problems.items())
+        ]
+        
+        repair_prompt = f"""You are fixing specific symbols in a KiCad schematic plan.
+
+Some symbols failed validation. Return corrected versions of ONLY those symbols.
+
+Allowed components ({TABLE_NOTE}):
+{compact_json(encode_table(candidates))}
+
+Canvas: {compact_json(allowlist.canvas)}
+
+Other symbols in the plan (keep them; do not reuse their ref_des or positions):
+{compact_json(others)}
+
+Symbols to fix, with their problems:
+{compact_json(broken)}
+
+Rules:
+- lib, symbol and footprint exactly as in the allowed components
+- ref_des = allowed ref prefix + positive integer, unique in the plan
+- at.x, at.y = integer mm inside the canvas; at.rot in 0, 90, 180, 270
+- No two symbols closer than 30 mm center-to-center
+- Keep each symbol's role (value, explanation) unless it is the problem
+
+Output Format (JSON only):
+{{"symbols": [{{"index": 0, "lib": "...", "symbol": "...", "ref_des": "...", "value": "...", "at": {{"x": 0, "y": 0, "rot": 0}}, "footprint": "...", "explanation": "..."}}]}}
+"""
+        kwargs = {"input": repair_prompt, "model": model}
+        if model.startswith("openai/"):
+            kwargs["response_format"] = {"type": "json_object"}
+        
+        output = await self._run_llm(
+            kwargs, phase=1, use_cache=use_cache, refresh_cache=refresh_cache,
+            pending_cache=pending_cache
+        )
+        try:
+            fixes = json.loads(output).get("symbols", [])
+        except (json.JSONDecodeError, AttributeError):
+            self.log("Warning: Repair response was not valid JSON", phase=1, level="warning")
+            return llm_output1
+        
+        patched = list(symbols)
+        for fix in fixes:
+            index = fix.get("index") if isinstance(fix, dict) else None
+            if index in problems:
+                patched[index] = {k: v for k, v in fix.items() if k != "index"}
+        self.log(f"Patched {len(fixes)} repaired symbols", phase=1)
+        return {**llm_output1, "symbols": patched}
+    
     def _phase4_generate_prompt(
         self,
-        llm_output1_with_pins: Dict[str, Any]
-    ) -> Path:
+        design: Design,
+        extra_instructions: str = ""
+    ) -> str:
         """
-        Phase 4: Generate prompt2.txt for netlist LLM.
+        Phase 4: Generate the netlist LLM prompt (saved as prompt2.txt).
         
         Args:
-            llm_output1_with_pins: Component list with pin data
+            design: Placed components with pin tables
+            extra_instructions: Text appended after the base instructions
         
         Returns:
-            Path to generated prompt2.txt
+            Prompt text
         """
         # Load prompt2 instructions
         with self.prompt2_instructions_path.open("r", encoding="utf-8") as f:
             base_prompt = f.read()
         
         # Simplify pins for LLM (remove coordinates, keep only names)
-        simplified = self._simplify_pins_for_llm(llm_output1_with_pins)
+        simplified = self._simplify_pins_for_llm(design)
         
         # Build complete prompt
         final_prompt = (
             base_prompt.rstrip()
             + "\n\n"
+            + PINS_NOTE
+            + "\n\n"
+            + (extra_instructions + "\n\n" if extra_instructions else "")
             + "Here is the component list JSON:\n\n"
-            + json.dumps(simplified, indent=2)
+            + compact_json(simplified)
             + "\n"
         )
         
-        # Save prompt2.txt
-        prompt2_path = Path("prompt2.txt")
-        prompt2_path.write_text(final_prompt, encoding="utf-8")
+        return final_prompt
+    
+    def _plan_netlist_shards(
+        self,
+        design: Design,
+        prompt2: str,
+        mode: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Decide whether Phase 5 runs as one call or as concurrent shards.
+        
+        "auto" shards when the design has more than shard_threshold non-power
+        symbols, or when the single prompt would exceed token_budget.
+        
+        Returns:
+            Shards to generate (empty list = single call)
+        """
+        if mode not in ("auto", "single", "sharded"):
+            raise ValueError(f"Unknown netlist mode: {mode}")
+        if mode == "single":
+            return []
+        
+        symbols = design.symbols
+        shards = partition_components(symbols)
+        if len(shards) < 2 or mode == "sharded":
+            return shards if len(shards) >= 2 else []
         
-        return prompt2_path
+        non_power = sum(1 for s in symbols if not is_power_symbol(s))
+        prompt_tokens = estimate_tokens(prompt2)
+        if non_power > self.shard_threshold:
+            return shards
+        if self.token_budget and prompt_tokens > self.token_budget:
+            return shards
+        return []
+    
+    def _phase4_generate_shard_prompts(
+        self,
+        design: Design,
+        shards: List[Dict[str, Any]]
+    ) -> List[str]:
+        """
+        Phase 4 (sharded): Generate one netlist prompt per shard.
+        
+        Each prompt lists only the shard's own components with pins, plus the
+        global power net names and a summary of the other shards.
+        
+        Returns:
+            Prompt texts (saved as prompt2_<shard>.txt), in shard order
+        """
+        return [
+            self._phase4_generate_prompt(
+                design.with_symbols(shard["symbols"]),
+                extra_instructions=shard_note(shard, shards)
+            )
+            for shard in shards
+        ]
     
     def _simplify_pins_for_llm(
         self,
-        llm_output: Dict[str, Any]
+        design: Design
     ) -> Dict[str, Any]:
         """
         Simplify pin format for LLM.
         
-        Before: {"1": {"name": "VDD", "pos": [150.5, 100.2, 0]}}
-        After:  {"1": "VDD"}
+        Before: {"1": {"name": "VDD", "pos": [150.5, 100.2, 0]}, "2": {...}}
+        After:  ["VDD", "GND"]  (or {"A1": "GND", ...} when not numbered 1..n)
         
-        LLM doesn't need coordinates for netlist generation.
+        LLM doesn't need coordinates, libraries or footprints for netlist
+        generation. A view over the pin tables; nothing is copied.
         """
-        from copy import deepcopy
-        
-        out = deepcopy(llm_output)
-        for s in out.get("symbols", []):
-            pins = s.get("pins")
-            if isinstance(pins, dict):
-                s["pins"] = {
-                    pin_num: pin_data.get("name", "")
-                    for pin_num, pin_data in pins.items()
-                }
-        return out
+        return design.netlist_view()
     
     async def _phase5_netlist_generation(
         self,
-        prompt2_path: Path,
-        model: str
+        prompt2: str,
+        model: str,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        on_net: Optional[Callable[[Dict[str, Any]], None]] = None,
+        pending_cache: Optional[List[Tuple[str, str, str]]] = None
     ) -> Dict[str, Any]:
         """
         Phase 5: LLM generates netlist connections.
         
         Args:
-            prompt2_path: Path to prompt2.txt
+            prompt2: Netlist prompt from Phase 4
             model: LLM model to use
+            use_cache: Reuse a cached response for an identical prompt
+            refresh_cache: Ignore any cached response and overwrite it
+            on_net: Stream the response, calling this with each net as it arrives
+            pending_cache: Hold the reply back from the cache (see _run_llm)
         
         Returns:
             Netlist JSON (llm_output2)
         """
-        # Load prompt2
-        with prompt2_path.open("r", encoding="utf-8") as f:
-            prompt2 = f.read()
-        
         self.log(f"Calling LLM for netlist generation (model: {model})", phase=5)
         
         # Call LLM via Dedalus
@@ -498,11 +1618,14 @@ Rules:
         if model.startswith("openai/"):
             kwargs["response_format"] = {"type": "json_object"}
         
-        response = await self.runner.run(**kwargs)
+        output = await self._run_llm(
+            kwargs, phase=5, use_cache=use_cache, refresh_cache=refresh_cache,
+            stream_key="nets", on_item=on_net, pending_cache=pending_cache
+        )
         
         # Parse JSON response
         try:
-            result = json.loads(response.final_output)
+            result = json.loads(output)
             
             self.log(f"Generated {len(result.get('nets', []))} nets", phase=5)
             return result
@@ -510,10 +1633,184 @@ Rules:
         except json.JSONDecodeError as e:
             raise ValueError(f"LLM returned invalid JSON: {e}")
     
+    async def _phase5_sharded_netlist_generation(
+        self,
+        shards: List[Dict[str, Any]],
+        prompts: List[str],
+        model: str,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        pending_cache: Optional[List[Tuple[str, str, str]]] = None
+    ) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Phase 5 (sharded): One concurrent LLM call per shard, then merge.
+        
+        At most max_concurrent_shards calls run at once, so wall-clock time
+        tracks the largest shard rather than the sum of all shards.
+        
+        Args:
+            shards: Shards from partition_components
+            prompts: Netlist prompt for each shard
+            model: LLM model to use
+            use_cache: Reuse cached responses for identical prompts
+            refresh_cache: Ignore cached responses and overwrite them
+            pending_cache: Hold the replies back from the cache (see _run_llm)
+        
+        Returns:
+            (merged netlist JSON, pin conflicts found while merging)
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent_shards)
+        
+        async def run_shard(shard: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+            async with semaphore:
+                self.log(f"Generating nets for shard '{shard['name']}'", phase=5)
+                return await self._phase5_netlist_generation(
+                    prompt, model, use_cache=use_cache, refresh_cache=refresh_cache,
+                    pending_cache=pending_cache
+                )
+        
+        outputs = await asyncio.gather(
+            *(run_shard(shard, prompt) for shard, prompt in zip(shards, prompts))
+        )
+        
+        merged, conflicts = merge_netlists(outputs)
+        for c in conflicts:
+            self.log(
+                f"Warning: {c['ref']} pin {c['pin']} is in both '{c['kept_in']}' and "
+                f"'{c['dropped_from']}'; kept in '{c['kept_in']}'",
+                phase=5, level="warning"
+            )
+        self.log(f"Merged {len(shards)} shards into {len(merged['nets'])} nets", phase=5)
+        return merged, conflicts
+    
+    async def _validate_netlist(
+        self,
+        llm_output2: Dict[str, Any],
+        design: Design,
+        model: str,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        pending_cache: Optional[List[Tuple[str, str, str]]] = None
+    ) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Validate the Phase 5 netlist, re-asking the model for broken nets only.
+        
+        Connections still invalid after max_repair_rounds are dropped (and
+        reported) so that wire drawing never fails on an unknown pin.
+        
+        Replies held back in pending_cache (the Phase 5 replies and the
+        repairs) are stored in the LLM cache only if no connection is dropped.
+        
+        Returns:
+            (drawable llm_output2, issues for the connections that were dropped)
+        """
+        issues = validate_netlist(llm_output2, design)
+        rounds = 0
+        while issues and rounds < self.max_repair_rounds and all(i["index"] >= 0 for i in issues):
+            rounds += 1
+            self.log(
+                f"{len(issues)} netlist issues, requesting repair (round {rounds}):\n"
+                + format_issues(issues),
+                phase=5, level="warning"
+            )
+            llm_output2 = await self._repair_netlist(
+                llm_output2, issues, design, model,
+                use_cache=use_cache, refresh_cache=refresh_cache,
+                pending_cache=pending_cache
+            )
+            issues = validate_netlist(llm_output2, design)
+        
+        if not issues:
+            if rounds:
+                self.log(f"Netlist repaired in {rounds} round(s)", phase=5)
+            if pending_cache:
+                self._commit_cache(pending_cache)
+            return llm_output2, []
+        
+        if not isinstance(llm_output2.get("nets"), list):
+            raise ValueError("Netlist failed validation:\n" + format_issues(issues))
+        llm_output2, dropped = prune_invalid_connections(llm_output2, design)
+        self.log(
+            f"Dropped {len(dropped)} invalid connections:\n" + format_issues(dropped),
+            phase=5, level="warning"
+        )
+        return llm_output2, dropped
+    
+    async def _repair_netlist(
+        self,
+        llm_output2: Dict[str, Any],
+        issues: List[Dict[str, Any]],
+        design: Design,
+        model: str,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
+        pending_cache: Optional[List[Tuple[str, str, str]]] = None
+    ) -> Dict[str, Any]:
+        """Ask the model to fix only the nets named in issues and merge them back in."""
+        nets = llm_output2["nets"]
+        problems: Dict[int, List[str]] = {}
+        for issue in issues:
+            problems.setdefault(issue["index"], []).append(issue["message"])
+        
+        valid = [net for i, net in enumerate(nets) if i not in problems]
+        broken = [
+            {"index": i, "net": nets[i], "problems": msgs}
+            for i, msgs in sorted(problems.items())
+        ]
+        
+        repair_prompt = f"""You are fixing specific nets in a schematic netlist.
+
+Some nets failed validation. Return corrected versions of ONLY those nets.
+
+Components ({PINS_NOTE}):
+{compact_json(design.netlist_view())}
+
+Valid nets (keep them; a pin may belong to only one net):
+{compact_json(valid)}
+
+Nets to fix, with their problems:
+{compact_json(broken)}
+
+Rules:
+- Only use refs and pin numbers that exist in the component list
+- To add pins to a valid net, return a net with exactly the same name
+- Drop a connection if no suitable pin exists
+
+Output Format (JSON only):
+{{"nets": [{{"index": 0, "name": "NET_NAME", "connections": [{{"ref": "U1", "pin": 1}}]}}]}}
+"""
+        kwargs = {"input": repair_prompt, "model": model}
+        if model.startswith("openai/"):
+            kwargs["response_format"] = {"type": "json_object"}
+        
+        output = await self._run_llm(
+            kwargs, phase=5, use_cache=use_cache, refresh_cache=refresh_cache,
+            pending_cache=pending_cache
+        )
+        try:
+            fixes = json.loads(output).get("nets", [])
+        except (json.JSONDecodeError, AttributeError):
+            self.log("Warning: Repair response was not valid JSON", phase=5, level="warning")
+            return llm_output2
+        
+        repaired = [
+            {
+                "name": fix.get("name"),
+                "connections": [c for c in fix["connections"] if isinstance(c, dict)]
+            }
+            for fix in fixes
+            if isinstance(fix, dict) and fix.get("index") in problems
+            and isinstance(fix.get("connections"), list)
+        ]
+        # Valid nets first, so their pins win any conflict with a repaired net
+        merged, _ = merge_netlists([{"nets": valid + repaired}])
+        self.log(f"Patched {len(repaired)} repaired nets", phase=5)
+        return {**llm_output2, "nets": merged["nets"]}
+    
     def _phase6_draw_wires(
         self,
         sch_path: Path,
-        llm_output1_with_pins: Dict[str, Any],
+        design: Design,
         llm_output2: Dict[str, Any]
     ):
         """
@@ -521,13 +1818,11 @@ Rules:
         
         Args:
             sch_path: Path to KiCAD schematic file
-            llm_output1_with_pins: Component list with pin coordinates
+            design: Placed components with pin tables
             llm_output2: Netlist with connections
         """
-        from schematic import draw_nets
-        
         # Call the existing draw_nets function from schematic.py
-        draw_nets(sch_path, llm_output1_with_pins, llm_output2)
+        draw_nets(sch_path, design, llm_output2)
         
         # Count wires drawn
         nets_count = len(llm_output2.get("nets", []))
@@ -552,9 +1847,12 @@ async def main():
     parser.add_argument('--schematic', help='Schematic file path or directory')
     parser.add_argument('--output-dir', help='Output directory')
     parser.add_argument('--components-only', action='store_true', help='Only select components, do not generate full schematic')
+    parser.add_argument('--resume', action='store_true', help='Reuse checkpointed phase outputs whose inputs are unchanged')
+    parser.add_argument('--from-phase', type=int, choices=range(7), help='Re-run this phase and everything after it, resuming the rest')
     
     args = parser.parse_args()
     user_prompt = args.prompt
+    load_env()
     
     print(f"🤖 Starting PCB Agent")
     print(f"📝 User prompt: {user_prompt}")
@@ -571,7 +1869,9 @@ async def main():
         if args.components_only:
             result = await agent.select_components_only(user_prompt, directory)
         else:
-            result = await agent.generate_schematic(user_prompt, directory)
+            result = await agent.generate_schematic(
+                user_prompt, directory, resume=args.resume, from_phase=args.from_phase
+            )
         
         print(f"=" * 60)
         
@@ -0,0 +1,210 @@
+"""
+Cursor PCB - Local Placement
+
+Computes symbol positions locally so Phase 1 only has to choose parts.
+Each symbol's body bounding box is measured from its library graphics
+(rectangles, polylines, circles, arcs and pins). Components are grouped by
+subsystem (power tree, MCU core, one group per connector, power symbols)
+and each group is packed as a compact block of grid cells. The blocks are
+then shelf-packed onto the allow_list.json canvas.
+
+Cells are at least min_spacing wide and tall, and anchors sit at cell
+centers, so the 30 mm center-to-center rule holds and bodies never overlap.
+"""
+
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from component_search import is_power_symbol
+from netlist_sharding import partition_components
+from schematic import get_symbol_def
+
+BBox = Tuple[float, float, float, float]
+
+DEFAULT_BBOX: BBox = (-2.54, -2.54, 2.54, 2.54)
+DEFAULT_CANVAS = {"xmin": 30, "ymin": 30, "xmax": 270, "ymax": 170, "grid": 1}
+MIN_SPACING_MM = 30.0
+CLEARANCE_MM = 5.0
+
+_NUM = r"(-?\d+(?:\.\d+)?)"
+_POINT_RE = re.compile(rf"\((?:start|end|xy|center|mid)\s+{_NUM}\s+{_NUM}\s*\)")
+_CIRCLE_RE = re.compile(rf"\(circle\s+\(center\s+{_NUM}\s+{_NUM}\s*\)\s+\(radius\s+{_NUM}\s*\)")
+_PIN_RE = re.compile(
+    rf"\(pin\s+\w+\s+\w+\s+\(at\s+{_NUM}\s+{_NUM}\s+{_NUM}\s*\)\s+\(length\s+{_NUM}\s*\)"
+)
+
+
+def symbol_bbox(symbol_def: str) -> BBox:
+    """
+    Body + pin extent of a library symbol, relative to its anchor.
+
+    Returned in schematic orientation (y grows downward) at rotation 0, as
+    (xmin, ymin, xmax, ymax) in mm.
+    """
+    xs: List[float] = []
+    ys: List[float] = []
+    for m in _POINT_RE.finditer(symbol_def):
+        xs.append(float(m.group(1)))
+        ys.append(float(m.group(2)))
+    for m in _CIRCLE_RE.finditer(symbol_def):
+        cx, cy, r = float(m.group(1)), float(m.group(2)), float(m.group(3))
+        xs += [cx - r, cx + r]
+        ys += [cy - r, cy + r]
+    for m in _PIN_RE.finditer(symbol_def):
+        px, py = float(m.group(1)), float(m.group(2))
+        rot, length = math.radians(float(m.group(3))), float(m.group(4))
+        xs += [px, px + length * math.cos(rot)]
+        ys += [py, py + length * math.sin(rot)]
+    if not xs:
+        return DEFAULT_BBOX
+    # Library y grows upward; flip into schematic coordinates
+    return (min(xs), -max(ys), max(xs), -min(ys))
+
+
+@lru_cache(maxsize=2048)
+def _cached_bbox(lib_path: str, symbol_name: str, mtime_ns: int) -> BBox:
+    return symbol_bbox(get_symbol_def(lib_path, symbol_name))
+
+
+def library_bbox(lib_dir: str | Path, lib: str, symbol_name: str) -> BBox:
+    """Bounding box of lib:symbol_name (cached until the library file changes)."""
+    lib_path = Path(lib_dir) / lib
+    try:
+        return _cached_bbox(str(lib_path), symbol_name, lib_path.stat().st_mtime_ns)
+    except (OSError, ValueError):
+        return DEFAULT_BBOX
+
+
+def _cell_size(bbox: BBox, grid: float, min_spacing: float) -> Tuple[float, float]:
+    """Cell (width, height) around an anchor-centred symbol, in whole grid steps."""
+    half_w = max(abs(bbox[0]), abs(bbox[2])) + CLEARANCE_MM
+    half_h = max(abs(bbox[1]), abs(bbox[3])) + CLEARANCE_MM
+    step = 2 * grid
+    w = math.ceil(max(2 * half_w, min_spacing) / step) * step
+    h = math.ceil(max(2 * half_h, min_spacing) / step) * step
+    return w, h
+
+
+def group_components(symbols: List[Dict[str, Any]]) -> List[Tuple[str, List[int]]]:
+    """
+    Functional groups as (name, symbol indices): the netlist shards (power
+    tree, core, one per connector) followed by the power symbols.
+    """
+    index_of = {id(s): i for i, s in enumerate(symbols)}
+    groups = []
+    for shard in partition_components(symbols):
+        members = [index_of[id(s)] for s in shard["symbols"] if not is_power_symbol(s)]
+        if members:
+            groups.append((shard["name"], members))
+    power = [i for i, s in enumerate(symbols) if is_power_symbol(s)]
+    if power:
+        groups.append(("power_symbols", power))
+    return groups
+
+
+def layout_components(
+    symbols: List[Dict[str, Any]],
+    lib_dir: str | Path,
+    canvas: Optional[Dict[str, Any]] = None,
+    min_spacing: float = MIN_SPACING_MM
+) -> List[Dict[str, Any]]:
+    """
+    Compute an "at" position for every symbol.
+
+    Each functional group is laid out as a near-square block of cells; blocks
+    are shelf-packed left to right, top to bottom across the canvas. A design
+    too large for the canvas continues below it.
+
+    Args:
+        symbols: Phase 1 symbols (lib, symbol, ref_des, ...)
+        lib_dir: KiCad symbol library directory
+        canvas: {"xmin", "ymin", "xmax", "ymax", "grid"} from allow_list.json
+        min_spacing: Minimum center-to-center distance in mm
+
+    Returns:
+        {"x", "y", "rot"} for each symbol, in input order
+    """
+    canvas = {**DEFAULT_CANVAS, **(canvas or {})}
+    grid = canvas.get("grid") or 1
+    width = canvas["xmax"] - canvas["xmin"]
+    cells = [
+        _cell_size(library_bbox(lib_dir, s.get("lib", ""), s.get("symbol", "")), grid, min_spacing)
+        for s in symbols
+    ]
+
+    positions: List[Optional[Dict[str, Any]]] = [None] * len(symbols)
+    shelf_x = shelf_y = shelf_h = 0.0
+    for _, members in group_components(symbols):
+        # Near-square block of rows
+        cols = max(1, math.ceil(math.sqrt(len(members))))
+        rows = [members[i:i + cols] for i in range(0, len(members), cols)]
+        block_w = max(sum(cells[i][0] for i in row) for row in rows)
+        block_h = sum(max(cells[i][1] for i in row) for row in rows)
+
+        if shelf_x > 0 and shelf_x + block_w > width:
+            shelf_x, shelf_y, shelf_h = 0.0, shelf_y + shelf_h, 0.0
+
+        y = shelf_y
+        for row in rows:
+            row_h = max(cells[i][1] for i in row)
+            x = shelf_x
+            for i in row:
+                w = cells[i][0]
+                positions[i] = {
+                    "x": int(canvas["xmin"] + x + w / 2),
+                    "y": int(canvas["ymin"] + y + row_h / 2),
+                    "rot": 0
+                }
+                x += w
+            y += row_h
+
+        shelf_x += block_w
+        shelf_h = max(shelf_h, block_h)
+    return positions
+
+
+class IncrementalPlacer:
+    """
+    Places symbols one at a time as they stream in, filling canvas rows
+    left to right. Used when Phase 1 is streamed and the full component
+    list (and so its grouping) is not known yet.
+    """
+
+    def __init__(
+        self,
+        lib_dir: str | Path,
+        canvas: Optional[Dict[str, Any]] = None,
+        min_spacing: float = MIN_SPACING_MM
+    ):
+        self.lib_dir = lib_dir
+        self.canvas = {**DEFAULT_CANVAS, **(canvas or {})}
+        self.grid = self.canvas.get("grid") or 1
+        self.min_spacing = min_spacing
+        self._x = self._y = self._row_h = 0.0
+
+    def _next(self, symbol: Dict[str, Any], commit: bool) -> Dict[str, Any]:
+        bbox = library_bbox(self.lib_dir, symbol.get("lib", ""), symbol.get("symbol", ""))
+        w, h = _cell_size(bbox, self.grid, self.min_spacing)
+        width = self.canvas["xmax"] - self.canvas["xmin"]
+        x, y, row_h = self._x, self._y, self._row_h
+        if x > 0 and x + w > width:
+            x, y, row_h = 0.0, y + row_h, 0.0
+        at = {
+            "x": int(self.canvas["xmin"] + x + w / 2),
+            "y": int(self.canvas["ymin"] + y + h / 2),
+            "rot": 0
+        }
+        if commit:
+            self._x, self._y, self._row_h = x + w, y, max(row_h, h)
+        return at
+
+    def peek(self, symbol: Dict[str, Any]) -> Dict[str, Any]:
+        """Position place() would return, without taking it."""
+        return self._next(symbol, commit=False)
+
+    def place(self, symbol: Dict[str, Any]) -> Dict[str, Any]:
+        """Take the next free position for symbol, as {"x", "y", "rot"}."""
+        return self._next(symbol, commit=True)
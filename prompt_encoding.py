@@ -0,0 +1,89 @@
+"""
+Cursor PCB - Compact Prompt Encoding
+
+Token-lean encodings for the JSON embedded in LLM prompts, plus an offline
+token estimator used for per-phase accounting and budget checks.
+
+- compact_json: minified JSON (no indentation or spaces after separators)
+- encode_table: list of dicts -> {"columns": [...], "rows": [[...], ...]}
+
+Pin tables are encoded by design_model (PinTable.encoded_names, in the
+format PINS_NOTE describes).
+"""
+
+import json
+import math
+import re
+from typing import Dict, Any, Optional, Sequence
+
+# Explanations placed in prompts next to the encoded data
+TABLE_NOTE = (
+    'Tables are encoded as {"columns": [...], "rows": [[...], ...]}; '
+    "each row holds one entry's values in column order."
+)
+PINS_NOTE = (
+    "Pins are given either as a list of pin names, where pin number = "
+    'position in the list starting at 1, or as an object {"pin_number": "name"}.'
+)
+
+# Roughly how cl100k/o200k tokenizers split text: letter runs, digit
+# groups of up to three, and single punctuation characters
+_TOKEN_PIECE_RE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+
+class TokenBudgetExceeded(ValueError):
+    """Raised when a prompt is estimated to exceed the configured token budget."""
+
+    def __init__(self, phase: int, tokens: int, budget: int):
+        self.phase = phase
+        self.tokens = tokens
+        self.budget = budget
+        super().__init__(
+            f"Phase {phase} prompt is ~{tokens} tokens, over the budget of {budget}. "
+            "Reduce the design size or raise token_budget."
+        )
+
+
+def compact_json(data: Any) -> str:
+    """Serialize data as minified JSON."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of text without a tokenizer.
+
+    Letter runs count as one token per four characters, digits in groups of
+    three, and every punctuation character as its own token. This tracks
+    BPE tokenizers closely enough for budgeting JSON-heavy prompts.
+    """
+    count = 0
+    for piece in _TOKEN_PIECE_RE.findall(text):
+        count += math.ceil(len(piece) / 4) if piece[0].isalpha() else 1
+    return count
+
+
+def encode_table(
+    rows: Sequence[Dict[str, Any]],
+    columns: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """
+    Encode a list of dicts as a table with a shared key header.
+
+    Args:
+        rows: Records to encode
+        columns: Columns to keep (default: every key, in first-seen order)
+
+    Returns:
+        {"columns": [...], "rows": [[...], ...]} with missing values as ""
+    """
+    if columns is None:
+        columns = []
+        for row in rows:
+            for key in row:
+                if key not in columns:
+                    columns.append(key)
+    return {
+        "columns": list(columns),
+        "rows": [[row.get(col, "") for col in columns] for row in rows]
+    }
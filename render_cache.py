@@ -0,0 +1,246 @@
+"""
+Cursor PCB - Schematic Render Cache
+
+Caches kicad-cli SVG exports by a content hash of the .kicad_sch file, so
+an unchanged schematic is never rendered twice. Entries are stored gzipped
+under out/render_cache/ and evicted least-recently-used once the cache grows
+past max_bytes. Renders are single-flight: concurrent requests for the same
+content share one kicad-cli process.
+
+The hash doubles as the HTTP ETag, and the stored gzip bytes can be sent
+as-is with Content-Encoding: gzip.
+
+Set KICAD_CLI (or pass kicad_cli=) to use another binary, e.g. a fake one
+that writes a fixed SVG.
+"""
+
+import gzip
+import hashlib
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, List, Tuple
+
+from backend_common import SVG_EXPORT_TIMEOUT, read_svg
+from metrics import CACHE_REQUESTS, observe_subprocess
+
+DEFAULT_ROOT = "out/render_cache"
+
+
+class RenderError(RuntimeError):
+    """kicad-cli failed or produced no SVG."""
+
+
+class RenderResult:
+    """A cached render: ETag plus gzipped SVG bytes."""
+
+    __slots__ = ("etag", "path", "cached")
+
+    def __init__(self, etag: str, path: Path, cached: bool):
+        self.etag = etag
+        self.path = path
+        self.cached = cached
+
+    def gzip_bytes(self) -> bytes:
+        return self.path.read_bytes()
+
+    def svg_text(self) -> str:
+        return gzip.decompress(self.path.read_bytes()).decode("utf-8")
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[RenderResult] = None
+        self.error: Optional[BaseException] = None
+
+
+class RenderCache:
+    """Content-addressed, size-bounded cache of schematic SVG renders."""
+
+    def __init__(
+        self,
+        root: str | Path = DEFAULT_ROOT,
+        max_bytes: int = 256 * 1024 * 1024,
+        kicad_cli: Optional[str] = None,
+        timeout: float = SVG_EXPORT_TIMEOUT
+    ):
+        """
+        Args:
+            root: Cache directory
+            max_bytes: Total size of cached .svg.gz files before LRU eviction
+            kicad_cli: kicad-cli command (default: $KICAD_CLI or "kicad-cli")
+            timeout: Seconds allowed per render
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.kicad_cli = shlex.split(kicad_cli or os.getenv("KICAD_CLI") or "kicad-cli")
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        # path -> (mtime_ns, size, hash): skip re-hashing unchanged files
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self.stats = {"hits": 0, "renders": 0, "shared": 0, "evictions": 0}
+
+    def content_hash(self, schematic_path: str | Path) -> str:
+        """sha256 of the schematic file (memoized by mtime and size)."""
+        path = str(schematic_path)
+        st = os.stat(path)
+        memo = self._hashes.get(path)
+        if memo and memo[:2] == (st.st_mtime_ns, st.st_size):
+            return memo[2]
+        digest = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+        self._hashes[path] = (st.st_mtime_ns, st.st_size, digest)
+        return digest
+
+    def _entry(self, key: str) -> Path:
+        return self.root / f"{key}.svg.gz"
+
+    def lookup(self, schematic_path: str | Path) -> Optional[RenderResult]:
+        """Cached render for the file's current content, without rendering."""
+        key = self.content_hash(schematic_path)
+        entry = self._entry(key)
+        if not entry.is_file():
+            return None
+        return RenderResult(key, entry, cached=True)
+
+    def render(self, schematic_path: str | Path) -> RenderResult:
+        """
+        SVG for the schematic's current content, rendering it only on a miss.
+
+        Raises:
+            RenderError: If kicad-cli fails or writes no SVG
+            FileNotFoundError: If the schematic does not exist
+        """
+        key = self.content_hash(schematic_path)
+        entry = self._entry(key)
+        if entry.is_file():
+            # LRU: eviction goes by last use
+            try:
+                os.utime(entry)
+            except OSError:
+                pass
+            self.stats["hits"] += 1
+            CACHE_REQUESTS.inc("render", "hit")
+            return RenderResult(key, entry, cached=True)
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self.stats["shared"] += 1
+            CACHE_REQUESTS.inc("render", "hit")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return RenderResult(key, flight.result.path, cached=True)
+
+        CACHE_REQUESTS.inc("render", "miss")
+        try:
+            flight.result = self._render(schematic_path, key)
+            self.stats["renders"] += 1
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _render(self, schematic_path: str | Path, key: str) -> RenderResult:
+        self.root.mkdir(parents=True, exist_ok=True)
+        out_dir = tempfile.mkdtemp(prefix="render-", dir=self.root)
+        try:
+            cmd = self.kicad_cli + ["sch", "export", "svg", "--output", out_dir, str(schematic_path)]
+            started = time.monotonic()
+            try:
+                proc = subprocess.run(cmd, capture_output=True, text=True, timeout=self.timeout)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                observe_subprocess("kicad-cli", started, None)
+                raise RenderError(f"kicad-cli failed: {e}") from e
+            observe_subprocess("kicad-cli", started, proc.returncode)
+            try:
+                _, svg = read_svg(out_dir)
+            except FileNotFoundError:
+                raise RenderError(
+                    f"kicad-cli produced no SVG (exit {proc.returncode}): {proc.stderr.strip()}"
+                )
+            entry = self._entry(key)
+            tmp = entry.with_suffix(".tmp")
+            tmp.write_bytes(gzip.compress(svg.encode("utf-8"), compresslevel=6))
+            os.replace(tmp, entry)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+        self._evict(keep=entry)
+        return RenderResult(key, entry, cached=False)
+
+    def _evict(self, keep: Optional[Path] = None) -> None:
+        entries: List[Tuple[float, int, Path]] = []
+        for p in self.root.glob("*.svg.gz"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.stats["evictions"] += 1
+
+
+_cache: Optional[RenderCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    """Process-wide render cache shared by the backend endpoints."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RenderCache()
+        return _cache
+
+
+def svg_response_parts(
+    result: RenderResult,
+    accept_encoding: str = ""
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Body and headers for a raw SVG response: the stored gzip bytes when the
+    client accepts gzip, plain SVG otherwise.
+    """
+    headers = {
+        "ETag": f'"{result.etag}"',
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if "gzip" in (accept_encoding or "").lower():
+        headers["Content-Encoding"] = "gzip"
+        return result.gzip_bytes(), headers
+    return result.svg_text().encode("utf-8"), headers
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header covers etag."""
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/").strip('"') for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
@@ -5,6 +5,9 @@ import math
 from typing import Tuple, Any
 import json
 
+from design_model import Design, Net, PinTable
+from tracing import span
+
 # grab sch thumbnail: kicad-cli sch export svg --output schematic.svg test.kicad_sch
 # grab pcb thumbnail: kicad-cli pcb export svg --layers F.Cu,F.Mask,F.SilkS,F.Fab,Drill,Edge.Cuts --output board.svg test.kicad_pcb
 
@@ -44,7 +47,9 @@ def _sexpr_end(text: str, start_idx: int) -> int:
 
 def get_symbol_def(lib_file: str | Path, symbol_name: str) -> str:
     lib_path = Path(lib_file)
-    text = lib_path.read_text(encoding="utf-8")
+    with span("library.read", path=str(lib_path), symbol=symbol_name) as sp:
+        text = lib_path.read_text(encoding="utf-8")
+        sp.set("bytes", len(text))
 
     pat = re.compile(rf'\(\s*symbol\s+"{re.escape(symbol_name)}"\s*[\n)]')
     m = pat.search(text)
@@ -204,7 +209,8 @@ def place_symbol(sch_path: str | Path, lib_file: str | Path, symbol_name: str, r
             raise ValueError("Invalid schematic: no closing ')'.")
         new_text = text[:idx] + symbol_block + text[idx:]
 
-    sch_path.write_text(new_text, encoding="utf-8")
+    with span("file.write", path=str(sch_path), bytes=len(new_text)):
+        sch_path.write_text(new_text, encoding="utf-8")
     return new_text
 
 def draw_wire(sch_path: str | Path, points: list[tuple[float, float]]) -> None:
@@ -235,7 +241,8 @@ def draw_wire(sch_path: str | Path, points: list[tuple[float, float]]) -> None:
     insert_at = m.start()
     new_text = text[:insert_at] + "\n" + wire_block + text[insert_at:]
 
-    sch_path.write_text(new_text, encoding="utf-8")
+    with span("file.write", path=str(sch_path), bytes=len(new_text)):
+        sch_path.write_text(new_text, encoding="utf-8")
 
 def place_from_llm_output(sch_path: str | Path, lib_file: str | Path, llm_output: dict[str, Any]) -> str:
     sch_path = Path(sch_path)
@@ -253,42 +260,40 @@ def place_from_llm_output(sch_path: str | Path, lib_file: str | Path, llm_output
         sch_text = place_symbol(sch_path, lib_file / file_name, symbol_name, ref_des, x, y, rot=rot, value=value, footprint=footprint)
     return sch_text
 
-def add_pin_outs(lib_dir: str | Path, llm_output: dict[str, Any]) -> dict[str, str]:
-    lib_dir = Path(lib_dir)
-    symbols = llm_output["symbols"]
-    defs = {}
-    pin_re = re.compile(
-        r"\(pin\s+\w+\s+\w+.*?"
-        r"\(at\s+(-?\d+\.?\d*)\s+(-?\d+\.?\d*)\s+(-?\d+)\).*?"
-        r"\(name\s+\"([^\"]+)\".*?"
-        r"\(number\s+\"([^\"]+)\"",
-        re.S
+_PIN_RE = re.compile(
+    r"\(pin\s+\w+\s+\w+.*?"
+    r"\(at\s+(-?\d+\.?\d*)\s+(-?\d+\.?\d*)\s+(-?\d+)\).*?"
+    r"\(name\s+\"([^\"]+)\".*?"
+    r"\(number\s+\"([^\"]+)\"",
+    re.S
+)
+
+def read_pin_table(lib_dir: str | Path, s: dict[str, Any]) -> PinTable:
+    """Absolute pin positions of one placed symbol (its "lib", "symbol" and "at")."""
+    sym_def = get_symbol_def(Path(lib_dir) / s["lib"], s["symbol"])
+
+    sx = s["at"]["x"]
+    sy = s["at"]["y"]
+    srot = s["at"]["rot"]
+
+    pins = PinTable()
+    for m in _PIN_RE.finditer(sym_def):
+        px = float(m.group(1))
+        py = float(m.group(2))
+        prot = int(m.group(3))
+        ax, ay = _rotate_translate(px, py, srot, sx, sy)
+        pins.add(m.group(5), m.group(4), ax, ay, prot + srot)
+    return pins
+
+def load_design(lib_dir: str | Path, llm_output: dict[str, Any]) -> Design:
+    """add_pin_outs() as a Design; llm_output is not modified."""
+    return Design.from_dict(
+        llm_output, [read_pin_table(lib_dir, s) for s in llm_output["symbols"]]
     )
-    for s in symbols:
-        lib_path = lib_dir / s["lib"]
-        sym_def = get_symbol_def(lib_path, s["symbol"])
-
-        sx = s["at"]["x"]
-        sy = s["at"]["y"]
-        srot = s["at"]["rot"]
-
-        pins = {}
-
-        for m in pin_re.finditer(sym_def):
-            px = float(m.group(1))
-            py = float(m.group(2))
-            prot = int(m.group(3))
-            pin_name = m.group(4)
-            pin_num = m.group(5)
-
-            ax, ay = _rotate_translate(px, py, srot, sx, sy)
-            arot = (prot + srot) % 360
-
-            pins[pin_num] = {
-                "name": pin_name,
-                "pos": (ax, ay, arot)
-            }
-        s["pins"] = pins
+
+def add_pin_outs(lib_dir: str | Path, llm_output: dict[str, Any]) -> dict[str, str]:
+    for s in llm_output["symbols"]:
+        s["pins"] = read_pin_table(lib_dir, s).to_dict()
     return llm_output
 
 def get_pin_xy(llm_output, ref: str, pin: int) -> tuple[float, float]:
@@ -302,7 +307,13 @@ def get_pin_xy(llm_output, ref: str, pin: int) -> tuple[float, float]:
             return x, y
     raise KeyError(f"Symbol {ref} not found")
 
-def draw_nets(sch_path: str | Path, llm_output1: dict[str, Any], llm_output2: dict[str, Any]) -> None:
+def draw_nets(sch_path: str | Path, llm_output1: dict[str, Any] | Design, llm_output2: dict[str, Any]) -> None:
+    if isinstance(llm_output1, Design):
+        nets = [Net.from_dict(net) for net in llm_output2["nets"]]
+        for start, end in llm_output1.wire_segments(nets):
+            draw_wire(sch_path, [start, end])
+        return
+
     for net in llm_output2["nets"]:
         conns = net["connections"]
         if len(conns) < 2:
@@ -0,0 +1,586 @@
+"""
+Cursor PCB - Async Backend Server
+
+ASGI (Starlette) version of backend_test.py serving the same /api/* routes
+on one long-lived event loop, plus background job endpoints (/api/jobs/*)
+with Server-Sent Events progress. Every request's PCBAgent shares one
+AsyncDedalus client; schematic file work runs in worker threads and
+kicad-cli / pcb.py run as asyncio subprocesses, so a single process serves
+many concurrent generations. Generation, rendering and routing pass
+admission control (admission.py) and get 429 + Retry-After when saturated.
+
+Run with: python server.py   (or: uvicorn server:app --port 5001)
+"""
+
+import asyncio
+import contextlib
+import time
+import traceback
+from urllib.parse import quote
+from typing import Dict, Any, Optional, Callable, Awaitable, TypeVar
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from admission import CPU, LLM, ROUTER, AdmissionRejected, Ticket, client_id, get_scheduler
+from agent_logging import recent_logs
+from allowlist_registry import get_allowlist
+from backend_common import (
+    CATALOG_OFF, PCB_TIMEOUT, SYMBOL_LIB, catalog_enabled, catalog_search, pcb_command
+)
+from jobs import JobManager, sse_format
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    HTTP_IN_FLIGHT,
+    HTTP_LATENCY,
+    HTTP_REQUESTS,
+    JOBS_ACTIVE,
+    observe_subprocess,
+    render as render_metrics,
+)
+from pcb_agent import PCBAgent, create_client, load_env
+from render_cache import RenderError, etag_matches, get_render_cache, svg_response_parts
+from speculation import get_speculations, speculation_key, start_phase1
+from symbol_catalog import get_catalog
+from workspace import workspace_in_use
+
+# The app module is the process entry point (uvicorn server:app); .env can
+# set PCB_ADMIT_* / PCB_AGENT_* read below
+load_env()
+
+PORT = 5001
+
+T = TypeVar("T")
+
+
+class AgentRunner:
+    """Creates per-request PCBAgents bound to the server's shared client."""
+
+    def __init__(self, agent_kwargs: Optional[Dict[str, Any]] = None):
+        self.agent_kwargs = agent_kwargs or {}
+        self.client: Any = None
+
+    def start(self) -> None:
+        """Create the shared client (needs DEDALUS_API_KEY)."""
+        self.client = create_client()
+
+    async def close(self) -> None:
+        client, self.client = self.client, None
+        if client is not None and hasattr(client, "aclose"):
+            await client.aclose()
+
+    async def run(self, fn: Callable[[PCBAgent], Awaitable[T]], **agent_kwargs: Any) -> T:
+        """Await fn(agent) with a fresh agent on the shared client."""
+        agent = PCBAgent(client=self.client, **{**self.agent_kwargs, **agent_kwargs})
+        try:
+            return await fn(agent)
+        finally:
+            await agent.aclose()
+
+    def run_async(self, fn: Callable[[PCBAgent], Awaitable[T]], **agent_kwargs: Any) -> asyncio.Task:
+        """Start fn(agent) as a background task (cancel the task to stop it)."""
+        return asyncio.create_task(self.run(fn, **agent_kwargs))
+
+
+runner = AgentRunner({"verbose": True})
+jobs = JobManager()
+JOBS_ACTIVE.set_function(lambda: {(status,): n for status, n in jobs.active().items()})
+admission = get_scheduler()
+
+SSE_HEARTBEAT = 15.0
+
+
+class MetricsMiddleware:
+    """Request counts and latency per route template (/api/jobs/{job_id}, not the raw path)."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # The router records the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUESTS.inc(scope["method"], route, str(status))
+            HTTP_LATENCY.observe(time.perf_counter() - started, scope["method"], route)
+
+
+async def _json_body(request: Request) -> Dict[str, Any]:
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _error(e: Exception, status_code: int = 500) -> JSONResponse:
+    return JSONResponse(
+        {'success': False, 'error': str(e), 'traceback': traceback.format_exc()},
+        status_code=status_code
+    )
+
+
+def _client(request: Request) -> str:
+    return client_id(request.headers, request.client.host if request.client else None)
+
+
+def _busy(e: AdmissionRejected) -> JSONResponse:
+    """429 for a request turned away by admission control."""
+    return JSONResponse(
+        {'success': False, 'error': str(e), 'work_class': e.work_class, 'retry_after': e.retry_after},
+        status_code=429,
+        headers={'Retry-After': str(e.retry_after)}
+    )
+
+
+def _queue_headers(ticket: Optional[Ticket]) -> Dict[str, str]:
+    return {'X-Queue-Wait-Ms': f'{ticket.waited * 1000:.1f}'} if ticket else {}
+
+
+async def _render(schematic_path: str, client: str) -> tuple:
+    """Cached render; a cache miss waits for a CPU slot. Returns (result, ticket)."""
+    cache = get_render_cache()
+    cached = await asyncio.to_thread(cache.lookup, schematic_path)
+    if cached is not None:
+        return await asyncio.to_thread(cache.render, schematic_path), None
+    async with admission[CPU].admit(client) as ticket:
+        return await asyncio.to_thread(cache.render, schematic_path), ticket
+
+
+async def _run_process(cmd: list, timeout: float, capture: bool = True) -> tuple:
+    """Run a subprocess without blocking the loop; returns (returncode, stdout, stderr)."""
+    pipe = asyncio.subprocess.PIPE if capture else None
+    proc = await asyncio.create_subprocess_exec(*cmd, stdout=pipe, stderr=pipe)
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        # Timed out or the job was cancelled: don't leave the process running
+        proc.kill()
+        await proc.wait()
+        raise
+    decode = lambda b: b.decode("utf-8", "replace") if b is not None else None
+    return proc.returncode, decode(stdout), decode(stderr)
+
+
+async def hello_world(request: Request) -> JSONResponse:
+    """Simple endpoint that returns hello world."""
+    return JSONResponse({
+        'message': 'Hello World!',
+        'status': 'success',
+        'timestamp': '2024-02-06'
+    })
+
+
+async def get_metrics(request: Request) -> Response:
+    """Prometheus metrics in the text exposition format."""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+async def get_allow_list(request: Request) -> JSONResponse:
+    """Return allow_list.json data."""
+    try:
+        allowlist = get_allowlist('allow_list.json').entries
+        return JSONResponse({'success': True, 'data': allowlist, 'count': len(allowlist)})
+    except Exception as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def search_catalog(request: Request) -> JSONResponse:
+    """Paginated full-text search over every symbol in the KiCad libraries."""
+    if not catalog_enabled():
+        return JSONResponse({'success': False, 'enabled': False, 'error': CATALOG_OFF}, status_code=404)
+    try:
+        page = await asyncio.to_thread(catalog_search, dict(request.query_params))
+        return JSONResponse({'success': True, **page})
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    except Exception as e:
+        return _error(e)
+
+
+async def get_logs(request: Request) -> JSONResponse:
+    """Return recent structured agent log records (newest last)."""
+    try:
+        limit = int(request.query_params.get('limit', 200))
+    except ValueError:
+        limit = 200
+    records = recent_logs(
+        limit=limit,
+        request_id=request.query_params.get('request_id'),
+        job_id=request.query_params.get('job_id')
+    )
+    return JSONResponse({'success': True, 'logs': records, 'count': len(records)})
+
+
+async def chat_components(request: Request) -> JSONResponse:
+    """Filter components using Phase 0 only (_stage0_filter_components)."""
+    data = await _json_body(request)
+    prompt = data.get('prompt', '')
+    directory = data.get('directory', '')
+    use_cache = data.get('use_cache', True)
+    refresh_cache = data.get('refresh_cache', False)
+    filter_mode = data.get('filter_mode', 'auto')
+    speculate = data.get('speculate', True)
+
+    if not prompt:
+        return JSONResponse({'success': False, 'error': 'No prompt provided'}, status_code=400)
+
+    if not directory:
+        return JSONResponse({'success': False, 'error': 'No directory provided'}, status_code=400)
+
+    try:
+        filtered_components = await runner.run(
+            lambda agent: agent._stage0_filter_components(
+                prompt,
+                use_cache=use_cache,
+                refresh_cache=refresh_cache,
+                mode=filter_mode
+            )
+        )
+
+        # Start Phase 1 while the user reviews the list
+        speculation_id = None
+        if speculate:
+            speculation_id = start_phase1(
+                runner, get_speculations(), prompt, filtered_components, use_cache=use_cache
+            )
+
+        return JSONResponse({
+            'success': True,
+            'components': filtered_components,
+            'speculation_id': speculation_id,
+            'message': f'I found {len(filtered_components)} components for your circuit. Would you like to add or remove any components?'
+        })
+    except Exception as e:
+        return _error(e)
+
+
+def _generate_call(data: Dict[str, Any], on_progress=None) -> Callable[[PCBAgent], Awaitable[Dict[str, Any]]]:
+    """generate_schematic call for an /api/generate style request body."""
+    prompt = data.get('prompt', '')
+    selected_components = data.get('selected_components', None)
+    job_id = data.get('job_id')
+    speculation_id = data.get('speculation_id')
+
+    speculative_phase1 = None
+    if speculation_id:
+        speculative_phase1 = get_speculations().claim(
+            speculation_id, speculation_key(prompt, selected_components or [])
+        )
+        if speculative_phase1 is not None and not job_id:
+            job_id = speculation_id
+
+    return lambda agent: agent.generate_schematic(
+        user_prompt=prompt,
+        directory_path=data.get('directory', ''),
+        selected_components=selected_components,
+        use_cache=data.get('use_cache', True),
+        refresh_cache=data.get('refresh_cache', False),
+        stream=data.get('stream', False),
+        on_progress=on_progress,
+        netlist_mode=data.get('netlist_mode', 'auto'),
+        request_id=data.get('request_id'),
+        job_id=job_id,
+        speculative_phase1=speculative_phase1,
+        resume=data.get('resume', False),
+        from_phase=data.get('from_phase')
+    )
+
+
+def _missing_inputs(data: Dict[str, Any], *keys: str) -> Optional[JSONResponse]:
+    for key in keys:
+        if not data.get(key):
+            return JSONResponse({'success': False, 'error': f'No {key} provided'}, status_code=400)
+    return None
+
+
+async def generate(request: Request) -> JSONResponse:
+    """Generate schematic using PCB Agent - Full Workflow."""
+    data = await _json_body(request)
+    missing = _missing_inputs(data, 'prompt', 'directory')
+    if missing:
+        return missing
+
+    try:
+        async with admission[LLM].admit(_client(request)) as ticket:
+            result = await runner.run(_generate_call(data))
+        return JSONResponse(result, headers=_queue_headers(ticket))
+    except AdmissionRejected as e:
+        return _busy(e)
+    except Exception as e:
+        return _error(e)
+
+
+async def render_schematic(request: Request) -> JSONResponse:
+    """Render schematic to SVG using kicad-cli (cached by schematic content)."""
+    data = await _json_body(request)
+    schematic_path = data.get('schematic_path', '')
+
+    try:
+        rendered, ticket = await _render(schematic_path, _client(request))
+        return JSONResponse({
+            'success': True,
+            'svg_content': await asyncio.to_thread(rendered.svg_text),
+            'etag': rendered.etag,
+            'cached': rendered.cached,
+            'svg_url': f'/api/schematic-svg?path={quote(schematic_path)}'
+        }, headers=_queue_headers(ticket))
+    except AdmissionRejected as e:
+        return _busy(e)
+    except RenderError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
+    except Exception as e:
+        return _error(e)
+
+
+async def schematic_svg(request: Request) -> Response:
+    """Raw (gzip when accepted) SVG of a schematic, with ETag revalidation."""
+    schematic_path = request.query_params.get('path', '')
+    if not schematic_path.endswith('.kicad_sch'):
+        return JSONResponse(
+            {'success': False, 'error': 'path must be a .kicad_sch file'}, status_code=400
+        )
+
+    cache = get_render_cache()
+    try:
+        etag = await asyncio.to_thread(cache.content_hash, schematic_path)
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return Response(status_code=304, headers={'ETag': f'"{etag}"'})
+        rendered, ticket = await _render(schematic_path, _client(request))
+        body, headers = await asyncio.to_thread(
+            svg_response_parts, rendered, request.headers.get('accept-encoding', '')
+        )
+        return Response(body, media_type='image/svg+xml', headers={**headers, **_queue_headers(ticket)})
+    except AdmissionRejected as e:
+        return _busy(e)
+    except FileNotFoundError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=404)
+    except RenderError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def _run_pcb(directory: str, job_id: str) -> Dict[str, Any]:
+    """Run pcb.py; returns the /api/generate-pcb payload (raises on bad job_id)."""
+    # The schematic job's workspace must outlive pcb.py reading it
+    with workspace_in_use(job_id):
+        cmd = pcb_command(directory, job_id)
+        started = time.monotonic()
+        returncode = None
+        try:
+            returncode, stdout, stderr = await _run_process(cmd, PCB_TIMEOUT, capture=False)
+        finally:
+            observe_subprocess('pcb', started, returncode)
+    if returncode != 0:
+        return {'success': False, 'error': f'PCB generation failed: {stderr}'}
+    return {'success': True, 'message': 'PCB generated successfully', 'output': stdout}
+
+
+async def generate_pcb(request: Request) -> JSONResponse:
+    """Generate PCB layout using pcb.py with KiCad Python."""
+    data = await _json_body(request)
+    missing = _missing_inputs(data, 'directory', 'job_id')
+    if missing:
+        return missing
+
+    try:
+        # Check the job before queueing for the router
+        pcb_command(data['directory'], data.get('job_id'))
+        async with admission[ROUTER].admit(_client(request)) as ticket:
+            result = await _run_pcb(data['directory'], data.get('job_id'))
+        return JSONResponse(
+            result, status_code=200 if result['success'] else 500, headers=_queue_headers(ticket)
+        )
+    except AdmissionRejected as e:
+        return _busy(e)
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    except FileNotFoundError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=404)
+    except Exception as e:
+        return _error(e)
+
+
+def _job_links(job_id: str) -> Dict[str, Any]:
+    return {
+        'success': True,
+        'job_id': job_id,
+        'status_url': f'/api/jobs/{job_id}',
+        'events_url': f'/api/jobs/{job_id}/events',
+    }
+
+
+async def submit_generate_job(request: Request) -> JSONResponse:
+    """Start generate_schematic in the background; returns the job ID at once."""
+    data = await _json_body(request)
+    missing = _missing_inputs(data, 'prompt', 'directory')
+    if missing:
+        return missing
+
+    # The job ID is also the workspace ID, so /api/generate-pcb can use it
+    job_id = data.get('job_id') or data.get('speculation_id')
+    try:
+        async def work(on_progress):
+            call = _generate_call({**data, 'job_id': job.job_id}, on_progress)
+            return await runner.run(call)
+
+        ticket = admission[LLM].reserve(_client(request))
+        job = jobs.submit(
+            'generate', work, job_id=job_id, meta={'prompt': data['prompt']}, ticket=ticket
+        )
+    except AdmissionRejected as e:
+        return _busy(e)
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    return JSONResponse(_job_links(job.job_id), status_code=202)
+
+
+async def submit_pcb_job(request: Request) -> JSONResponse:
+    """Start pcb.py in the background for a project and its schematic job."""
+    data = await _json_body(request)
+    missing = _missing_inputs(data, 'directory', 'job_id')
+    if missing:
+        return missing
+
+    try:
+        # Fail fast on a bad or unknown schematic job
+        pcb_command(data['directory'], data.get('job_id'))
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    except FileNotFoundError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=404)
+
+    async def work(on_progress):
+        on_progress({'event': 'pcb_started'})
+        return await _run_pcb(data['directory'], data.get('job_id'))
+
+    try:
+        ticket = admission[ROUTER].reserve(_client(request))
+    except AdmissionRejected as e:
+        return _busy(e)
+    job = jobs.submit(
+        'generate-pcb', work, meta={'schematic_job_id': data.get('job_id')}, ticket=ticket
+    )
+    return JSONResponse(_job_links(job.job_id), status_code=202)
+
+
+def _get_job(request: Request):
+    job = jobs.get(request.path_params['job_id'])
+    if job is None:
+        return None, JSONResponse({'success': False, 'error': 'Unknown job'}, status_code=404)
+    return job, None
+
+
+async def get_job(request: Request) -> JSONResponse:
+    """Job status, phase timings and (once finished) the result."""
+    job, missing = _get_job(request)
+    if missing:
+        return missing
+    return JSONResponse({'success': True, **job.to_dict()})
+
+
+async def cancel_job(request: Request) -> JSONResponse:
+    """Cancel a running job."""
+    job, missing = _get_job(request)
+    if missing:
+        return missing
+    cancelled = jobs.cancel(job.job_id)
+    return JSONResponse({'success': cancelled, 'job_id': job.job_id, 'status': job.status})
+
+
+async def job_events(request: Request) -> StreamingResponse:
+    """Server-Sent Events: the job's past and live progress events."""
+    job, missing = _get_job(request)
+    if missing:
+        return missing
+
+    async def stream():
+        async for event in job.subscribe(heartbeat=SSE_HEARTBEAT):
+            yield sse_format(event)
+
+    return StreamingResponse(
+        stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    try:
+        runner.start()
+    except ValueError as e:
+        print(f"Warning: {e}")
+    # Build / refresh the symbol catalog and its search index in the background
+    catalog_warmup = None
+    if catalog_enabled():
+        catalog_warmup = asyncio.create_task(
+            asyncio.to_thread(lambda: get_catalog(SYMBOL_LIB).snapshot().search_index)
+        )
+    try:
+        yield
+    finally:
+        for job_id in [j['job_id'] for j in jobs.list()]:
+            jobs.cancel(job_id)
+        await runner.close()
+        if catalog_warmup is not None:
+            catalog_warmup.cancel()
+
+
+routes = [
+    Route('/metrics', get_metrics, methods=['GET']),
+    Route('/api/hello', hello_world, methods=['GET']),
+    Route('/api/allow-list', get_allow_list, methods=['GET']),
+    Route('/api/catalog/search', search_catalog, methods=['GET']),
+    Route('/api/logs', get_logs, methods=['GET']),
+    Route('/api/chat-components', chat_components, methods=['POST']),
+    Route('/api/generate', generate, methods=['POST']),
+    Route('/api/render-schematic', render_schematic, methods=['POST']),
+    Route('/api/schematic-svg', schematic_svg, methods=['GET']),
+    Route('/api/generate-pcb', generate_pcb, methods=['POST']),
+    Route('/api/jobs/generate', submit_generate_job, methods=['POST']),
+    Route('/api/jobs/generate-pcb', submit_pcb_job, methods=['POST']),
+    Route('/api/jobs/{job_id}', get_job, methods=['GET']),
+    Route('/api/jobs/{job_id}', cancel_job, methods=['DELETE']),
+    Route('/api/jobs/{job_id}/events', job_events, methods=['GET']),
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[
+        Middleware(MetricsMiddleware),
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("=" * 50)
+    print("Async Server Starting...")
+    print("=" * 50)
+    print("Available endpoints:")
+    for route in routes:
+        print(f"  {'/'.join(sorted(route.methods - {'HEAD'})):<4} http://localhost:{PORT}{route.path}")
+    print("=" * 50)
+    uvicorn.run(app, host="127.0.0.1", port=PORT)
@@ -0,0 +1,162 @@
+"""
+Cursor PCB - Speculative Phase 1
+
+While the user reviews the Phase 0 component list, Phase 1 is already
+running in the background for that exact prompt and list. /api/generate
+claims the result if the prompt and components are unchanged; if the user
+edited the list, the speculation is cancelled and Phase 1 runs as usual.
+
+Speculations are keyed by a hash of (prompt, component set, model) and
+handed back by ID, so a stale speculation is never reused by accident.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from workspace import JobWorkspace, new_job_id, workspace_in_use
+
+DEFAULT_MODEL = "openai/gpt-5.2"
+
+
+def speculation_key(
+    prompt: str,
+    components: List[Dict[str, Any]],
+    model: str = DEFAULT_MODEL
+) -> str:
+    """Hash of the inputs Phase 1 depends on; component order and extra fields are ignored."""
+    parts = sorted(
+        {(c.get("lib", ""), c.get("symbol", "")) for c in components if isinstance(c, dict)}
+    )
+    payload = json.dumps([prompt.strip(), parts, model], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SpeculationRegistry:
+    """In-flight speculative Phase 1 runs, by speculation ID."""
+
+    def __init__(self, max_entries: int = 16, ttl: float = 600.0):
+        """
+        Args:
+            max_entries: Speculations kept at once; the oldest are cancelled
+            ttl: Seconds an unclaimed speculation is kept before cancelling
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, speculation_id: str, key: str, future: Any) -> None:
+        """Register a running speculation (a concurrent Future or asyncio Task)."""
+        with self._lock:
+            self._entries[speculation_id] = (key, time.monotonic(), future)
+            self._evict()
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for sid in list(self._entries):
+            _, started, future = self._entries[sid]
+            if now - started > self.ttl or len(self._entries) > self.max_entries:
+                del self._entries[sid]
+                future.cancel()
+
+    def claim(self, speculation_id: Optional[str], key: str) -> Optional[Any]:
+        """
+        Take the speculation if it was started for the same inputs.
+
+        A speculation for different inputs (the user edited the list) is
+        cancelled. Either way it is removed from the registry.
+
+        Returns:
+            Future or task resolving to the raw Phase 1 output, or None
+        """
+        if not speculation_id:
+            return None
+        with self._lock:
+            entry = self._entries.pop(speculation_id, None)
+        if entry is None:
+            return None
+        spec_key, _, future = entry
+        if spec_key != key or future.cancelled():
+            future.cancel()
+            return None
+        return future
+
+    def cancel(self, speculation_id: str) -> bool:
+        """Cancel a speculation; True if it was still registered."""
+        with self._lock:
+            entry = self._entries.pop(speculation_id, None)
+        if entry is None:
+            return False
+        entry[2].cancel()
+        return True
+
+    def ids(self) -> List[str]:
+        """IDs of registered (unclaimed) speculations."""
+        with self._lock:
+            return list(self._entries)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def start_phase1(
+    pool: Any,
+    registry: SpeculationRegistry,
+    prompt: str,
+    components: List[Dict[str, Any]],
+    model: str = DEFAULT_MODEL,
+    use_cache: bool = True
+) -> str:
+    """
+    Start Phase 1 for prompt + components on the agent pool.
+
+    The speculation ID doubles as the job ID: phase1_input.json is written
+    to that job's workspace, and a claiming generate run can reuse it.
+
+    Args:
+        pool: agent_pool.AgentPool or server.AgentRunner (anything with
+            run_async(fn) returning a cancellable future or task)
+        registry: Where the running speculation is registered
+        prompt: User's circuit description
+        components: Component list shown to the user (Phase 0 output)
+        model: Phase 1 model (must match the later generate call)
+        use_cache: Reuse cached LLM responses
+
+    Returns:
+        Speculation ID to pass back to /api/generate
+    """
+    speculation_id = new_job_id()
+
+    async def job(agent: Any) -> Dict[str, Any]:
+        with workspace_in_use(speculation_id):
+            workspace = JobWorkspace.create(
+                speculation_id, agent.workspace_root,
+                meta={"prompt": prompt, "model": model, "speculative": True}
+            )
+            # The reply is validated (and cached) by the run that claims it, so
+            # it is held back from the cache here
+            return await agent._phase1_component_selection(
+                prompt, model, components, use_cache=use_cache,
+                artifacts=agent.artifact_sink(workspace), pending_cache=[]
+            )
+
+    registry.add(speculation_id, speculation_key(prompt, components, model), pool.run_async(job))
+    return speculation_id
+
+
+_registry: Optional[SpeculationRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_speculations() -> SpeculationRegistry:
+    """Process-wide registry shared by the backend endpoints."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SpeculationRegistry()
+        return _registry
@@ -0,0 +1,381 @@
+"""
+Cursor PCB - Symbol Catalog
+
+Index of every symbol in the KiCad library directory (PCBAgent.symbol_lib),
+not just the hand-curated allow_list.json. Each .kicad_sym file is parsed
+once for symbol name, reference prefix, default footprint, description,
+keywords and pin count; files are parsed in parallel worker processes.
+
+The index is kept in a compact gzipped JSON file (out/symbol_catalog.json.gz)
+and refreshed incrementally: only libraries whose mtime or size changed are
+re-parsed, and deleted libraries are dropped.
+
+Catalog entries have the same shape as allowlist entries (lib, symbol, ref,
+footprint, keywords) plus "description" and "pins", so search results can
+be passed straight to Phase 0 / Phase 1 as selected components. With
+PCBAgent(use_catalog=True), the agent's allowlist is merged with the
+catalog (merged()), and Phase 0 ranks over both.
+"""
+
+import bisect
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from allowlist_registry import AllowlistSnapshot
+from component_search import ComponentIndex, entry_key, is_power_symbol
+
+DEFAULT_INDEX_PATH = "out/symbol_catalog.json.gz"
+INDEX_VERSION = 1
+# Row layout of each library in the on-disk index
+COLUMNS = ("symbol", "ref", "footprint", "description", "keywords", "pins")
+# Distinct queries whose full result lists are kept for paging
+SEARCH_CACHE_SIZE = 64
+
+_STRING = r'"((?:[^"\\]|\\.)*)"'
+_SYMBOL_RE = re.compile(r'\(symbol\s+' + _STRING)
+_PROPERTY_RE = re.compile(r'\(property\s+' + _STRING + r'\s+' + _STRING)
+_EXTENDS_RE = re.compile(r'\(extends\s+' + _STRING + r'\)')
+_PIN_NUMBER_RE = re.compile(r'\(number\s+' + _STRING)
+
+
+def _unescape(value: str) -> str:
+    return value.replace('\\"', '"').replace("\\\\", "\\")
+
+
+def parse_library(path: str | Path) -> List[List[Any]]:
+    """
+    Rows (in COLUMNS order) for every top-level symbol in a .kicad_sym file.
+
+    Unit sub-symbols ("R_0_1", "R_1_1") are folded into their parent. A
+    derived symbol ((extends "Parent")) takes the parent's pins and any
+    property it does not set itself.
+    """
+    text = Path(path).read_text(encoding="utf-8", errors="replace")
+
+    # Top-level symbols are the (symbol "...") openers that are not units
+    # ("<parent>_<unit>_<style>") of the symbol before them
+    starts: List[Tuple[int, str]] = []
+    for m in _SYMBOL_RE.finditer(text):
+        name = _unescape(m.group(1))
+        if starts:
+            parent = starts[-1][1]
+            if name.startswith(parent + "_") and re.fullmatch(r"\d+_\d+", name[len(parent) + 1:]):
+                continue
+        starts.append((m.start(), name))
+
+    parsed: Dict[str, Dict[str, Any]] = {}
+    for i, (start, name) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(text)
+        block = text[start:end]
+        props = {k: _unescape(v) for k, v in _PROPERTY_RE.findall(block)}
+        extends = _EXTENDS_RE.search(block)
+        parsed[name] = {
+            "props": props,
+            "extends": _unescape(extends.group(1)) if extends else None,
+            "pins": {_unescape(n) for n in _PIN_NUMBER_RE.findall(block)},
+        }
+
+    rows = []
+    for name, sym in parsed.items():
+        props = dict(sym["props"])
+        pins = sym["pins"]
+        parent = parsed.get(sym["extends"]) if sym["extends"] else None
+        if parent is not None:
+            props = {**parent["props"], **{k: v for k, v in props.items() if v}}
+            pins = pins or parent["pins"]
+        rows.append([
+            name,
+            props.get("Reference", ""),
+            props.get("Footprint", ""),
+            # "Description" since KiCad 8, "ki_description" before
+            props.get("Description") or props.get("ki_description", ""),
+            props.get("ki_keywords", ""),
+            len(pins),
+        ])
+    return rows
+
+
+def _row_entry(lib: str, row: List[Any]) -> Dict[str, Any]:
+    entry = dict(zip(COLUMNS, row))
+    entry["keywords"] = entry["keywords"].split()
+    return {"lib": lib, **entry}
+
+
+class CatalogSnapshot:
+    """Immutable view of one version of the catalog."""
+
+    def __init__(self, entries: List[Dict[str, Any]], version: int):
+        self.entries = entries
+        self.version = version
+        self.by_key: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for entry in entries:
+            self.by_key.setdefault(entry_key(entry), entry)
+        # (lowercase symbol name, entry index), sorted for prefix lookups
+        self._names = sorted((e["symbol"].lower(), i) for i, e in enumerate(entries))
+        self._search_index: Optional[ComponentIndex] = None
+        self._results: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._merged: Dict[Tuple[int, int], AllowlistSnapshot] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, lib: str, symbol: str) -> Optional[Dict[str, Any]]:
+        return self.by_key.get((lib, symbol))
+
+    @property
+    def search_index(self) -> ComponentIndex:
+        """BM25 index over the entries, built on first use."""
+        with self._lock:
+            if self._search_index is None:
+                self._search_index = ComponentIndex(self.entries)
+            return self._search_index
+
+    def _name_matches(self, query: str) -> List[Dict[str, Any]]:
+        """Entries whose symbol name equals or starts with query: exact first, then shortest."""
+        prefix = query.strip().lower()
+        lo = bisect.bisect_left(self._names, (prefix,))
+        hi = bisect.bisect_left(self._names, (prefix + "\uffff",))
+        hits = sorted(self._names[lo:hi], key=lambda n: (len(n[0]), n))
+        return [self.entries[i] for _, i in hits]
+
+    def _matches(self, query: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            cached = self._results.get(query)
+            if cached is not None:
+                self._results.move_to_end(query)
+                return cached
+        matches = self._name_matches(query)
+        seen = {id(e) for e in matches}
+        matches += [e for e in self.search_index.search(query) if id(e) not in seen]
+        with self._lock:
+            self._results[query] = matches
+            if len(self._results) > SEARCH_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return matches
+
+    def search(
+        self,
+        query: str = "",
+        offset: int = 0,
+        limit: int = 50,
+        lib: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        One page of entries matching query, best first.
+
+        Symbol names matching the query exactly or by prefix ("LM31" ->
+        "LM317_TO-220") come first, then BM25 full-text matches over
+        name, description, keywords and footprint.
+
+        Args:
+            query: Free text; empty lists the catalog in library order
+            offset: Index of the first result to return
+            limit: Page size
+            lib: Only entries from this library file (e.g. "Device.kicad_sym")
+
+        Returns:
+            {"query", "total", "offset", "limit", "results"}
+        """
+        if query.strip():
+            matches = self._matches(query)
+        else:
+            matches = self.entries
+        if lib:
+            matches = [e for e in matches if e["lib"] == lib]
+        offset = max(offset, 0)
+        return {
+            "query": query,
+            "total": len(matches),
+            "offset": offset,
+            "limit": limit,
+            "results": matches[offset:offset + limit],
+        }
+
+    def merged(self, allowlist: AllowlistSnapshot) -> AllowlistSnapshot:
+        """
+        The allowlist extended with every catalog symbol.
+
+        Curated allowlist entries come first and win over catalog entries for
+        the same symbol. Catalog power symbols are accepted when picked
+        explicitly but left out of the entry list, so Phase 0 does not add
+        every power rail KiCad ships.
+        """
+        key = (allowlist.stamp, self.version)
+        with self._lock:
+            snapshot = self._merged.get(key)
+            if snapshot is None:
+                curated = set(allowlist.by_key)
+                extra = [
+                    e for e in self.entries
+                    if entry_key(e) not in curated and not is_power_symbol(e)
+                ]
+                snapshot = AllowlistSnapshot(
+                    {**allowlist.data, "allowlist": allowlist.entries + extra},
+                    (allowlist.stamp, self.version)
+                )
+                for entry in self.entries:
+                    snapshot.by_key.setdefault(entry_key(entry), entry)
+                # Older allowlist versions are never asked for again
+                self._merged = {key: snapshot}
+            return snapshot
+
+
+class SymbolCatalog:
+    """Incrementally refreshed index of a KiCad symbol library directory."""
+
+    def __init__(
+        self,
+        lib_dir: str | Path,
+        index_path: Optional[str | Path] = DEFAULT_INDEX_PATH,
+        check_interval: float = 5.0,
+        max_workers: Optional[int] = None
+    ):
+        """
+        Args:
+            lib_dir: Directory holding .kicad_sym files (searched recursively)
+            index_path: On-disk index file (None = keep the index in memory only)
+            check_interval: Seconds between mtime checks of the library files
+            max_workers: Parser processes for a refresh (default: CPU count)
+        """
+        self.lib_dir = Path(lib_dir)
+        self.index_path = Path(index_path) if index_path else None
+        self.check_interval = check_interval
+        self.max_workers = max_workers
+        # lib -> {"mtime_ns", "size", "rows"}
+        self._libs: Dict[str, Dict[str, Any]] = {}
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self) -> None:
+        if self.index_path is None or not self.index_path.is_file():
+            return
+        try:
+            with gzip.open(self.index_path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (data.get("version") != INDEX_VERSION
+                or data.get("lib_dir") != str(self.lib_dir.resolve())
+                or data.get("columns") != list(COLUMNS)):
+            return
+        self._libs = data.get("libs", {})
+
+    def _save_index(self) -> None:
+        if self.index_path is None:
+            return
+        data = {
+            "version": INDEX_VERSION,
+            "lib_dir": str(self.lib_dir.resolve()),
+            "columns": list(COLUMNS),
+            "libs": self._libs,
+        }
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+        os.replace(tmp, self.index_path)
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        stamps = {}
+        if not self.lib_dir.is_dir():
+            return stamps
+        for path in self.lib_dir.rglob("*.kicad_sym"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            stamps[path.relative_to(self.lib_dir).as_posix()] = (st.st_mtime_ns, st.st_size)
+        return stamps
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Re-parse libraries added or changed since the last refresh.
+
+        Returns:
+            Counts: libraries, parsed, removed, symbols
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> Dict[str, int]:
+        stamps = self._scan()
+        changed = sorted(
+            lib for lib, (mtime_ns, size) in stamps.items()
+            if (lib not in self._libs
+                or self._libs[lib]["mtime_ns"] != mtime_ns
+                or self._libs[lib]["size"] != size)
+        )
+        removed = [lib for lib in self._libs if lib not in stamps]
+        for lib in removed:
+            del self._libs[lib]
+
+        paths = [str(self.lib_dir / lib) for lib in changed]
+        if len(paths) > 1:
+            # multiprocessing is only worth importing for a (re)build
+            from concurrent.futures import ProcessPoolExecutor
+
+            workers = min(self.max_workers or os.cpu_count() or 1, len(paths))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(parse_library, paths))
+        else:
+            results = [parse_library(p) for p in paths]
+        for lib, rows in zip(changed, results):
+            mtime_ns, size = stamps[lib]
+            self._libs[lib] = {"mtime_ns": mtime_ns, "size": size, "rows": rows}
+
+        if changed or removed:
+            self._save_index()
+        if changed or removed or self._snapshot is None:
+            entries = [
+                _row_entry(lib, row)
+                for lib in sorted(self._libs)
+                for row in self._libs[lib]["rows"]
+            ]
+            version = self._snapshot.version + 1 if self._snapshot else 1
+            self._snapshot = CatalogSnapshot(entries, version)
+        self._checked = time.monotonic()
+        return {
+            "libraries": len(self._libs),
+            "parsed": len(changed),
+            "removed": len(removed),
+            "symbols": len(self._snapshot.entries),
+        }
+
+    def library_stamps(self) -> Dict[str, Tuple[int, int]]:
+        """{library: (mtime_ns, size)} of the indexed libraries, as of the last refresh."""
+        with self._lock:
+            return {lib: (info["mtime_ns"], info["size"]) for lib, info in self._libs.items()}
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Current catalog, re-checking library mtimes at most every check_interval."""
+        current = self._snapshot
+        if current is not None and time.monotonic() - self._checked < self.check_interval:
+            return current
+        with self._lock:
+            if self._snapshot is None or time.monotonic() - self._checked >= self.check_interval:
+                self._refresh()
+            return self._snapshot
+
+
+_catalogs: Dict[str, SymbolCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(lib_dir: str | Path) -> SymbolCatalog:
+    """Catalog of lib_dir, shared by every agent and endpoint in the process."""
+    key = str(lib_dir)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = SymbolCatalog(lib_dir)
+    return catalog
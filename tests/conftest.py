@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The modules are top-level files in the repository root
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def make_agent(tmp_path):
+    """PCBAgent factory: FakeLLMRunner replies, files under tmp_path."""
+    from fake_llm import FakeLLMRunner
+    from pcb_agent import PCBAgent
+
+    def make(responses=(), **kwargs):
+        return PCBAgent(**{
+            "allow_list_path": str(ROOT / "allow_list.json"),
+            "runner": FakeLLMRunner(list(responses)),
+            "log_file": None,
+            "llm_cache_path": str(tmp_path / "llm_cache.sqlite"),
+            "trace_dir": None,
+            "checkpoint_dir": None,
+            "workspace_root": str(tmp_path / "jobs"),
+            **kwargs,
+        })
+
+    return make
+
+
+@pytest.fixture
+def resistor():
+    """Phase 1 symbol factory: an allowlisted 330 ohm resistor."""
+
+    def make(ref, x=40, y=40, symbol="R"):
+        return {
+            "lib": "Device.kicad_sym", "symbol": symbol, "ref_des": ref, "value": "330",
+            "footprint": "Resistor_SMD:R_0603_1608Metric", "at": {"x": x, "y": y, "rot": 0},
+        }
+
+    return make
@@ -0,0 +1,46 @@
+import gzip
+import json
+
+import pytest
+
+from artifacts import ESSENTIAL, ArtifactSink, ArtifactWriter
+
+
+@pytest.fixture
+def writer():
+    writer = ArtifactWriter()
+    yield writer
+    writer.close()
+
+
+def test_essential_level_skips_full_level_files(tmp_path, writer):
+    sink = ArtifactSink(tmp_path, level=ESSENTIAL, writer=writer)
+
+    assert sink.write("phase0_output.json", [{"symbol": "R"}]) is None
+    assert sink.write("prompt2.txt", "Connect the pins") is None
+    path = sink.write("llm_output1.json", {"symbols": []}, ESSENTIAL)
+
+    assert sink.flush() == []
+    assert path == tmp_path / "llm_output1.json"
+    assert [p.name for p in tmp_path.iterdir()] == ["llm_output1.json"]
+    assert json.loads(path.read_text()) == {"symbols": []}
+
+
+def test_off_level_writes_nothing(tmp_path, writer):
+    sink = ArtifactSink(tmp_path / "job", level="off", writer=writer)
+
+    assert sink.write("llm_output1.json", {"symbols": []}, ESSENTIAL) is None
+    assert sink.flush() == []
+    assert not (tmp_path / "job").exists()
+
+
+def test_gzip_format_writes_gz_files(tmp_path, writer):
+    sink = ArtifactSink(tmp_path, format="gzip", writer=writer)
+
+    path = sink.write("llm_output2.json", {"nets": [{"name": "GND", "connections": []}]})
+
+    assert sink.flush() == []
+    assert path == tmp_path / "llm_output2.json.gz"
+    assert not (tmp_path / "llm_output2.json").exists()
+    data = json.loads(gzip.decompress(path.read_bytes()))
+    assert data == {"nets": [{"name": "GND", "connections": []}]}
@@ -0,0 +1,39 @@
+import asyncio
+
+from artifacts import ArtifactSink
+from conftest import ROOT
+
+
+def test_catalog_search_is_off_unless_agents_accept_catalog_parts(monkeypatch):
+    from starlette.testclient import TestClient
+
+    import server
+
+    monkeypatch.delenv("PCB_AGENT_CATALOG", raising=False)
+    with TestClient(server.app) as client:
+        response = client.get("/api/catalog/search?q=ldo")
+    assert response.status_code == 404
+    assert response.json()["enabled"] is False
+
+
+def test_phase1_warns_about_selected_parts_it_drops(make_agent, tmp_path, monkeypatch):
+    monkeypatch.delenv("PCB_AGENT_CATALOG", raising=False)
+    agent = make_agent(
+        [{"match": "INPUT:", "response": {"symbols": []}}],
+        prompt1_selection_path=str(ROOT / "prompt1_selection.txt")
+    )
+    warnings = []
+    monkeypatch.setattr(agent, "log", lambda message, phase=None, level="info": warnings.append(message))
+    selected = [
+        {"lib": "Device.kicad_sym", "symbol": "R"},
+        {"lib": "Regulator_Linear.kicad_sym", "symbol": "NOT_IN_ALLOWLIST"},
+    ]
+
+    asyncio.run(agent._phase1_component_selection(
+        "LED", "openai/gpt-4o", selected, artifacts=ArtifactSink(tmp_path)
+    ))
+
+    dropped = [m for m in warnings if "not in the allowlist" in m]
+    assert len(dropped) == 1
+    assert "Regulator_Linear.kicad_sym:NOT_IN_ALLOWLIST" in dropped[0]
+    assert "Device.kicad_sym:R" not in dropped[0]
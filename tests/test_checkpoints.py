@@ -0,0 +1,83 @@
+import asyncio
+import copy
+import json
+import os
+import shutil
+import time
+
+import pytest
+
+from checkpoints import CheckpointStore, downstream, phase_key, reusable_phases
+from conftest import ROOT
+
+BENCH = ROOT / "bench"
+
+
+def _entry(name="led_indicator"):
+    corpus = json.loads((BENCH / "corpus.json").read_text(encoding="utf-8"))["entries"]
+    return copy.deepcopy(next(e for e in corpus if e["name"] == name))
+
+
+def _generate(make_agent, tmp_path, responses, run, **kwargs):
+    project = tmp_path / f"project{run}"
+    shutil.copytree(BENCH / "project", project)
+    agent = make_agent(
+        responses,
+        symbol_lib_path=str(BENCH / "lib"),
+        checkpoint_dir=str(tmp_path / "checkpoints"),
+    )
+    result = asyncio.run(agent.generate_schematic(
+        _entry()["prompt"], str(project), use_cache=False, **kwargs
+    ))
+    assert result["status"] == "success", result.get("error")
+    return agent, result
+
+
+def test_resume_hits_unchanged_phases_and_misses_after_an_upstream_change(make_agent, tmp_path):
+    responses = _entry()["responses"]
+    first, result = _generate(make_agent, tmp_path, responses, 1)
+    assert result["resumed_phases"] == []
+
+    again, result = _generate(make_agent, tmp_path, responses, 2, resume=True)
+    assert result["resumed_phases"] == [0, 1, 5]
+    assert again.runner.calls == 0
+
+    # Without its checkpoint Phase 1 runs again. The same plan still hits
+    # Phase 5; a different plan changes the netlist prompt, so Phase 5 misses
+    shutil.rmtree(tmp_path / "checkpoints" / "select")
+    same, result = _generate(make_agent, tmp_path, responses, 3, resume=True)
+    assert result["resumed_phases"] == [0, 5]
+    assert same.runner.calls == 1
+
+    shutil.rmtree(tmp_path / "checkpoints" / "select")
+    changed = copy.deepcopy(responses)
+    selection = next(r for r in changed if r["match"] == "Choose the parts")
+    selection["response"]["symbols"][1]["value"] = "470"
+    rerun, result = _generate(make_agent, tmp_path, changed, 4, resume=True)
+    assert result["resumed_phases"] == [0]
+    assert rerun.runner.calls == first.runner.calls
+
+def test_from_phase_reruns_only_its_downstream_checkpoints():
+    assert downstream(2) == {2, 6}
+    assert reusable_phases(False, from_phase=2) == {0, 1, 5}
+    assert reusable_phases(True, from_phase=4) == {0, 1}
+    assert reusable_phases(True) == {0, 1, 5}
+    assert reusable_phases(False) == set()
+    with pytest.raises(ValueError):
+        reusable_phases(True, from_phase=7)
+
+
+def test_expired_checkpoints_are_ignored_and_pruned(tmp_path):
+    store = CheckpointStore(tmp_path, max_age_seconds=60)
+    fresh, stale = phase_key(1, components=["R"]), phase_key(1, components=["C"])
+    store.save(1, fresh, {"output": "fresh"})
+    store.save(1, stale, {"output": "stale"})
+    assert asyncio.run(store.aflush()) == []
+    old = time.time() - 120
+    os.utime(store.path(1, stale), (old, old))
+
+    assert store.load(1, fresh) == {"output": "fresh"}
+    assert store.load(1, stale) is None
+    assert store.prune() == 1
+    assert not store.path(1, stale).exists()
+    assert store.path(1, fresh).exists()
@@ -0,0 +1,19 @@
+from component_search import select_components
+
+ALLOWLIST = [
+    {"lib": "power.kicad_sym", "symbol": "GND", "ref": "#PWR"},
+    {"lib": "power.kicad_sym", "symbol": "+3V3", "ref": "#PWR"},
+    {"lib": "Regulator_Linear.kicad_sym", "symbol": "AMS1117-3.3", "ref": "U",
+     "keywords": ["regulator", "ldo", "3.3v"]},
+    {"lib": "Device.kicad_sym", "symbol": "LED", "ref": "D", "keywords": ["led"]},
+]
+
+
+def test_power_symbols_do_not_use_up_top_k():
+    # GND and +3V3 rank first, but power symbols are added on top of top_k
+    selected = select_components("gnd 3v3 regulator", ALLOWLIST, top_k=1)
+
+    ranked = [s for s in selected if s["explanation"].startswith("Matched")]
+    assert [s["symbol"] for s in ranked] == ["AMS1117-3.3"]
+    assert ranked[0]["explanation"] == "Matched request terms: regulator"
+    assert {s["symbol"] for s in selected} == {"AMS1117-3.3", "GND", "+3V3"}
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from admission import WorkQueue
+from jobs import JobManager
+
+
+def test_submit_with_bad_job_id_releases_ticket():
+    async def scenario():
+        queue = WorkQueue("llm", max_concurrent=2, max_queue=4)
+        manager = JobManager()
+
+        async def work(on_progress):
+            return {"status": "success"}
+
+        for _ in range(3):
+            ticket = queue.reserve("client")
+            with pytest.raises(ValueError):
+                manager.submit("generate", work, job_id="../bad id", ticket=ticket)
+            assert queue.running == 0
+
+    asyncio.run(scenario())
+
+
+def test_submit_of_running_job_releases_ticket():
+    async def scenario():
+        queue = WorkQueue("llm", max_concurrent=2, max_queue=4)
+        manager = JobManager()
+        started = asyncio.Event()
+
+        async def work(on_progress):
+            started.set()
+            await asyncio.sleep(10)
+            return {"status": "success"}
+
+        job = manager.submit("generate", work, job_id="job-1", ticket=queue.reserve("a"))
+        await started.wait()
+        assert queue.running == 1
+        with pytest.raises(ValueError):
+            manager.submit("generate", work, job_id="job-1", ticket=queue.reserve("b"))
+        assert queue.running == 1
+        manager.cancel(job.job_id)
+        await asyncio.gather(job.task, return_exceptions=True)
+        assert queue.running == 0
+
+    asyncio.run(scenario())
+
+
+def test_jobs_endpoint_rejects_bad_job_id_without_leaking_slots(tmp_path):
+    from starlette.testclient import TestClient
+
+    import server
+
+    with TestClient(server.app) as client:
+        for _ in range(3):
+            response = client.post(
+                "/api/jobs/generate",
+                json={"prompt": "LED", "directory": str(tmp_path), "job_id": "../bad id"},
+            )
+            assert response.status_code == 400
+        assert server.admission[server.LLM].running == 0
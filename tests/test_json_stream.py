@@ -0,0 +1,47 @@
+import json
+
+from json_stream import JSONArrayStream
+
+RESPONSE = json.dumps({
+    "symbols": [
+        {"ref_des": "R1", "value": "330"},
+        {"ref_des": "D1", "value": "LED", "explanation": 'the "status" LED, {not} [json]'},
+        {"ref_des": "J1", "pins": [1, 2]},
+    ],
+    "nets": [{"name": "VCC", "connections": [{"ref": "R1", "pin": "1"}]}],
+})
+
+
+def _feed_all(parser, chunks):
+    return [item for chunk in chunks for item in parser.feed_items(chunk)]
+
+
+def test_elements_split_across_chunks_are_emitted_once_complete():
+    expected = [("symbols", s) for s in json.loads(RESPONSE)["symbols"]]
+
+    # Every chunk size, down to one character at a time
+    for size in (1, 2, 7, 64, len(RESPONSE)):
+        chunks = [RESPONSE[i:i + size] for i in range(0, len(RESPONSE), size)]
+        assert _feed_all(JSONArrayStream("symbols"), chunks) == expected
+
+    parser = JSONArrayStream("symbols")
+    assert parser.feed(RESPONSE[:RESPONSE.index("D1")]) == [{"ref_des": "R1", "value": "330"}]
+
+
+def test_text_around_a_code_fence_is_skipped():
+    chunks = ["Here is the plan:\n```json\n", RESPONSE[:40], RESPONSE[40:], "\n```\n"]
+
+    items = _feed_all(JSONArrayStream(["symbols", "nets"]), chunks)
+
+    assert [key for key, _ in items] == ["symbols"] * 3 + ["nets"]
+    assert items[-1][1]["name"] == "VCC"
+
+
+def test_escaped_quotes_and_brackets_in_strings_do_not_end_an_element():
+    text = '{"nets": [{"name": "A\\\\", "note": "say \\"}]\\""}, {"name": "B"}]}'
+
+    items = JSONArrayStream("nets").feed(text)
+
+    assert items == [{"name": "A\\", "note": 'say "}]"'}, {"name": "B"}]
+    # Keys inside elements and other arrays are not streamed
+    assert JSONArrayStream("name").feed(text) == []
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+KWARGS = {"input": "Choose the parts", "model": "openai/gpt-4o"}
+
+
+def test_error_replies_are_not_cached(make_agent):
+    agent = make_agent([{"match": "Choose", "response": {"error": {"message": "busy"}}}])
+
+    for _ in range(2):
+        asyncio.run(agent._run_llm(dict(KWARGS), phase=1))
+    assert agent.runner.calls == 2
+    assert agent.cache.get(agent.cache.make_key(KWARGS["model"], KWARGS["input"], None)) is None
+
+
+def test_pending_replies_are_stored_only_when_committed(make_agent):
+    agent = make_agent([{"match": "Choose", "response": {"symbols": []}}])
+    key = agent.cache.make_key(KWARGS["model"], KWARGS["input"], None)
+
+    pending = []
+    asyncio.run(agent._run_llm(dict(KWARGS), phase=1, pending_cache=pending))
+    assert [entry[0] for entry in pending] == [key]
+    assert agent.cache.get(key) is None
+
+    agent._commit_cache(pending)
+    assert pending == []
+    assert agent.cache.get(key) == '{"symbols": []}'
+
+
+def test_plan_that_fails_validation_is_not_cached(make_agent, resistor):
+    bad = {"symbols": [resistor("R1", symbol="NOT_A_PART")]}
+    agent = make_agent(
+        [{"match": "You are fixing specific symbols",
+          "response": {"symbols": [dict(resistor("R1", symbol="STILL_BAD"), index=0)]}}],
+        max_repair_rounds=1
+    )
+
+    pending = [("phase1-key", KWARGS["model"], '{"symbols": []}')]
+    with pytest.raises(ValueError):
+        asyncio.run(agent._validate_components(bad, [], KWARGS["model"], pending_cache=pending))
+    assert agent.cache.get("phase1-key") is None
+    # Neither the plan nor its repair reply
+    assert len(pending) == 2
+
+    good = {"symbols": [resistor("R1")]}
+    asyncio.run(agent._validate_components(good, [], KWARGS["model"], pending_cache=pending))
+    assert agent.cache.get("phase1-key") == '{"symbols": []}'
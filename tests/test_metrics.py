@@ -0,0 +1,31 @@
+import threading
+
+from metrics import Counter, Histogram
+
+
+def _run_threads(n, fn):
+    for _ in range(n):
+        thread = threading.Thread(target=fn)
+        thread.start()
+        thread.join()
+
+
+def test_counter_folds_shards_of_finished_threads():
+    counter = Counter("test_requests_total", "test", ("route",))
+    _run_threads(200, lambda: counter.inc("/api/generate"))
+    counter.inc("/api/generate")
+
+    assert counter.values() == {("/api/generate",): 201.0}
+    # Only the live (main) thread keeps its own shard
+    assert len(counter._shards) == 1
+
+
+def test_histogram_folds_shards_of_finished_threads():
+    histogram = Histogram("test_latency_seconds", "test", buckets=(0.1, 1.0))
+    _run_threads(100, lambda: histogram.observe(0.5))
+    histogram.observe(0.05)
+
+    cells = histogram.values()[()]
+    assert cells == [1.0, 100.0, 0.0, 50.05, 101.0]
+    assert len(histogram._shards) == 1
+    assert histogram.samples()[-1] == "test_latency_seconds_count 101"
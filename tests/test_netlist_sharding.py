@@ -0,0 +1,29 @@
+from netlist_sharding import partition_components
+
+
+def _symbol(lib, symbol, ref, explanation=""):
+    return {"lib": lib, "symbol": symbol, "ref_des": ref, "explanation": explanation}
+
+
+def test_parts_follow_the_shard_of_the_part_they_support():
+    gnd = _symbol("power.kicad_sym", "GND", "#PWR1")
+    symbols = [
+        _symbol("Connector_Generic.kicad_sym", "Conn_01x04", "J2", "UART header"),
+        _symbol("MCU_RaspberryPi.kicad_sym", "RP2040", "U1", "microcontroller"),
+        _symbol("Regulator_Linear.kicad_sym", "AMS1117-3.3", "U2", "3.3V LDO"),
+        _symbol("Device.kicad_sym", "C", "C1", "decoupling for U1"),
+        _symbol("Device.kicad_sym", "C", "C2", "input bulk capacitor"),
+        _symbol("Device.kicad_sym", "R", "R1", "series resistor on J2 TX"),
+        _symbol("Device.kicad_sym", "LED", "D1", "status LED"),
+        gnd,
+    ]
+
+    shards = partition_components(symbols)
+
+    assert [(s["name"], [m["ref_des"] for m in s["symbols"]]) for s in shards] == [
+        ("power", ["U2", "C2", "#PWR1"]),
+        ("core", ["U1", "C1", "D1", "#PWR1"]),
+        ("conn_J2", ["J2", "R1", "#PWR1"]),
+    ]
+    # Power symbols are shared, not copied
+    assert all(s["symbols"][-1] is gnd for s in shards)
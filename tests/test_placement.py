@@ -0,0 +1,44 @@
+import itertools
+import math
+
+from conftest import ROOT
+from placement import DEFAULT_CANVAS, MIN_SPACING_MM, IncrementalPlacer, layout_components
+
+LIB = ROOT / "bench" / "lib"
+
+
+def _symbols():
+    parts = [("Connector_Generic.kicad_sym", "Conn_01x02", "J1")]
+    parts += [("Device.kicad_sym", "R", f"R{i}") for i in range(1, 6)]
+    parts += [("Device.kicad_sym", "LED", f"D{i}") for i in range(1, 4)]
+    parts += [("power.kicad_sym", "GND", "#PWR1"), ("power.kicad_sym", "+3V3", "#PWR2")]
+    return [{"lib": lib, "symbol": symbol, "ref_des": ref} for lib, symbol, ref in parts]
+
+
+def _min_distance(positions):
+    return min(
+        math.hypot(a["x"] - b["x"], a["y"] - b["y"])
+        for a, b in itertools.combinations(positions, 2)
+    )
+
+
+def test_layout_keeps_minimum_spacing_inside_the_canvas():
+    positions = layout_components(_symbols(), LIB, DEFAULT_CANVAS)
+
+    assert _min_distance(positions) >= MIN_SPACING_MM
+    assert all(
+        DEFAULT_CANVAS["xmin"] <= at["x"] <= DEFAULT_CANVAS["xmax"]
+        and DEFAULT_CANVAS["ymin"] <= at["y"] <= DEFAULT_CANVAS["ymax"]
+        and at["rot"] == 0
+        for at in positions
+    )
+
+
+def test_incremental_placer_peek_does_not_take_the_cell():
+    placer = IncrementalPlacer(LIB, DEFAULT_CANVAS)
+    symbols = _symbols()
+
+    assert placer.peek(symbols[0]) == placer.place(symbols[0])
+    positions = [placer.place(s) for s in symbols[1:]]
+
+    assert _min_distance(positions) >= MIN_SPACING_MM
@@ -0,0 +1,131 @@
+import gzip
+import os
+import shlex
+import sys
+import threading
+
+import pytest
+
+import render_cache
+from render_cache import RenderCache, etag_matches, svg_response_parts
+
+# Stands in for `kicad-cli sch export svg --output DIR file.kicad_sch`: logs
+# each call, then writes the schematic's text wrapped in <svg>
+FAKE_KICAD_CLI = """
+import pathlib, sys, time
+args = sys.argv[1:]
+out = pathlib.Path(args[args.index("--output") + 1])
+sch = pathlib.Path(args[-1])
+with open({log!r}, "a") as f:
+    f.write(sch.name + "\\n")
+time.sleep({delay!r})
+(out / (sch.stem + ".svg")).write_text("<svg>" + sch.read_text() + "</svg>")
+"""
+
+
+@pytest.fixture
+def fake_cli(tmp_path, monkeypatch):
+    """Point KICAD_CLI at the fake; returns a function listing its calls."""
+    log = tmp_path / "calls.log"
+    script = tmp_path / "fake_kicad_cli.py"
+    script.write_text(FAKE_KICAD_CLI.format(log=str(log), delay=0.3))
+    monkeypatch.setenv("KICAD_CLI", f"{shlex.quote(sys.executable)} {shlex.quote(str(script))}")
+    return lambda: log.read_text().splitlines() if log.exists() else []
+
+
+def _schematic(tmp_path, name, text):
+    path = tmp_path / f"{name}.kicad_sch"
+    path.write_text(text)
+    return path
+
+
+def test_concurrent_renders_of_one_schematic_share_one_process(tmp_path, fake_cli):
+    cache = RenderCache(tmp_path / "cache")
+    sch = _schematic(tmp_path, "a", "(kicad_sch A)")
+    start = threading.Barrier(4)
+    results = []
+
+    def render():
+        start.wait()
+        results.append(cache.render(sch))
+
+    threads = [threading.Thread(target=render) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert fake_cli() == ["a.kicad_sch"]
+    assert cache.stats["renders"] == 1
+    assert cache.stats["shared"] + cache.stats["hits"] == 3
+    assert {r.etag for r in results} == {cache.content_hash(sch)}
+    assert [r.cached for r in results].count(False) == 1
+    assert results[0].svg_text() == "<svg>(kicad_sch A)</svg>"
+
+
+def test_least_recently_used_render_is_evicted(tmp_path, fake_cli):
+    cache = RenderCache(tmp_path / "cache")
+    a = cache.render(_schematic(tmp_path, "a", "(kicad_sch AAAA)"))
+    b = cache.render(_schematic(tmp_path, "b", "(kicad_sch BBBB)"))
+    os.utime(a.path, (1000, 1000))
+    os.utime(b.path, (2000, 2000))
+    # Room for two entries
+    cache.max_bytes = a.path.stat().st_size + b.path.stat().st_size
+
+    # A hit makes a the most recently used
+    assert cache.render(_schematic(tmp_path, "a", "(kicad_sch AAAA)")).cached
+    c = cache.render(_schematic(tmp_path, "c", "(kicad_sch CCCC)"))
+
+    assert a.path.is_file() and c.path.is_file()
+    assert not b.path.exists()
+    assert cache.stats["evictions"] == 1
+    assert fake_cli() == ["a.kicad_sch", "b.kicad_sch", "c.kicad_sch"]
+
+
+def test_svg_endpoint_serves_gzip_and_revalidates_by_etag(tmp_path, fake_cli, monkeypatch):
+    from starlette.testclient import TestClient
+
+    import server
+
+    cache = RenderCache(tmp_path / "cache")
+    monkeypatch.setattr(render_cache, "_cache", cache)
+    sch = _schematic(tmp_path, "a", "(kicad_sch A)")
+    url = f"/api/schematic-svg?path={sch}"
+
+    with TestClient(server.app) as client:
+        response = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.text == "<svg>(kicad_sch A)</svg>"
+        etag = response.headers["ETag"]
+        assert etag == f'"{cache.content_hash(sch)}"'
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+        # Edited schematic: new ETag, rendered again
+        sch.write_text("(kicad_sch BB)")
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    assert fake_cli() == ["a.kicad_sch", "a.kicad_sch"]
+
+
+def test_svg_response_parts_and_etag_matching(tmp_path, fake_cli):
+    result = RenderCache(tmp_path / "cache").render(_schematic(tmp_path, "a", "(kicad_sch A)"))
+
+    body, headers = svg_response_parts(result, "br, gzip")
+    assert headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body) == b"<svg>(kicad_sch A)</svg>"
+
+    body, headers = svg_response_parts(result, "")
+    assert "Content-Encoding" not in headers
+    assert body == b"<svg>(kicad_sch A)</svg>"
+
+    assert etag_matches(f'W/"{result.etag}"', result.etag)
+    assert etag_matches(f'"other", "{result.etag}"', result.etag)
+    assert etag_matches("*", result.etag)
+    assert not etag_matches('"other"', result.etag)
+    assert not etag_matches(None, result.etag)
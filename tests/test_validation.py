@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from allowlist_registry import get_allowlist
+from validation import validate_components
+
+ALLOWLIST = Path(__file__).resolve().parent.parent / "allow_list.json"
+
+
+def test_conflicts_are_reported_on_the_symbol_that_can_change(resistor):
+    allowlist = get_allowlist(ALLOWLIST)
+    plan = {"symbols": [resistor("R1", 40, 40), resistor("R2", 45, 40)]}
+
+    # Plan order: the later symbol gets the spacing warning
+    assert [i["index"] for i in validate_components(plan, allowlist)] == [1]
+
+    # R2 is already on the schematic, so R1 has to move
+    assert [i["index"] for i in validate_components(plan, allowlist, fixed={1})] == [0]
+
+
+def test_duplicate_ref_of_a_fixed_symbol_is_reported_on_the_other(resistor):
+    allowlist = get_allowlist(ALLOWLIST)
+    plan = {"symbols": [resistor("R1", 40, 40), resistor("R1", 140, 40)]}
+
+    issues = validate_components(plan, allowlist, fixed={1})
+    assert [(i["index"], i["code"]) for i in issues] == [(0, "duplicate_ref")]
+
+
+def test_malformed_fields_are_schema_issues(resistor):
+    allowlist = get_allowlist(ALLOWLIST)
+    wrong_types = resistor("R1")
+    wrong_types["lib"] = ["Device.kicad_sym"]
+    wrong_types["symbol"] = {"name": "R"}
+    bad_rotation = resistor("R2", 140, 40)
+    bad_rotation["at"]["rot"] = [90]
+
+    issues = validate_components({"symbols": [wrong_types, bad_rotation]}, allowlist)
+
+    assert [(i["index"], i["code"], i["message"]) for i in issues] == [
+        (0, "schema", "lib and symbol must be a string"),
+        (1, "position", "at.rot [90] is not 0/90/180/270"),
+    ]
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+import backend_common
+from backend_common import pcb_command
+from workspace import JobWorkspace, prune_workspaces, workspace_in_use, workspaces_in_use
+
+
+def test_prune_keeps_workspaces_in_use(tmp_path):
+    for job_id in ("old-running", "old-done", "new"):
+        JobWorkspace.create(job_id, tmp_path)
+    for job_id in ("old-running", "old-done"):
+        os.utime(tmp_path / job_id, (1000, 1000))
+
+    with workspace_in_use("old-running"):
+        assert workspaces_in_use() == ["old-running"]
+        assert prune_workspaces(tmp_path, max_age_seconds=3600, keep=workspaces_in_use()) == 1
+    assert workspaces_in_use() == []
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["new", "old-running"]
+
+
+def test_pcb_command_needs_a_job_with_a_placement_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(backend_common, "BASE_DIR", str(tmp_path))
+    root = tmp_path / "out" / "jobs"
+
+    with pytest.raises(ValueError):
+        pcb_command("/proj", None)
+    with pytest.raises(FileNotFoundError):
+        pcb_command("/proj", "missing")
+
+    # Artifact level "off": the workspace has only job.json
+    workspace = JobWorkspace.create("job-1", root)
+    with pytest.raises(FileNotFoundError, match="llm_output1.json"):
+        pcb_command("/proj", "job-1")
+
+    workspace.path("llm_output1.json.gz").write_bytes(b"")
+    cmd = pcb_command("/proj", "job-1")
+    assert cmd[1:] == [
+        str(tmp_path / "pcb.py"), "/proj", str(workspace.path("llm_output1.json.gz"))
+    ]
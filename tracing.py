@@ -0,0 +1,232 @@
+"""
+Cursor PCB - Tracing
+
+Lightweight nested spans for the generation pipeline (phases, LLM calls,
+library reads, file writes) with durations, byte counts and token counts.
+Traces are exported as OTLP/JSON files, so they can be loaded into any
+OpenTelemetry-compatible viewer without a live collector.
+
+Usage:
+    tracer = Tracer()
+    with tracer.activate():
+        with span("phase1", phase=1) as sp:
+            ...
+            sp.set("symbols", 12)
+    tracer.export("out/traces/trace.json")
+
+Module-level span() is a no-op when no tracer is active, so library code
+(e.g. schematic.py) can be instrumented unconditionally.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Iterator
+
+_current_tracer: ContextVar[Optional["Tracer"]] = ContextVar("pcb_tracer", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("pcb_span", default=None)
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id",
+        "start_ns", "end_ns", "attributes", "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any]
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_many(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add(self, key: str, amount: float) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def set_error(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+
+class _NullSpan:
+    """Stand-in returned when tracing is inactive; ignores everything."""
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def set_many(self, **attributes: Any) -> None:
+        pass
+
+    def add(self, key: str, amount: float) -> None:
+        pass
+
+    def set_error(self, exc: BaseException) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()]
+
+
+class Tracer:
+    """Collects the spans of one trace (one generate_schematic run)."""
+
+    def __init__(
+        self,
+        service_name: str = "pcb_agent",
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.service_name = service_name
+        self.attributes = attributes or {}
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self.export_path: Optional[Path] = None
+
+    @contextmanager
+    def activate(self) -> Iterator["Tracer"]:
+        """Make this the tracer used by module-level span() calls."""
+        token = _current_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _current_tracer.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time a block as a child of the current span."""
+        parent = _current_span.get()
+        parent_id = parent.span_id if parent and parent.trace_id == self.trace_id else None
+        sp = Span(name, self.trace_id, parent_id, attributes)
+        token = _current_span.set(sp)
+        try:
+            yield sp
+        except BaseException as e:
+            sp.set_error(e)
+            raise
+        finally:
+            sp.end_ns = time.time_ns()
+            _current_span.reset(token)
+            self.spans.append(sp)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Spans in OTLP/JSON (ExportTraceServiceRequest) format."""
+        return {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": _otlp_attributes(
+                        {"service.name": self.service_name, **self.attributes}
+                    )
+                },
+                "scopeSpans": [{
+                    "scope": {"name": "pcb_agent.tracing"},
+                    "spans": [
+                        {
+                            "traceId": sp.trace_id,
+                            "spanId": sp.span_id,
+                            **({"parentSpanId": sp.parent_id} if sp.parent_id else {}),
+                            "name": sp.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(sp.start_ns),
+                            "endTimeUnixNano": str(sp.end_ns or sp.start_ns),
+                            "attributes": _otlp_attributes(sp.attributes),
+                            "status": (
+                                {"code": 2, "message": sp.error} if sp.error else {"code": 1}
+                            ),
+                        }
+                        for sp in sorted(self.spans, key=lambda s: s.start_ns)
+                    ]
+                }]
+            }]
+        }
+
+    def export(self, path: str | Path) -> Path:
+        """Write the trace as an OTLP/JSON file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_otlp(), separators=(",", ":")), encoding="utf-8")
+        self.export_path = path
+        return path
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Timing breakdown for the result payload.
+
+        Returns:
+            Total duration, milliseconds per phase, and totals for LLM calls,
+            library reads and file writes
+        """
+        roots = [sp for sp in self.spans if sp.parent_id is None]
+        phases: Dict[str, float] = {}
+        for sp in self.spans:
+            if sp.name.startswith("phase"):
+                phases[sp.name] = round(phases.get(sp.name, 0.0) + sp.duration_ms, 2)
+
+        def totals(name: str, *keys: str) -> Dict[str, Any]:
+            matching = [sp for sp in self.spans if sp.name == name]
+            out = {
+                "count": len(matching),
+                "duration_ms": round(sum(sp.duration_ms for sp in matching), 2),
+            }
+            for key in keys:
+                out[key] = sum(sp.attributes.get(key, 0) for sp in matching)
+            return out
+
+        return {
+            "trace_id": self.trace_id,
+            "duration_ms": round(sum(sp.duration_ms for sp in roots), 2),
+            "phases": dict(sorted(phases.items())),
+            "llm": totals("llm.call", "input_tokens", "output_tokens", "cached"),
+            "library_reads": totals("library.read", "bytes"),
+            "file_writes": totals("file.write", "bytes"),
+            "export": str(self.export_path) if self.export_path else None,
+        }
+
+
+def span(name: str, **attributes: Any):
+    """Span on the active tracer, or a no-op context if tracing is off."""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        return nullcontext(NULL_SPAN)
+    return tracer.span(name, **attributes)
+
+
+def current_span() -> Span | _NullSpan:
+    """The innermost open span (or a no-op span)."""
+    return _current_span.get() or NULL_SPAN
@@ -0,0 +1,310 @@
+"""
+Cursor PCB - Output Validation
+
+Fast local checks for the Phase 1 component plan (llm_output1) and the
+Phase 5 netlist (llm_output2). Each problem is reported as an issue dict:
+
+    {"index": 3, "ref": "C7", "code": "footprint", "severity": "error",
+     "message": "footprint 'C_0805' is not the allowlist footprint 'C_0603...'"}
+
+"error" issues would break placement or wire drawing (unknown part or pin,
+malformed position, duplicate ref_des); "warning" issues produce a worse
+schematic but can still be drawn (spacing, canvas bounds). The index points
+at the offending symbol or net, so a repair prompt can ask the model for
+just those items and patch them back in.
+"""
+
+import math
+import re
+from typing import Dict, Any, List, Collection, Container, Iterable, Tuple
+
+from allowlist_registry import AllowlistSnapshot
+from design_model import Design
+
+MIN_SPACING_MM = 30.0
+VALID_ROTATIONS = {0, 90, 180, 270}
+SYMBOL_KEYS = ("lib", "symbol", "ref_des", "value", "at", "footprint")
+# Issues about where a symbol sits rather than which part it is
+LAYOUT_CODES = {"position", "spacing", "out_of_canvas"}
+
+ERROR = "error"
+WARNING = "warning"
+
+
+def _issue(
+    index: int,
+    ref: Any,
+    code: str,
+    message: str,
+    severity: str = ERROR
+) -> Dict[str, Any]:
+    return {"index": index, "ref": ref, "code": code, "severity": severity, "message": message}
+
+
+def errors(issues: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Only the issues with severity "error"."""
+    return [i for i in issues if i["severity"] == ERROR]
+
+
+def format_issues(issues: Iterable[Dict[str, Any]]) -> str:
+    """One line per issue, for logs and repair prompts."""
+    return "\n".join(
+        f"- [{i['index']}] {i['ref']}: {i['message']} ({i['code']})" for i in issues
+    )
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def check_symbol(
+    symbol: Any,
+    index: int,
+    allowlist: AllowlistSnapshot
+) -> List[Dict[str, Any]]:
+    """
+    Checks that need only one symbol: schema, allowlist membership, ref
+    prefix, footprint, position and canvas bounds.
+    """
+    if not isinstance(symbol, dict):
+        return [_issue(index, None, "schema", "symbol is not a JSON object")]
+
+    ref = symbol.get("ref_des")
+    missing = [k for k in SYMBOL_KEYS if k not in symbol]
+    if missing:
+        return [_issue(index, ref, "schema", f"missing keys: {', '.join(missing)}")]
+    not_str = [k for k in ("lib", "symbol") if not isinstance(symbol[k], str)]
+    if not_str:
+        return [_issue(index, ref, "schema", f"{' and '.join(not_str)} must be a string")]
+
+    issues = []
+    entry = allowlist.get(symbol["lib"], symbol["symbol"])
+    if entry is None:
+        issues.append(_issue(
+            index, ref, "unknown_part",
+            f"{symbol['lib']}:{symbol['symbol']} is not in the allowlist"
+        ))
+    else:
+        prefix = entry.get("ref", "")
+        if not isinstance(ref, str) or not re.fullmatch(rf"{re.escape(prefix)}[1-9]\d*", ref):
+            issues.append(_issue(
+                index, ref, "ref_prefix",
+                f"ref_des must be '{prefix}' followed by a positive integer"
+            ))
+        if symbol["footprint"] != entry.get("footprint", ""):
+            issues.append(_issue(
+                index, ref, "footprint",
+                f"footprint {symbol['footprint']!r} is not the allowlist footprint "
+                f"{entry.get('footprint', '')!r}"
+            ))
+
+    at = symbol["at"]
+    if not isinstance(at, dict) or not all(_is_number(at.get(k)) for k in ("x", "y")):
+        issues.append(_issue(index, ref, "position", "at must have numeric x and y"))
+        return issues
+    rot = at.get("rot", 0)
+    if not _is_number(rot) or rot not in VALID_ROTATIONS:
+        issues.append(_issue(index, ref, "position", f"at.rot {at.get('rot')!r} is not 0/90/180/270"))
+
+    canvas = allowlist.canvas
+    if all(k in canvas for k in ("xmin", "ymin", "xmax", "ymax")):
+        if not (canvas["xmin"] <= at["x"] <= canvas["xmax"]
+                and canvas["ymin"] <= at["y"] <= canvas["ymax"]):
+            issues.append(_issue(
+                index, ref, "out_of_canvas",
+                f"({at['x']}, {at['y']}) is outside the canvas "
+                f"x {canvas['xmin']}-{canvas['xmax']}, y {canvas['ymin']}-{canvas['ymax']}",
+                WARNING
+            ))
+    return issues
+
+
+def check_against_placed(
+    symbol: Dict[str, Any],
+    index: int,
+    placed: Iterable[Dict[str, Any]],
+    min_spacing: float = MIN_SPACING_MM
+) -> List[Dict[str, Any]]:
+    """Duplicate ref_des and spacing checks against symbols already accepted."""
+    issues = []
+    ref = symbol.get("ref_des")
+    at = symbol.get("at") or {}
+    for other in placed:
+        if other.get("ref_des") == ref:
+            issues.append(_issue(index, ref, "duplicate_ref", f"ref_des {ref} is used twice"))
+            continue
+        o = other.get("at") or {}
+        if not all(_is_number(v.get(k)) for v in (at, o) for k in ("x", "y")):
+            continue
+        distance = math.hypot(at["x"] - o["x"], at["y"] - o["y"])
+        if distance < min_spacing:
+            issues.append(_issue(
+                index, ref, "spacing",
+                f"{distance:.1f} mm from {other.get('ref_des')} "
+                f"(minimum {min_spacing:g} mm center-to-center)",
+                WARNING
+            ))
+    return issues
+
+
+def validate_components(
+    output: Dict[str, Any],
+    allowlist: AllowlistSnapshot,
+    min_spacing: float = MIN_SPACING_MM,
+    fixed: Collection[int] = ()
+) -> List[Dict[str, Any]]:
+    """
+    Validate a Phase 1 component plan.
+
+    Args:
+        output: llm_output1 ({"circuit_intent": ..., "symbols": [...]})
+        allowlist: Indexed allowlist the plan must draw from
+        min_spacing: Minimum center-to-center distance in mm
+        fixed: Indices of symbols that can no longer change (already placed
+            while streaming); they are checked first, so a duplicate ref_des
+            or spacing conflict is reported on the other symbol
+
+    Returns:
+        Issues in symbol order (empty list = valid)
+    """
+    symbols = output.get("symbols")
+    if not isinstance(symbols, list):
+        return [_issue(-1, None, "schema", "output has no symbols array")]
+
+    fixed = {i for i in fixed if 0 <= i < len(symbols)}
+    order = sorted(fixed) + [i for i in range(len(symbols)) if i not in fixed]
+    issues = []
+    accepted: List[Dict[str, Any]] = []
+    for i in order:
+        symbol = symbols[i]
+        item_issues = check_symbol(symbol, i, allowlist)
+        if isinstance(symbol, dict):
+            item_issues += check_against_placed(symbol, i, accepted, min_spacing)
+            accepted.append(symbol)
+        issues.extend(item_issues)
+    # Stable: issues of one symbol keep their order
+    issues.sort(key=lambda issue: issue["index"])
+    return issues
+
+
+def pin_table(output1_with_pins: Dict[str, Any] | Design) -> Dict[str, Container[str]]:
+    """
+    {ref_des: pin numbers} from add_pin_outs output, or a Design's pin
+    tables as they are (no copy).
+    """
+    if isinstance(output1_with_pins, Design):
+        return output1_with_pins.pin_table()
+    return {
+        s.get("ref_des"): set(s.get("pins", {}))
+        for s in output1_with_pins.get("symbols", [])
+    }
+
+
+def check_net(
+    net: Any,
+    index: int,
+    pins: Dict[str, Container[str]],
+    owners: Dict[Tuple[str, str], str]
+) -> List[Dict[str, Any]]:
+    """
+    Checks for one net: schema, known refs and pins, and pins already
+    claimed by a differently named net (owners maps (ref, pin) -> net name).
+    """
+    if not isinstance(net, dict) or not isinstance(net.get("connections"), list):
+        return [_issue(index, None, "schema", "net must be an object with a connections array")]
+
+    name = net.get("name")
+    if not isinstance(name, str) or not name:
+        return [_issue(index, name, "schema", "net has no name")]
+
+    issues = []
+    for conn in net["connections"]:
+        if not isinstance(conn, dict) or "ref" not in conn or "pin" not in conn:
+            issues.append(_issue(index, name, "schema", f"bad connection {conn!r}"))
+            continue
+        ref, pin = str(conn["ref"]), str(conn["pin"])
+        if ref not in pins:
+            issues.append(_issue(index, name, "unknown_ref", f"{ref} is not a placed component"))
+        elif pin not in pins[ref]:
+            issues.append(_issue(
+                index, name, "unknown_pin",
+                f"{ref} has no pin {pin} (pins: {', '.join(sorted(pins[ref], key=_pin_sort))})"
+            ))
+        elif owners.get((ref, pin), name) != name:
+            issues.append(_issue(
+                index, name, "pin_conflict",
+                f"{ref} pin {pin} is already in net {owners[(ref, pin)]}"
+            ))
+    return issues
+
+
+def claim_pins(net: Dict[str, Any], owners: Dict[Tuple[str, str], str]) -> None:
+    """Record the net's pins as owned by it (first net wins)."""
+    for conn in net.get("connections", []):
+        if isinstance(conn, dict):
+            owners.setdefault((str(conn.get("ref")), str(conn.get("pin"))), net.get("name"))
+
+
+def _pin_sort(pin: str) -> Tuple[int, Any]:
+    return (0, int(pin)) if pin.isdigit() else (1, pin)
+
+
+def validate_netlist(
+    output: Dict[str, Any],
+    output1_with_pins: Dict[str, Any] | Design
+) -> List[Dict[str, Any]]:
+    """
+    Validate a Phase 5 netlist against the placed components' pin tables.
+
+    Args:
+        output: llm_output2 ({"nets": [...]})
+        output1_with_pins: Component plan after add_pin_outs
+
+    Returns:
+        Issues in net order (empty list = valid)
+    """
+    nets = output.get("nets")
+    if not isinstance(nets, list):
+        return [_issue(-1, None, "schema", "output has no nets array")]
+
+    pins = pin_table(output1_with_pins)
+    owners: Dict[Tuple[str, str], str] = {}
+    issues = []
+    for i, net in enumerate(nets):
+        net_issues = check_net(net, i, pins, owners)
+        if not net_issues:
+            claim_pins(net, owners)
+        issues.extend(net_issues)
+    return issues
+
+
+def prune_invalid_connections(
+    output: Dict[str, Any],
+    output1_with_pins: Dict[str, Any] | Design
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Drop connections that cannot be drawn (unknown refs/pins, conflicting
+    pins) and malformed nets, keeping everything else.
+
+    Returns:
+        (cleaned netlist, issues for what was dropped)
+    """
+    pins = pin_table(output1_with_pins)
+    owners: Dict[Tuple[str, str], str] = {}
+    cleaned, dropped = [], []
+    for i, net in enumerate(output.get("nets", [])):
+        net_issues = check_net(net, i, pins, owners)
+        if any(issue["code"] == "schema" for issue in net_issues):
+            dropped.extend(net_issues)
+            continue
+        keep = []
+        for conn in net["connections"]:
+            conn_issues = check_net({**net, "connections": [conn]}, i, pins, owners)
+            if conn_issues:
+                dropped.extend(conn_issues)
+            else:
+                keep.append(conn)
+        net = {**net, "connections": keep}
+        claim_pins(net, owners)
+        cleaned.append(net)
+    return {**output, "nets": cleaned}, dropped
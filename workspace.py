@@ -0,0 +1,152 @@
+"""
+Cursor PCB - Job Workspaces
+
+Each generation run writes its artifacts (phase outputs, prompts, netlist)
+to its own directory, out/jobs/<job_id>/, so concurrent jobs never
+overwrite each other. Old workspaces are pruned by age and count, except
+those of jobs still using them (workspace_in_use).
+"""
+
+import json
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional, List
+
+DEFAULT_ROOT = "out/jobs"
+MANIFEST = "job.json"
+
+_JOB_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+# job_id -> number of runs in this process using its workspace
+_in_use: Dict[str, int] = {}
+_in_use_lock = threading.Lock()
+
+
+def new_job_id() -> str:
+    """Sortable job ID: UTC timestamp plus a random suffix."""
+    return time.strftime("%Y%m%d-%H%M%S", time.gmtime()) + "-" + uuid.uuid4().hex[:8]
+
+
+def validate_job_id(job_id: str) -> str:
+    """Reject IDs that could escape the workspace root (e.g. "../x")."""
+    if not isinstance(job_id, str) or not _JOB_ID_RE.match(job_id) or ".." in job_id:
+        raise ValueError(f"Invalid job id: {job_id!r}")
+    return job_id
+
+
+class JobWorkspace:
+    """Artifact directory for one job."""
+
+    def __init__(self, job_id: str, root: str | Path = DEFAULT_ROOT):
+        self.job_id = validate_job_id(job_id)
+        self.root = Path(root)
+        self.dir = self.root / self.job_id
+
+    @classmethod
+    def create(
+        cls,
+        job_id: Optional[str] = None,
+        root: str | Path = DEFAULT_ROOT,
+        meta: Optional[Dict[str, Any]] = None
+    ) -> "JobWorkspace":
+        """
+        Create (or reuse) the workspace directory and write its manifest.
+
+        Args:
+            job_id: ID to use (default: a new one)
+            root: Directory holding all workspaces
+            meta: Extra fields for job.json (e.g. request_id, model)
+        """
+        ws = cls(job_id or new_job_id(), root)
+        ws.dir.mkdir(parents=True, exist_ok=True)
+        manifest = {"job_id": ws.job_id, "created": time.time(), **(meta or {})}
+        ws.path(MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        return ws
+
+    @classmethod
+    def open(cls, job_id: str, root: str | Path = DEFAULT_ROOT) -> "JobWorkspace":
+        """Existing workspace for job_id; raises FileNotFoundError if missing."""
+        ws = cls(job_id, root)
+        if not ws.dir.is_dir():
+            raise FileNotFoundError(f"No workspace for job {job_id} in {ws.root}")
+        return ws
+
+    def path(self, name: str) -> Path:
+        """Path of an artifact inside the workspace."""
+        return self.dir / name
+
+    def manifest(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.path(MANIFEST).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {"job_id": self.job_id}
+
+    def __repr__(self) -> str:
+        return f"JobWorkspace({self.job_id!r}, root={str(self.root)!r})"
+
+
+@contextmanager
+def workspace_in_use(job_id: str) -> Iterator[None]:
+    """Mark a job's workspace as in use, so prune_workspaces keeps it."""
+    with _in_use_lock:
+        _in_use[job_id] = _in_use.get(job_id, 0) + 1
+    try:
+        yield
+    finally:
+        with _in_use_lock:
+            _in_use[job_id] -= 1
+            if not _in_use[job_id]:
+                del _in_use[job_id]
+
+
+def workspaces_in_use() -> List[str]:
+    """Job IDs whose workspace a run in this process is using."""
+    with _in_use_lock:
+        return list(_in_use)
+
+
+def prune_workspaces(
+    root: str | Path = DEFAULT_ROOT,
+    max_age_seconds: Optional[float] = 7 * 24 * 3600,
+    max_jobs: Optional[int] = 200,
+    keep: Optional[List[str]] = None
+) -> int:
+    """
+    Delete workspaces older than max_age_seconds, then the oldest beyond max_jobs.
+
+    Args:
+        root: Directory holding all workspaces
+        max_age_seconds: Age limit by directory mtime (None = no limit)
+        max_jobs: Number of workspaces to keep (None = no limit)
+        keep: Job IDs never to delete (e.g. jobs still running)
+
+    Returns:
+        Number of workspaces removed
+    """
+    root = Path(root)
+    if not root.is_dir():
+        return 0
+    keep = set(keep or ())
+    jobs = []
+    for d in root.iterdir():
+        if d.is_dir() and d.name not in keep:
+            try:
+                jobs.append((d.stat().st_mtime, d))
+            except OSError:
+                continue
+    jobs.sort(key=lambda j: j[0], reverse=True)
+
+    now = time.time()
+    removed = 0
+    for i, (mtime, d) in enumerate(jobs):
+        too_old = max_age_seconds is not None and now - mtime > max_age_seconds
+        too_many = max_jobs is not None and i >= max_jobs
+        if too_old or too_many:
+            shutil.rmtree(d, ignore_errors=True)
+            removed += 1
+    return removed